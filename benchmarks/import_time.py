@@ -0,0 +1,99 @@
+"""Import-time benchmark for the Qt-free core.
+
+Imports each module in a fresh interpreter with `python -X importtime` and
+reports the cumulative import time, and fails when a headless module pulls in
+Qt, PortAudio or requests, or exceeds its time budget:
+
+    python benchmarks/import_time.py
+    python benchmarks/import_time.py --json import_time.json
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+from typing import Dict, List
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src')
+
+# Modules that must never be imported just by importing these
+HEAVY_MODULES = ('PyQt5', 'pyaudio', 'requests')
+
+# module -> cumulative import budget in milliseconds
+HEADLESS_MODULES = {
+    'vibecatch.core.config': 20,
+    'vibecatch.core.playlist_store': 50,
+    'vibecatch.core.audio_manager': 80,
+    'vibecatch.cli': 60,
+}
+
+
+def import_profile(module: str) -> Dict[str, int]:
+    """Cumulative import time in microseconds of every module `module` loads"""
+    env = dict(os.environ, PYTHONPATH=SRC_DIR + os.pathsep + os.environ.get('PYTHONPATH', ''))
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        capture_output=True, text=True, env=env
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{result.stderr}")
+
+    profile = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or '|' not in line:
+            continue
+        fields = line[len('import time:'):].split('|')
+        try:
+            profile[fields[2].strip()] = int(fields[1])
+        except ValueError:
+            # Header line
+            continue
+    return profile
+
+
+def run(modules: Dict[str, int], repeat: int) -> List[dict]:
+    results = []
+    for module, budget in modules.items():
+        # Best of several runs, to keep disk cache noise out of the numbers
+        runs = [import_profile(module) for _ in range(repeat)]
+        profile = min(runs, key=lambda p: p.get(module, 0))
+        heavy = sorted(
+            name for name in profile
+            if name.split('.')[0] in HEAVY_MODULES
+        )
+        results.append({
+            'module': module,
+            'ms': round(profile.get(module, 0) / 1000, 2),
+            'budget_ms': budget,
+            'modules_loaded': len(profile),
+            'heavy_imports': heavy,
+        })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure vibecatch import times")
+    parser.add_argument('--repeat', type=int, default=3, help="runs per module, best is kept")
+    parser.add_argument('--json', help="also write results to this file")
+    args = parser.parse_args()
+
+    results = run(HEADLESS_MODULES, args.repeat)
+    failed = False
+    for result in results:
+        problems = []
+        if result['heavy_imports']:
+            problems.append(f"imports {', '.join(result['heavy_imports'][:3])}")
+        if result['ms'] > result['budget_ms']:
+            problems.append(f"over budget of {result['budget_ms']} ms")
+        failed = failed or bool(problems)
+        print(f"{result['module']:<32} {result['ms']:>8.1f} ms  "
+              f"{result['modules_loaded']:>4} modules  {'; '.join(problems) or 'ok'}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
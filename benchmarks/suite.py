@@ -0,0 +1,388 @@
+"""Benchmark suite for capture, recognition and playlist operations.
+
+Every benchmark runs on synthetic, seeded input inside a fresh temporary
+directory, so no user data, cache or network is involved and runs on the same
+machine are comparable. Results are written as JSON and can be checked against
+an earlier run:
+
+    python benchmarks/suite.py --json baseline.json
+    python benchmarks/suite.py --json after.json --compare baseline.json
+    python benchmarks/suite.py --only playlist --sizes 1000,10000
+    python benchmarks/suite.py --quick
+
+Groups:
+
+    capture    synthetic PCM written block by block into the capture ring
+               buffer, windows read back out, then gated and encoded for upload
+    recognize  Shazam backend against the local mock API with --latency,
+               one request at a time and with the connection pool saturated
+    playlist   add_to_playlist, load_playlists and PlaylistWidget.add_song
+               at --sizes songs (PlaylistWidget needs PyQt5)
+
+With --compare, medians more than --threshold slower than the baseline are
+reported and the exit status is 1.
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT_DIR, 'src'))
+
+import numpy as np  # noqa: E402
+
+from vibecatch.core.config import (  # noqa: E402
+    SAMPLE_RATE, CHUNK_SIZE, RECORD_TIME, RING_BUFFER_SECONDS, API_POOL_SIZE, VIBE_CATEGORIES
+)
+
+SCHEMA = 1
+SEED = 1234
+GROUPS = ('capture', 'recognize', 'playlist')
+DEFAULT_SIZES = (1000, 10000, 100000)
+
+
+def synthetic_pcm(seconds: float, seed: int = SEED) -> np.ndarray:
+    """Chords with a beat over light noise; passes the capture gate like music"""
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(SAMPLE_RATE * seconds)) / SAMPLE_RATE
+    tones = sum(np.sin(2 * np.pi * f * t) for f in (220.0, 277.2, 329.6, 440.0))
+    beat = 0.3 + 0.7 * np.exp(-8 * ((t * 2) % 1))
+    signal = 3000 * tones * beat + rng.normal(0, 200, len(t))
+    return np.clip(signal, -32768, 32767).astype(np.int16)
+
+
+def synthetic_songs(count: int, seed: int = SEED) -> List[dict]:
+    """`count` distinct songs with realistic title and artist lengths"""
+    rng = np.random.default_rng(seed)
+    words = ['Night', 'Drive', 'Golden', 'Hour', 'Echo', 'Paper', 'Hearts', 'River',
+             'Neon', 'Summer', 'Ghost', 'Fire', 'Blue', 'Static', 'Dream', 'Signal']
+    songs = []
+    for i in range(count):
+        title = ' '.join(rng.choice(words, size=int(rng.integers(1, 4))))
+        songs.append({
+            'title': f"{title} {i}",
+            'artist': f"Artist {int(rng.integers(0, max(count // 10, 1)))}",
+            'key': str(100000 + i)
+        })
+    return songs
+
+
+def measure(func: Callable[[], None], repeat: int, setup: Optional[Callable[[], None]] = None,
+            warmup: bool = True) -> List[float]:
+    """Wall-clock seconds of `repeat` calls, each after a fresh `setup`"""
+    if warmup:
+        if setup:
+            setup()
+        func()
+    timings = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        gc.collect()
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def result(name: str, timings: List[float], ops: int = 1, **params) -> dict:
+    median = statistics.median(timings)
+    return {
+        'name': name,
+        'params': params,
+        'repeat': len(timings),
+        'ops': ops,
+        'min_s': round(min(timings), 6),
+        'median_s': round(median, 6),
+        'mean_s': round(statistics.fmean(timings), 6),
+        'stdev_s': round(statistics.stdev(timings), 6) if len(timings) > 1 else 0.0,
+        'per_op_us': round(median / ops * 1e6, 3),
+    }
+
+
+def skipped(name: str, reason: str, **params) -> dict:
+    return {'name': name, 'params': params, 'skipped': reason}
+
+
+def bench_capture(args) -> List[dict]:
+    """Ring buffer writes as done by the PortAudio callback, window reads and upload encoding"""
+    from vibecatch.core.audio_gate import AudioGate
+    from vibecatch.core.preprocess import prepare_upload
+    from vibecatch.core.ring_buffer import RingBuffer
+    from vibecatch.core.wav import encode_wav
+
+    pcm = synthetic_pcm(RECORD_TIME)
+    blocks = [pcm[i:i + CHUNK_SIZE] for i in range(0, len(pcm), CHUNK_SIZE)]
+    raw_blocks = [block.tobytes() for block in blocks]
+    ring = RingBuffer(int(SAMPLE_RATE * RING_BUFFER_SECONDS))
+
+    def write_blocks():
+        for data in raw_blocks:
+            # Same conversion as AudioSession._callback
+            ring.write(np.frombuffer(data, dtype=np.int16))
+
+    def read_window():
+        view, _, _ = ring.since(ring.written - len(pcm))
+        view.tobytes()
+
+    capture = pcm.tobytes()
+    gate = AudioGate()
+    prepared = prepare_upload(capture)
+    params = {'seconds': RECORD_TIME}
+    return [
+        result('capture.ring_write', measure(write_blocks, args.repeat), len(blocks),
+               **params, block=CHUNK_SIZE),
+        result('capture.read_window', measure(read_window, args.repeat), **params),
+        result('capture.gate', measure(lambda: gate.check(capture), args.repeat), **params),
+        result('encode.prepare_upload', measure(lambda: prepare_upload(capture), args.repeat),
+               **params),
+        result('encode.wav', measure(lambda: encode_wav(*prepared), args.repeat), **params),
+    ]
+
+
+def bench_recognize(args) -> List[dict]:
+    """Full upload path against the local mock API"""
+    from vibecatch.core.backends import ShazamBackend
+    from vibecatch.core.mock_server import start_mock_server
+    from vibecatch.core.recognition_client import RecognitionClient
+
+    server, endpoint = start_mock_server(latency=args.latency)
+    # The mock API has no quota to share with real runs
+    backend = ShazamBackend(RecognitionClient(endpoint=endpoint, api_key='benchmark',
+                                              use_scheduler=False))
+    pcm = synthetic_pcm(RECORD_TIME).tobytes()
+    requests_per_run = args.requests
+    params = {'latency_s': args.latency, 'seconds': RECORD_TIME}
+
+    def sequential():
+        for _ in range(requests_per_run):
+            if backend.recognize(pcm) is None:
+                raise RuntimeError("Mock API did not answer")
+
+    def concurrent():
+        with ThreadPoolExecutor(max_workers=API_POOL_SIZE) as executor:
+            songs = list(executor.map(backend.recognize, [pcm] * requests_per_run))
+        if None in songs:
+            raise RuntimeError("Mock API did not answer")
+
+    try:
+        return [
+            result('recognize.sequential', measure(sequential, args.repeat), requests_per_run,
+                   **params),
+            result('recognize.concurrent', measure(concurrent, args.repeat), requests_per_run,
+                   **params, workers=API_POOL_SIZE),
+        ]
+    finally:
+        backend.close()
+        server.shutdown()
+        server.server_close()
+
+
+def bench_playlist(args) -> List[dict]:
+    """Playlist writes, loading and the playlist widget at each size"""
+    from vibecatch.core.audio_manager import AudioManager
+    from vibecatch.core.catalog import Catalog
+    from vibecatch.core.playlist_store import PlaylistStore, atomic_write_json
+
+    vibe_ids = list(VIBE_CATEGORIES)
+    results = []
+    for size in args.sizes:
+        songs = synthetic_songs(size)
+        assignments = [(song, vibe_ids[i % len(vibe_ids)]) for i, song in enumerate(songs)]
+        # Slow cases get fewer runs, so 100k songs stays practical
+        repeat = max(1, min(args.repeat, 200000 // size))
+        state = {}
+
+        def fresh_manager():
+            if 'manager' in state:
+                state.pop('manager').store.close()
+            for path in ('playlists.json', 'playlists.journal'):
+                if os.path.exists(path):
+                    os.remove(path)
+            manager = AudioManager()
+            manager.store.close()
+            manager.store = PlaylistStore('playlists.json', 'playlists.journal')
+            manager.load_playlists()
+            state['manager'] = manager
+
+        def add_all():
+            manager = state['manager']
+            for song, vibe_id in assignments:
+                manager.add_to_playlist(song, vibe_id)
+
+        def add_and_flush():
+            add_all()
+            state['manager'].store.flush()
+
+        results.append(result('playlist.add_to_playlist', measure(add_all, repeat, fresh_manager),
+                              size, songs=size))
+        results.append(result('playlist.add_to_playlist_durable',
+                              measure(add_and_flush, repeat, fresh_manager), size, songs=size))
+        state.pop('manager').store.close()
+
+        catalog = Catalog()
+        for song, vibe_id in assignments:
+            catalog.add(song, vibe_id)
+        atomic_write_json('playlists.json', Catalog.to_json(catalog.export()))
+        if os.path.exists('playlists.journal'):
+            os.remove('playlists.journal')
+
+        def load():
+            manager = AudioManager()
+            manager.store.close()
+            manager.store = PlaylistStore('playlists.json', 'playlists.journal',
+                                          write_behind=False)
+            manager.load_playlists()
+
+        results.append(result('playlist.load_playlists', measure(load, repeat), size, songs=size))
+        results.append(bench_widget(songs, repeat, size))
+    return results
+
+
+def bench_widget(songs: List[dict], repeat: int, size: int) -> dict:
+    """PlaylistWidget.add_song for every song, then one event loop pass"""
+    try:
+        os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+        from PyQt5.QtWidgets import QApplication
+        from vibecatch.ui.playlist_widget import PlaylistWidget
+    except ImportError as e:
+        return skipped('playlist.widget_add_song', f"PyQt5 unavailable: {e}", songs=size)
+
+    app = QApplication.instance() or QApplication(sys.argv[:1])
+    vibe_id = next(iter(VIBE_CATEGORIES))
+    state = {}
+
+    def fresh_widget():
+        if 'widget' in state:
+            state.pop('widget').deleteLater()
+            app.processEvents()
+        state['widget'] = PlaylistWidget(vibe_id, VIBE_CATEGORIES[vibe_id])
+
+    def add_all():
+        widget = state['widget']
+        for song in songs:
+            widget.add_song(song['title'], song['artist'])
+        app.processEvents()
+
+    timings = measure(add_all, repeat, fresh_widget)
+    state.pop('widget').deleteLater()
+    return result('playlist.widget_add_song', timings, size, songs=size)
+
+
+BENCHMARKS: Dict[str, Callable[[argparse.Namespace], List[dict]]] = {
+    'capture': bench_capture,
+    'recognize': bench_recognize,
+    'playlist': bench_playlist,
+}
+
+
+def environment() -> dict:
+    """What the numbers were measured on"""
+    try:
+        commit = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT_DIR,
+            capture_output=True, text=True, timeout=10
+        ).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        commit = ''
+    return {
+        'commit': commit,
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'cpu_count': os.cpu_count(),
+    }
+
+
+def result_key(record: dict) -> str:
+    params = ','.join(f"{key}={value}" for key, value in sorted(record['params'].items()))
+    return f"{record['name']}[{params}]"
+
+
+def compare(results: List[dict], baseline_path: str, threshold: float) -> List[str]:
+    """Print the change against a baseline; returns the regressed benchmarks"""
+    with open(baseline_path, 'r') as f:
+        baseline = {result_key(record): record for record in json.load(f)['results']}
+    regressions = []
+    print(f"\nCompared with {baseline_path}:")
+    for record in results:
+        key = result_key(record)
+        before = baseline.get(key)
+        if 'skipped' in record or not before or 'skipped' in before:
+            continue
+        change = record['median_s'] / before['median_s'] - 1 if before['median_s'] else 0.0
+        flag = ''
+        if change > threshold:
+            flag = '  REGRESSION'
+            regressions.append(key)
+        print(f"  {key:<60} {change:+7.1%}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark vibecatch capture, recognition and playlists")
+    parser.add_argument('--only', action='append', choices=GROUPS,
+                        help="run only this group (may be repeated)")
+    parser.add_argument('--sizes', default=','.join(map(str, DEFAULT_SIZES)),
+                        help="playlist sizes, comma separated")
+    parser.add_argument('--repeat', type=int, default=5, help="timed runs per benchmark")
+    parser.add_argument('--latency', type=float, default=0.05,
+                        help="seconds the mock API waits before answering")
+    parser.add_argument('--requests', type=int, default=16,
+                        help="recognitions per recognize run")
+    parser.add_argument('--quick', action='store_true',
+                        help="1000 songs and 3 runs, for a fast sanity check")
+    parser.add_argument('--json', help="write results to this file")
+    parser.add_argument('--compare', help="baseline results to compare against")
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help="slowdown of the median that counts as a regression")
+    args = parser.parse_args()
+    args.sizes = [int(size) for size in args.sizes.split(',') if size.strip()]
+    if args.quick:
+        args.sizes = [DEFAULT_SIZES[0]]
+        args.repeat = min(args.repeat, 3)
+
+    results = []
+    with tempfile.TemporaryDirectory(prefix='vibecatch-bench-') as workdir:
+        cwd = os.getcwd()
+        # Relative data files (caches, playlists) land in the scratch directory
+        os.chdir(workdir)
+        try:
+            for group in args.only or GROUPS:
+                for record in BENCHMARKS[group](args):
+                    results.append(record)
+                    if 'skipped' in record:
+                        print(f"{result_key(record):<60} skipped: {record['skipped']}")
+                    else:
+                        print(f"{result_key(record):<60} {record['median_s'] * 1000:>10.2f} ms"
+                              f"  {record['per_op_us']:>10.2f} us/op")
+        finally:
+            os.chdir(cwd)
+
+    report = {
+        'schema': SCHEMA,
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'seed': SEED,
+        'environment': environment(),
+        'results': results,
+    }
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    regressions = compare(results, args.compare, args.threshold) if args.compare else []
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -9,7 +9,6 @@ import {
   Stack,
   LinearProgress
 } from '@mui/material';
-import axios from 'axios';
 import { AudioDebugger } from '../utils/AudioDebugger';
 
 const MOOD_PLAYLISTS = [
@@ -24,8 +23,21 @@ const MOOD_PLAYLISTS = [
 const SAMPLE_RATE = 44100;
 const BIT_DEPTH = 16;
 const CHANNELS = 1;
-const MAX_FILE_SIZE = 500 * 1000; // 500KB max according to Shazam API
 const RECORD_TIME = 5000; // 5 seconds in milliseconds
+const CHUNK_FRAMES = 4096;
+
+// Local recognition service (python -m vibecatch serve); it holds the API
+// connection, result cache and fingerprint index shared by every client
+const SERVICE_URL = import.meta.env.VITE_VIBECATCH_SERVICE_URL || 'ws://127.0.0.1:8766';
+
+const toInt16 = (samples) => {
+  const pcm = new Int16Array(samples.length);
+  for (let i = 0; i < samples.length; i++) {
+    const s = Math.max(-1, Math.min(1, samples[i]));
+    pcm[i] = s < 0 ? s * 0x8000 : s * 0x7FFF;
+  }
+  return pcm;
+};
 
 const SongRecognition = () => {
   const [isListening, setIsListening] = useState(false);
@@ -37,15 +49,45 @@ const SongRecognition = () => {
   const [recordingProgress, setRecordingProgress] = useState(0);
   
   const mediaStream = useRef(null);
-  const mediaRecorder = useRef(null);
-  const recordedChunks = useRef([]);
+  const audioContext = useRef(null);
+  const processor = useRef(null);
+  const socket = useRef(null);
+  const matched = useRef(false);
   const progressInterval = useRef(null);
+  const stopTimeout = useRef(null);
   const startTime = useRef(0);
 
   useEffect(() => {
     return () => stopListening();
   }, []);
 
+  const openSocket = (sampleRate) => new Promise((resolve, reject) => {
+    const ws = new WebSocket(`${SERVICE_URL}/ws/recognize?rate=${sampleRate}`);
+    ws.binaryType = 'arraybuffer';
+    ws.onopen = () => resolve(ws);
+    ws.onerror = () => reject(new Error(`Recognition service not reachable at ${SERVICE_URL}`));
+    ws.onmessage = (event) => {
+      const message = JSON.parse(event.data);
+      AudioDebugger.log('Service', `Message: ${message.type}`, message);
+      if (message.type === 'match' && !matched.current) {
+        matched.current = true;
+        setRecognizedSong(message.song);
+        setShowPlaylistOptions(true);
+        stopListening();
+      } else if (message.type === 'done' && !matched.current) {
+        setError('Could not identify the song. Please try again.');
+      } else if (message.type === 'error') {
+        setError(`Recognition failed: ${message.message}`);
+      }
+    };
+    ws.onclose = () => {
+      // A newer socket may already have replaced this one
+      if (socket.current === ws) {
+        socket.current = null;
+      }
+    };
+  });
+
   const initializeAudio = async () => {
     try {
       AudioDebugger.log('Init', 'Starting audio initialization');
@@ -63,52 +105,34 @@ const SongRecognition = () => {
 
       AudioDebugger.log('Init', 'Got media stream');
       await AudioDebugger.analyzeStream(stream);
-
       mediaStream.current = stream;
-      mediaRecorder.current = new MediaRecorder(stream, {
-        mimeType: 'audio/webm;codecs=opus',
-        audioBitsPerSecond: SAMPLE_RATE * BIT_DEPTH
-      });
-
-      AudioDebugger.log('Init', 'MediaRecorder created', {
-        state: mediaRecorder.current.state,
-        mimeType: mediaRecorder.current.mimeType,
-        bitrate: mediaRecorder.current.audioBitsPerSecond
-      });
-
-      recordedChunks.current = [];
-
-      mediaRecorder.current.ondataavailable = (event) => {
-        if (event.data.size > 0) {
-          AudioDebugger.log('Recording', `Chunk received: ${event.data.size} bytes`);
-          recordedChunks.current.push(event.data);
-        }
-      };
 
-      mediaRecorder.current.onstop = async () => {
-        AudioDebugger.log('Recording', 'MediaRecorder stopped');
-        
-        if (recordedChunks.current.length === 0) {
-          setError('No audio data recorded. Please try again.');
-          return;
-        }
-
-        const audioBlob = new Blob(recordedChunks.current, { type: 'audio/webm;codecs=opus' });
-        AudioDebugger.logAudioData(audioBlob);
-
-        if (audioBlob.size > MAX_FILE_SIZE) {
-          AudioDebugger.log('Recording', 'Audio file too large, truncating');
-          const truncatedBlob = audioBlob.slice(0, MAX_FILE_SIZE);
-          await recognizeSongWithAPI(truncatedBlob);
-        } else {
-          await recognizeSongWithAPI(audioBlob);
+      // Raw PCM is streamed to the service in small chunks while recording,
+      // so it can answer before the full RECORD_TIME has passed
+      const context = new AudioContext();
+      audioContext.current = context;
+      socket.current = await openSocket(context.sampleRate);
+
+      const source = context.createMediaStreamSource(stream);
+      const node = context.createScriptProcessor(CHUNK_FRAMES, CHANNELS, CHANNELS);
+      node.onaudioprocess = (event) => {
+        if (socket.current?.readyState === WebSocket.OPEN) {
+          socket.current.send(toInt16(event.inputBuffer.getChannelData(0)).buffer);
         }
       };
+      source.connect(node);
+      node.connect(context.destination);
+      processor.current = node;
 
+      AudioDebugger.log('Init', 'Streaming to recognition service', {
+        sampleRate: context.sampleRate,
+        url: SERVICE_URL
+      });
       return true;
     } catch (err) {
       AudioDebugger.log('Error', 'Audio initialization failed', err);
-      setError(`Microphone access error: ${err.message}`);
+      setError(`Audio initialization error: ${err.message}`);
+      stopListening();
       return false;
     }
   };
@@ -117,9 +141,16 @@ const SongRecognition = () => {
     AudioDebugger.log('Cleanup', 'Stopping recording');
     
     clearInterval(progressInterval.current);
-    
-    if (mediaRecorder.current?.state === 'recording') {
-      mediaRecorder.current.stop();
+    clearTimeout(stopTimeout.current);
+
+    if (processor.current) {
+      processor.current.disconnect();
+      processor.current = null;
+    }
+
+    if (audioContext.current) {
+      audioContext.current.close();
+      audioContext.current = null;
     }
 
     if (mediaStream.current) {
@@ -130,60 +161,24 @@ const SongRecognition = () => {
       mediaStream.current = null;
     }
 
+    // The service answers with any last match and then 'done'
+    if (socket.current?.readyState === WebSocket.OPEN) {
+      socket.current.send(JSON.stringify({ type: 'stop' }));
+    }
+
     setIsListening(false);
     setStatus('');
     setRecordingProgress(0);
-    recordedChunks.current = [];
     AudioDebugger.log('Cleanup', 'Complete');
   };
 
-  const recognizeSongWithAPI = async (audioBlob) => {
-    try {
-      AudioDebugger.log('API', 'Preparing request');
-      const formData = new FormData();
-      formData.append('upload_file', audioBlob, 'recording.webm');
-
-      AudioDebugger.log('API', 'Sending request to Shazam');
-      const response = await axios({
-        method: 'POST',
-        url: 'https://shazam-api6.p.rapidapi.com/shazam/recognize/',
-        headers: {
-          'x-rapidapi-key': 'fa5a6a869emsha1e5c0d55e85365p18dc1djsnd0540648d450',
-          'x-rapidapi-host': 'shazam-api6.p.rapidapi.com'
-        },
-        data: formData,
-        maxContentLength: Infinity,
-        maxBodyLength: Infinity
-      });
-
-      AudioDebugger.log('API', 'Response received', response.data);
-
-      if (response.data && response.data.track) {
-        setRecognizedSong({
-          title: response.data.track.title,
-          artist: response.data.track.subtitle,
-          key: response.data.track.key
-        });
-        setShowPlaylistOptions(true);
-        return true;
-      } else {
-        setError('Could not identify the song. Please try again.');
-        return false;
-      }
-    } catch (err) {
-      AudioDebugger.log('Error', 'API request failed', err);
-      const errorMessage = err.response?.data?.message || err.message;
-      setError(`Recognition failed: ${errorMessage}`);
-      return false;
-    }
-  };
-
   const startListening = async () => {
     AudioDebugger.log('Start', 'Starting recording process');
     setIsListening(true);
     setError(null);
     setShowPlaylistOptions(false);
     setStatus('Initializing microphone...');
+    matched.current = false;
     
     const audioInitialized = await initializeAudio();
     if (!audioInitialized) {
@@ -194,7 +189,6 @@ const SongRecognition = () => {
 
     setStatus('Recording...');
     startTime.current = Date.now();
-    mediaRecorder.current.start(100); // Collect data every 100ms
 
     // Update progress
     progressInterval.current = setInterval(() => {
@@ -205,11 +199,9 @@ const SongRecognition = () => {
     }, 100);
 
     // Stop recording after RECORD_TIME
-    setTimeout(() => {
-      if (mediaRecorder.current?.state === 'recording') {
-        AudioDebugger.log('Recording', 'Maximum time reached, stopping');
-        stopListening();
-      }
+    stopTimeout.current = setTimeout(() => {
+      AudioDebugger.log('Recording', 'Maximum time reached, stopping');
+      stopListening();
     }, RECORD_TIME);
   };
 
@@ -1,22 +1,48 @@
+import argparse
 import sys
-from PyQt5.QtWidgets import QApplication
 
-from .core.audio_manager import AudioManager
-from .ui.main_window import MainWindow
+from .cli import COMMANDS, add_instrumentation_arguments, instrumented, main as cli_main
 
-def main():
-    """Main application entry point"""
-    app = QApplication(sys.argv)
+def run_gui(argv):
+    """Start the desktop application"""
+    parser = argparse.ArgumentParser(prog="vibecatch")
+    parser.add_argument('--monitor', action='store_true',
+                        help="start in continuous monitoring mode")
+    add_instrumentation_arguments(parser)
+    args, qt_args = parser.parse_known_args(argv)
+    args.qt_args = qt_args
+    return instrumented(run_app, args)
+
+def run_app(args):
+    """Run the Qt event loop until the window is closed"""
+    from PyQt5.QtWidgets import QApplication
+
+    from .ui.audio_adapter import QtAudioManager
+    from .ui.main_window import MainWindow
+
+    app = QApplication(sys.argv[:1] + args.qt_args)
     
     # Initialize audio manager
-    audio_manager = AudioManager()
+    audio_manager = QtAudioManager()
     
     # Create and show main window
     window = MainWindow(audio_manager)
     window.show()
+    if args.monitor:
+        window.record_widget.monitor_button.setChecked(True)
     
     # Start application event loop
-    sys.exit(app.exec_())
+    exit_code = app.exec_()
+    audio_manager.close()
+    return exit_code
+
+def main():
+    """Main application entry point"""
+    argv = sys.argv[1:]
+    # Headless subcommands must not pull in Qt
+    if argv and argv[0] in COMMANDS:
+        sys.exit(cli_main(argv))
+    sys.exit(run_gui(argv))
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,242 @@
+"""Headless command line interface; never imports Qt"""
+import argparse
+import sys
+from typing import List, Optional
+
+from .core.config import (
+    VIBE_CATEGORIES, RECOGNITION_BACKENDS, BATCH_SEGMENT, BATCH_HOP, BATCH_WORKERS,
+    BATCH_RATE_LIMIT, BATCH_CHECKPOINT_FILE, SERVICE_HOST, SERVICE_PORT, SERVICE_WORKERS,
+    METRICS_FILE, PROFILE_FILE, MONITOR_WINDOW, MONITOR_HOP, CAPTURE_DSP_WORKERS,
+    CAPTURE_RECOGNITION_WORKERS
+)
+
+COMMANDS = ('batch', 'serve', 'listen')
+
+
+def add_instrumentation_arguments(parser: argparse.ArgumentParser):
+    """--profile and --metrics, shared by the GUI and every subcommand"""
+    parser.add_argument('--profile', action='store_true',
+                        help="run under cProfile and print where the time went")
+    parser.add_argument('--profile-output', default=PROFILE_FILE, metavar='FILE',
+                        help="where --profile saves its stats")
+    parser.add_argument('--metrics', default=METRICS_FILE, metavar='FILE',
+                        help="write timing spans and counters on exit (.json or Prometheus text)")
+
+
+def instrumented(run, args) -> int:
+    """Call run(args), under cProfile with --profile, dumping metrics afterwards"""
+    from .core.metrics import REGISTRY, profile_call
+
+    try:
+        if args.profile:
+            return profile_call(run, args.profile_output, args)
+        return run(args)
+    finally:
+        if args.metrics:
+            try:
+                REGISTRY.dump(args.metrics)
+            except Exception as e:
+                print(f"Error writing metrics: {e}")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="vibecatch")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    batch = commands.add_parser('batch', help="recognize songs in audio files and folders")
+    batch.add_argument('paths', nargs='+', help="audio files or folders to scan")
+    batch.add_argument('--report', help="write results to a .csv or .jsonl file")
+    batch.add_argument('--playlist', choices=list(VIBE_CATEGORIES),
+                       help="add recognized songs to this playlist")
+    batch.add_argument('--backends', default=RECOGNITION_BACKENDS,
+                       help="recognition backends to try, comma separated")
+    batch.add_argument('--workers', type=int, default=BATCH_WORKERS,
+                       help="concurrent recognition requests")
+    batch.add_argument('--rate', type=float, default=BATCH_RATE_LIMIT,
+                       help="maximum recognition requests per second (0 for no limit)")
+    batch.add_argument('--segment', type=float, default=BATCH_SEGMENT,
+                       help="seconds of audio per recognition attempt")
+    batch.add_argument('--hop', type=float, default=BATCH_HOP,
+                       help="seconds between segment starts")
+    batch.add_argument('--checkpoint', default=BATCH_CHECKPOINT_FILE,
+                       help="progress file used to resume an interrupted run")
+    batch.add_argument('--restart', action='store_true',
+                       help="ignore the checkpoint and process everything again")
+    batch.add_argument('--no-gate', action='store_true',
+                       help="send every segment, including silence and speech")
+    add_instrumentation_arguments(batch)
+
+    serve = commands.add_parser('serve', help="run the local HTTP/WebSocket recognition service")
+    serve.add_argument('--host', default=SERVICE_HOST)
+    serve.add_argument('--port', type=int, default=SERVICE_PORT)
+    serve.add_argument('--backends', default=RECOGNITION_BACKENDS,
+                       help="recognition backends to try, comma separated")
+    serve.add_argument('--workers', type=int, default=SERVICE_WORKERS,
+                       help="recognitions in flight across all clients")
+    add_instrumentation_arguments(serve)
+
+    listen = commands.add_parser('listen', help="monitor several input devices at once")
+    listen.add_argument('devices', nargs='*',
+                        help="device indexes or parts of their names (default: every input)")
+    listen.add_argument('--list-devices', action='store_true',
+                        help="print the available input devices and exit")
+    listen.add_argument('--playlist', choices=list(VIBE_CATEGORIES),
+                        help="add recognized songs to this playlist")
+    listen.add_argument('--log', help="append every song change to this .jsonl file")
+    listen.add_argument('--backends', default=RECOGNITION_BACKENDS,
+                        help="recognition backends to try, comma separated")
+    listen.add_argument('--window', type=float, default=MONITOR_WINDOW,
+                        help="seconds of audio per recognition attempt")
+    listen.add_argument('--hop', type=float, default=MONITOR_HOP,
+                        help="seconds between attempts on each device")
+    listen.add_argument('--dsp-workers', type=int, default=CAPTURE_DSP_WORKERS,
+                        help="processes screening and encoding captures (0 for none)")
+    listen.add_argument('--workers', type=int, default=CAPTURE_RECOGNITION_WORKERS,
+                        help="recognitions in flight across all devices")
+    listen.add_argument('--no-gate', action='store_true',
+                        help="send every window, including silence and speech")
+    add_instrumentation_arguments(listen)
+    return parser
+
+
+def run_batch(args) -> int:
+    """Recognize every segment of the given files"""
+    from .core.audio_file import find_audio_files
+    from .core.audio_gate import AudioGate
+    from .core.backends import create_backend
+    from .core.batch import BatchRecognizer, Checkpoint, write_report
+    from .core.playlist_store import PlaylistStore
+
+    files = find_audio_files(args.paths)
+    if not files:
+        print("No audio files found")
+        return 1
+
+    def print_record(record):
+        if record['title']:
+            print(f"{record['file']} @ {record['offset']:.0f}s: "
+                  f"{record['title']} - {record['artist']}")
+
+    store = None
+    if args.playlist:
+        store = PlaylistStore()
+        store.load()
+    checkpoint = Checkpoint(args.checkpoint, resume=not args.restart)
+    backend = create_backend(args.backends)
+    recognizer = BatchRecognizer(
+        backend, checkpoint, workers=args.workers, rate_limit=args.rate,
+        segment=args.segment, hop=args.hop, store=store, playlist_id=args.playlist,
+        on_record=print_record, gate=None if args.no_gate else AudioGate()
+    )
+
+    interrupted = False
+    try:
+        stats = recognizer.run(files)
+    except KeyboardInterrupt:
+        interrupted = True
+        stats = recognizer.stats
+        print(f"Interrupted; run again to resume from {args.checkpoint}")
+    finally:
+        checkpoint.close()
+        backend.close()
+        if store is not None:
+            store.close()
+
+    if args.report:
+        write_report(checkpoint.records, args.report)
+    print(f"{len(files)} files: {stats['segments']} segments processed this run "
+          f"({stats['recognized']} matched, {stats['gated']} skipped as silence or noise), "
+          f"{stats['skipped']} already done, "
+          f"{stats['errors']} errors")
+    return 130 if interrupted else 0
+
+
+def run_serve(args) -> int:
+    """Serve recognition and playlists to local frontends"""
+    from .core.backends import create_backend
+    from .core.service import serve
+
+    if args.backends.strip().lower() == 'service':
+        print("The service cannot use itself as a backend")
+        return 2
+    serve(args.host, args.port, create_backend(args.backends), args.workers)
+    return 0
+
+
+def run_listen(args) -> int:
+    """Report songs heard on every selected input device"""
+    import json
+    import time
+
+    from .core.backends import create_backend
+    from .core.capture_manager import CaptureManager
+    from .core.playlist_store import PlaylistStore
+
+    manager = CaptureManager(
+        devices=args.devices, backend=create_backend(args.backends),
+        window=args.window, hop=args.hop,
+        dsp_workers=args.dsp_workers, recognition_workers=args.workers,
+        gate_enabled=not args.no_gate
+    )
+    if args.list_devices:
+        for device in manager.available_devices():
+            print(f"{device['index']:>3}  {device['name']} "
+                  f"({device['channels']} ch, {device['rate']} Hz)")
+        manager.close()
+        return 0
+
+    store = None
+    if args.playlist:
+        store = PlaylistStore()
+        store.load()
+    log = open(args.log, 'a') if args.log else None
+
+    def report(result):
+        song = result['song']
+        print(f"[{result['source']}] {song['title']} - {song['artist']}")
+        if store is not None:
+            store.add(song, args.playlist)
+        if log is not None:
+            log.write(json.dumps(dict(song, source=result['source'], device=result['device'],
+                                      at=round(result['at'], 3))) + '\n')
+            log.flush()
+
+    manager.song_changed.connect(report)
+    manager.status_updated.connect(lambda label, message: print(f"[{label}] {message}"))
+    try:
+        manager.start()
+        print(f"Listening on {len(manager.sources)} devices; press Ctrl+C to stop")
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    except (IOError, ValueError) as e:
+        print(f"Error starting capture: {e}")
+        return 1
+    finally:
+        manager.stop()
+        for label, stats in manager.stats().items():
+            print(f"{label}: {stats['matches']} songs, {stats['attempts']} attempts, "
+                  f"{stats['rejected']} skipped, {stats['errors']} errors")
+        manager.close()
+        if store is not None:
+            store.close()
+        if log is not None:
+            log.close()
+    return 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Command line entry point"""
+    args = build_parser().parse_args(argv)
+    if args.command == 'batch':
+        return instrumented(run_batch, args)
+    if args.command == 'serve':
+        return instrumented(run_serve, args)
+    if args.command == 'listen':
+        return instrumented(run_listen, args)
+    return 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
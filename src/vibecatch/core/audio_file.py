@@ -0,0 +1,136 @@
+"""Decoding and segmenting audio files for batch recognition.
+
+WAV files are read with the standard library; anything else is decoded by
+ffmpeg when it is on the PATH. Files are streamed one segment at a time, so
+hour-long recordings never have to fit in memory.
+"""
+import io
+import os
+import shutil
+import subprocess
+import wave
+from typing import Iterator, List, Tuple
+
+import numpy as np
+
+from .config import SAMPLE_RATE, AUDIO_FILE_EXTENSIONS
+from .preprocess import resample
+
+
+def find_audio_files(paths: List[str]) -> List[str]:
+    """Expand files and folders into a sorted list of audio files"""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, names in os.walk(path):
+                files.extend(
+                    os.path.join(root, name) for name in names
+                    if os.path.splitext(name)[1].lower() in AUDIO_FILE_EXTENSIONS
+                )
+        elif os.path.isfile(path):
+            files.append(path)
+        else:
+            print(f"Skipping missing path: {path}")
+    return sorted(files)
+
+
+def to_mono_int16(frames: bytes, sample_width: int, channels: int) -> np.ndarray:
+    """Convert interleaved PCM of any common width to mono int16"""
+    if sample_width == 1:
+        samples = (np.frombuffer(frames, dtype=np.uint8).astype(np.int16) - 128) << 8
+    elif sample_width == 2:
+        samples = np.frombuffer(frames, dtype=np.int16)
+    elif sample_width == 3:
+        raw = np.frombuffer(frames, dtype=np.uint8).reshape(-1, 3)
+        samples = (raw[:, 2].astype(np.int8).astype(np.int16) << 8) | raw[:, 1]
+    elif sample_width == 4:
+        samples = (np.frombuffer(frames, dtype=np.int32) >> 16).astype(np.int16)
+    else:
+        raise ValueError(f"Unsupported sample width: {sample_width}")
+    if channels > 1:
+        samples = samples[:len(samples) - len(samples) % channels]
+        samples = samples.reshape(-1, channels).mean(axis=1).astype(np.int16)
+    return samples
+
+
+def decode_wav(data: bytes) -> Tuple[bytes, int]:
+    """Mono 16-bit PCM and sample rate of an in-memory WAV file"""
+    with wave.open(io.BytesIO(data), 'rb') as wf:
+        samples = to_mono_int16(wf.readframes(wf.getnframes()), wf.getsampwidth(), wf.getnchannels())
+        return samples.tobytes(), wf.getframerate()
+
+
+def _wav_segments(path: str, length: float, hop: float,
+                  rate: int) -> Iterator[Tuple[float, bytes]]:
+    with wave.open(path, 'rb') as wf:
+        file_rate = wf.getframerate()
+        total = wf.getnframes()
+        seg_frames = int(length * file_rate)
+        hop_frames = max(1, int(hop * file_rate))
+        for start in range(0, max(total - seg_frames, 0) + 1, hop_frames):
+            wf.setpos(start)
+            samples = to_mono_int16(wf.readframes(seg_frames), wf.getsampwidth(), wf.getnchannels())
+            if file_rate != rate:
+                samples = np.clip(resample(samples, file_rate, rate), -32768, 32767).astype(np.int16)
+            yield start / file_rate, samples.tobytes()
+
+
+def _ffmpeg_segments(path: str, length: float, hop: float,
+                     rate: int) -> Iterator[Tuple[float, bytes]]:
+    ffmpeg = shutil.which('ffmpeg')
+    if not ffmpeg:
+        raise ValueError(f"ffmpeg is required to decode {os.path.basename(path)}")
+    seg_bytes = int(length * rate) * 2
+    hop_bytes = max(1, int(hop * rate)) * 2
+    process = subprocess.Popen(
+        [ffmpeg, '-v', 'error', '-i', path, '-f', 's16le', '-ac', '1', '-ar', str(rate), '-'],
+        stdout=subprocess.PIPE
+    )
+    try:
+        position = 0
+        buffer = b''
+        while True:
+            chunk = process.stdout.read(seg_bytes - len(buffer))
+            if not chunk:
+                break
+            buffer += chunk
+            if len(buffer) >= seg_bytes:
+                yield position / 2 / rate, buffer[:seg_bytes]
+                # Skip ahead to the next segment start
+                skip = hop_bytes - seg_bytes
+                if skip >= 0:
+                    buffer = b''
+                    while skip > 0:
+                        chunk = process.stdout.read(min(skip, 1 << 20))
+                        if not chunk:
+                            break
+                        skip -= len(chunk)
+                else:
+                    buffer = buffer[hop_bytes:]
+                position += hop_bytes
+        if position == 0 and buffer:
+            # Files shorter than one segment are recognized whole
+            yield 0.0, buffer
+    finally:
+        process.stdout.close()
+        process.kill()
+        process.wait()
+
+
+def iter_segments(path: str, length: float, hop: float,
+                  rate: int = SAMPLE_RATE) -> Iterator[Tuple[float, bytes]]:
+    """Yield (offset in seconds, mono 16-bit PCM at `rate`) every `hop` seconds"""
+    last = None
+    if os.path.splitext(path)[1].lower() == '.wav':
+        try:
+            for offset, pcm in _wav_segments(path, length, hop, rate):
+                last = offset
+                yield offset, pcm
+            return
+        except wave.Error:
+            # Compressed or float WAVs are left to ffmpeg
+            pass
+    for offset, pcm in _ffmpeg_segments(path, length, hop, rate):
+        # When the WAV reader failed part way, carry on after its last segment
+        if last is None or offset > last + hop / 2:
+            yield offset, pcm
@@ -0,0 +1,159 @@
+"""Cheap checks that a capture is worth sending for recognition.
+
+Silence, a muted device, broadband noise, a steady hum and talk with long
+pauses all fail recognition anyway, so they are rejected before upload. All
+features come from one vectorized short-time FFT over the capture:
+
+- RMS level in dBFS
+- spectral flatness (1.0 for white noise, low for tonal music)
+- onset rate from positive spectral flux (near zero for hum and drones)
+- spectral change, the mean of that flux (melodies move, a hum does not)
+- ratio of frames far below the capture's overall level (pauses in speech)
+"""
+import threading
+import time
+from typing import Dict, Optional
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from .config import (
+    SAMPLE_RATE, GATE_FRAME_SIZE, GATE_MIN_RMS_DB, GATE_MAX_FLATNESS,
+    GATE_MIN_ONSET_RATE, GATE_MAX_QUIET_RATIO, GATE_TONAL_FLATNESS,
+    GATE_MIN_SPECTRAL_CHANGE
+)
+
+# Flatness is measured where music has its tonal content
+FLATNESS_BAND = (100, 8000)  # Hz
+QUIET_BELOW_DB = 20  # a frame this far under the overall level counts as quiet
+ONSET_RANGE_DB = 40  # dynamic range considered for onsets
+ONSET_MAD_FACTOR = 3.0  # onsets stand this many robust deviations over the median flux
+MIN_ONSET_FLUX = 0.01  # rise over the median flux that can count as an onset
+MAD_TO_STD = 1.4826  # scales the median absolute deviation to a standard deviation
+EPSILON = 1e-10
+
+REASON_MESSAGES = {
+    'silence': "the capture is silent or the device is muted",
+    'noise': "the capture sounds like noise rather than music",
+    'static': "no rhythm detected, only a steady tone or hum",
+    'speech': "the capture is mostly pauses or speech",
+}
+
+
+def frame_features(samples: np.ndarray, rate: int = SAMPLE_RATE,
+                   frame_size: int = GATE_FRAME_SIZE) -> Dict[str, float]:
+    """RMS level, spectral flatness, onset rate, spectral change and quiet-frame ratio"""
+    samples = np.asarray(samples, dtype=np.float32) / 32768.0
+    hop = frame_size // 2
+    if len(samples) < frame_size:
+        samples = np.pad(samples, (0, frame_size - len(samples)))
+    frames = sliding_window_view(samples, frame_size)[::hop]
+
+    frame_rms = np.sqrt(np.mean(np.square(frames), axis=1))
+    frame_db = 20 * np.log10(frame_rms + EPSILON)
+    rms_db = float(20 * np.log10(np.sqrt(np.mean(np.square(samples))) + EPSILON))
+
+    power = np.square(np.abs(np.fft.rfft(frames * np.hanning(frame_size), axis=1))) + EPSILON
+    freqs = np.fft.rfftfreq(frame_size, 1 / rate)
+    band = power[:, (freqs >= FLATNESS_BAND[0]) & (freqs <= FLATNESS_BAND[1])]
+    flatness = np.exp(np.mean(np.log(band), axis=1)) / np.mean(band, axis=1)
+
+    # Only frames with signal say anything about flatness
+    loud = frame_db > rms_db - QUIET_BELOW_DB
+    quiet_ratio = 1.0 - float(np.mean(loud))
+
+    # Onsets: peaks of positive log-spectral flux above an adaptive threshold.
+    # Bins more than ONSET_RANGE_DB under the loudest one are floored so the
+    # noise floor's random fluctuations do not count as onsets. The threshold
+    # uses median and MAD, which the onsets themselves barely move; with the
+    # standard deviation, regular beats raised it above their own peaks.
+    log_power = np.log(power + power.max() * 10 ** (-ONSET_RANGE_DB / 10))
+    flux = np.mean(np.maximum(np.diff(log_power, axis=0), 0), axis=1)
+    onsets = 0
+    if len(flux) >= 3:
+        median = np.median(flux)
+        spread = MAD_TO_STD * np.median(np.abs(flux - median))
+        threshold = median + max(ONSET_MAD_FACTOR * spread, MIN_ONSET_FLUX)
+        peaks = (flux[1:-1] > flux[:-2]) & (flux[1:-1] >= flux[2:]) & (flux[1:-1] > threshold)
+        onsets = int(np.count_nonzero(peaks & loud[2:-1]))
+
+    return {
+        'rms_db': rms_db,
+        'flatness': float(np.median(flatness[loud])) if loud.any() else 1.0,
+        'onset_rate': onsets / (len(samples) / rate),
+        'spectral_change': float(np.mean(flux)) if len(flux) else 0.0,
+        'quiet_ratio': quiet_ratio,
+    }
+
+
+class AudioGate:
+    """Accepts or rejects captures and keeps counts of its decisions"""
+
+    def __init__(self, min_rms_db: float = GATE_MIN_RMS_DB,
+                 max_flatness: float = GATE_MAX_FLATNESS,
+                 min_onset_rate: float = GATE_MIN_ONSET_RATE,
+                 max_quiet_ratio: float = GATE_MAX_QUIET_RATIO,
+                 tonal_flatness: float = GATE_TONAL_FLATNESS,
+                 min_spectral_change: float = GATE_MIN_SPECTRAL_CHANGE,
+                 rate: int = SAMPLE_RATE):
+        self.min_rms_db = min_rms_db
+        self.max_flatness = max_flatness
+        self.min_onset_rate = min_onset_rate
+        self.max_quiet_ratio = max_quiet_ratio
+        self.tonal_flatness = tonal_flatness
+        self.min_spectral_change = min_spectral_change
+        self.rate = rate
+        self.checked = 0
+        self.passed = 0
+        self.rejected = {reason: 0 for reason in REASON_MESSAGES}
+        self.seconds = 0.0
+        self._lock = threading.Lock()
+
+    def reason(self, features: Dict[str, float]) -> Optional[str]:
+        """Why a capture with these features should not be uploaded, if at all"""
+        if features['rms_db'] < self.min_rms_db:
+            return 'silence'
+        if features['flatness'] > self.max_flatness:
+            return 'noise'
+        if features['quiet_ratio'] > self.max_quiet_ratio:
+            return 'speech'
+        if features['onset_rate'] < self.min_onset_rate and not self.is_tonal(features):
+            return 'static'
+        return None
+
+    def is_tonal(self, features: Dict[str, float]) -> bool:
+        """Clearly tonal and changing, like legato music without sharp attacks"""
+        return (features['flatness'] <= self.tonal_flatness
+                and features['spectral_change'] >= self.min_spectral_change)
+
+    def check(self, pcm: bytes) -> dict:
+        """Decide on a capture of raw 16-bit PCM.
+
+        Returns the features plus `passed` and `reason` (None when passed).
+        """
+        start = time.perf_counter()
+        if pcm:
+            features = frame_features(np.frombuffer(pcm, dtype=np.int16), self.rate)
+            reason = self.reason(features)
+        else:
+            features, reason = {}, 'silence'
+        elapsed = time.perf_counter() - start
+
+        with self._lock:
+            self.checked += 1
+            self.seconds += elapsed
+            if reason:
+                self.rejected[reason] += 1
+            else:
+                self.passed += 1
+        return dict(features, passed=reason is None, reason=reason)
+
+    def stats(self) -> dict:
+        """Decision counters and the mean time spent per check"""
+        with self._lock:
+            return {
+                'checked': self.checked,
+                'passed': self.passed,
+                'rejected': dict(self.rejected),
+                'mean_ms': round(self.seconds / self.checked * 1000, 2) if self.checked else 0.0,
+            }
@@ -1,207 +1,520 @@
-import pyaudio
-import wave
-import requests
-import json
-from datetime import datetime
-import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
 from typing import Optional, Dict, List
-from PyQt5.QtCore import QThread, pyqtSignal
 
 from .config import (
-    SAMPLE_RATE, BIT_DEPTH, CHANNELS, MAX_FILE_SIZE, RECORD_TIME,
-    SHAZAM_API_KEY, SHAZAM_API_HOST, SHAZAM_API_ENDPOINT
+    SAMPLE_RATE, RECORD_TIME, STREAMING_MODE, STREAM_WINDOWS, MONITOR_WINDOW, MONITOR_HOP,
+    GATE_ENABLED, VIBE_SUGGESTIONS, OFFLINE_QUEUE_ENABLED, CAPTURE_RETRY_DELAY
 )
+from .events import Signal
+from .metrics import REGISTRY, increment, observe, span
+from .monitor import SongChangeDetector
+from .scheduler import BACKGROUND, USER, request_priority
+from .catalog import Track
+from .playlist_store import PlaylistStore
 
-class AudioManager(QThread):
-    progress_updated = pyqtSignal(int)
-    status_updated = pyqtSignal(str)
-    recording_finished = pyqtSignal(dict)
+class AudioManager:
+    """Recording, recognition and playlists, without any UI toolkit.
+
+    Work runs on a background thread started by start_recording() or
+    start_monitoring() and is reported through the Signal attributes. The
+    audio session and recognition backends (and with them pyaudio, numpy
+    and requests) are only created when first used.
+    """
 
     def __init__(self):
-        super().__init__()
+        self.progress_updated = Signal()
+        self.meter_updated = Signal()
+        self.status_updated = Signal()
+        self.recording_finished = Signal()
+        self.song_changed = Signal()
+        self.song_replayed = Signal()
         self.is_recording = False
-        self.playlists = self.load_playlists()
-
-    def load_playlists(self) -> Dict[str, List[dict]]:
-        """Load playlists from file"""
-        if os.path.exists('playlists.json'):
-            try:
-                with open('playlists.json', 'r') as f:
-                    return json.load(f)
-            except Exception as e:
-                print(f"Error loading playlists: {e}")
+        self.is_monitoring = False
+        # Loaded lazily, off the GUI thread, once the window is up
+        self.store = PlaylistStore()
+        self._backend = None
+        self._audio = None
+        self._gate = None
+        self._vibes = None
+        self._offline = None
+        self._meter = None
+        self.gate_enabled = GATE_ENABLED
+        self.last_rejection: Optional[str] = None
+        self.last_unavailable = False
+        self._thread: Optional[threading.Thread] = None
+        # Set by stop_recording so a monitor retry delay ends early
+        self._stopped = threading.Event()
+
+    @property
+    def backend(self):
+        if self._backend is None:
+            from .backends import create_backend
+            self._backend = create_backend()
+        return self._backend
+
+    @property
+    def audio(self):
+        if self._audio is None:
+            from .audio_session import AudioSession
+            self._audio = AudioSession()
+        return self._audio
+
+    @property
+    def gate(self):
+        if self._gate is None:
+            from .audio_gate import AudioGate
+            self._gate = AudioGate()
+        return self._gate
+
+    @property
+    def vibes(self):
+        if self._vibes is None:
+            from .vibe_analysis import VibeSuggester
+            self._vibes = VibeSuggester()
+        return self._vibes
+
+    @property
+    def meter(self):
+        if self._meter is None:
+            from .level_meter import LevelMeter
+            self._meter = LevelMeter()
+        return self._meter
+
+    def update_meter(self, progress: Optional[int] = None, force: bool = False):
+        """Send a meter frame, with the capture progress, when one is due.
+
+        Called after every captured chunk; frames go out at METER_RATE, so
+        the UI gets one coalesced update instead of one per chunk.
+        """
+        if not (self.meter.due() or force):
+            return
+        frame = self.meter.measure(self.audio.ring.latest(self.meter.window))
+        frame['progress'] = progress
+        if progress is not None:
+            self.progress_updated.emit(progress)
+        self.meter_updated.emit(frame)
+
+    @property
+    def offline(self):
+        """Replayer of captures queued while recognition was unreachable"""
+        if self._offline is None:
+            from .offline_queue import OfflineQueue, OfflineReplayer
+            self._offline = OfflineReplayer(OfflineQueue(), lambda: self.backend, self.add_to_playlist)
+            self._offline.song_replayed.connect(self.song_replayed.emit)
+        return self._offline
+
+    def resume_offline_queue(self):
+        """Start replaying captures left queued by an earlier session"""
+        if OFFLINE_QUEUE_ENABLED and len(self.offline.queue):
+            self.offline.start()
+
+    def queue_capture(self, pcm: bytes, vibe_pending: Optional[Future] = None) -> Optional[dict]:
+        """Keep a capture for replay; returns the recording_finished result"""
+        if not OFFLINE_QUEUE_ENABLED or not pcm:
+            return None
+        vibe = self.suggest_vibe({}, pcm, vibe_pending)
+        playlist = vibe['ranking'][0] if vibe else None
+        try:
+            self.offline.queue.put(pcm, playlist, vibe)
+        except Exception as e:
+            print(f"Error queueing capture: {e}")
+            return None
+        self.offline.start()
+        pending = len(self.offline.queue)
         return {
-            'happiness': [],
-            'emotional': [],
-            'relaxation': [],
-            'excitement': []
+            'error': 'Recognition unavailable',
+            'queued': True,
+            'message': f"Saved for later; {pending} capture{'s' if pending != 1 else ''} waiting to be recognized"
         }
 
+    def start_vibe(self, pcm: bytes) -> Optional[Future]:
+        """Start analysing a capture's vibe while it is being recognized"""
+        if not VIBE_SUGGESTIONS or not pcm:
+            return None
+        try:
+            return self.vibes.start(pcm)
+        except Exception as e:
+            print(f"Error analysing vibe: {e}")
+            return None
+
+    def suggest_vibe(self, song: dict, pcm: bytes,
+                     pending: Optional[Future] = None) -> Optional[dict]:
+        """Tempo, key, energy and ranked vibe categories for a recognized capture.
+
+        `pending` comes from start_vibe(); the span then only measures how
+        long the result path waits for the analysis.
+        """
+        if not VIBE_SUGGESTIONS or not pcm:
+            return None
+        try:
+            with span('vibe_analysis'):
+                return self.vibes.suggest(song, pcm, pending=pending)
+        except Exception as e:
+            print(f"Error analysing vibe: {e}")
+            return None
+
+    def start(self):
+        """Run the recording process on a background thread"""
+        if self.is_running():
+            return
+        self._thread = threading.Thread(target=self.run, name='audio-manager', daemon=True)
+        self._thread.start()
+
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def wait(self, timeout: Optional[float] = None):
+        """Block until the background thread has finished"""
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    @property
+    def playlists(self) -> Dict[str, List[Track]]:
+        return {playlist_id: self.store.get(playlist_id) for playlist_id in self.store.playlists}
+
+    def load_playlists(self) -> Dict[str, List[Track]]:
+        """Load playlists from file (once)"""
+        self.store.ensure_loaded()
+        return self.playlists
+
     def save_playlists(self):
-        """Save playlists to file"""
+        """Fold pending playlist changes into playlists.json"""
         try:
-            with open('playlists.json', 'w') as f:
-                json.dump(self.playlists, f, indent=2)
+            self.store.compact()
         except Exception as e:
             print(f"Error saving playlists: {e}")
 
     def add_to_playlist(self, song: dict, playlist_id: str) -> bool:
-        """Add a song to a playlist"""
-        if playlist_id in self.playlists:
-            # Check if song already exists
-            for existing_song in self.playlists[playlist_id]:
-                if (existing_song['title'] == song['title'] and 
-                    existing_song['artist'] == song['artist']):
-                    return False
-            
-            self.playlists[playlist_id].append(song)
-            self.save_playlists()
-            return True
-        return False
+        """Add a song to a playlist; the write happens in the background"""
+        self.store.ensure_loaded()
+        return self.store.add(song, playlist_id)
 
-    def get_playlist(self, playlist_id: str) -> List[dict]:
+    def get_playlist(self, playlist_id: str) -> List[Track]:
         """Get songs from a playlist"""
-        return self.playlists.get(playlist_id, [])
+        self.store.ensure_loaded()
+        return self.store.get(playlist_id)
+
+    def playlists_containing(self, song: dict) -> List[str]:
+        """IDs of the playlists a song is already in"""
+        self.store.ensure_loaded()
+        return self.store.playlists_of(song)
 
     def start_recording(self):
         """Start the recording process"""
         self.is_recording = True
+        self._stopped.clear()
         self.start()
 
     def stop_recording(self):
         """Stop the recording process"""
         self.is_recording = False
+        self._stopped.set()
+
+    def start_monitoring(self):
+        """Start continuous monitoring until stop_recording is called"""
+        self.is_monitoring = True
+        self.is_recording = True
+        self._stopped.clear()
+        self.start()
 
     def get_input_device_index(self) -> Optional[int]:
         """Find the system audio input device"""
-        p = pyaudio.PyAudio()
+        return self.audio.select_device()
+
+    def record_audio(self) -> Optional[bytes]:
+        """Record system audio as raw 16-bit PCM"""
+        target = int(SAMPLE_RATE * RECORD_TIME)
+        overflows = self.audio.overflows
         try:
-            # Look for a loopback device
-            for i in range(p.get_device_count()):
-                device_info = p.get_device_info_by_index(i)
-                if 'loopback' in device_info['name'].lower():
-                    return i
-                
-            # If no loopback device found, try to find system audio input
-            for i in range(p.get_device_count()):
-                device_info = p.get_device_info_by_index(i)
-                if device_info['maxInputChannels'] > 0:
-                    print(f"Using input device: {device_info['name']}")
-                    return i
-        finally:
-            p.terminate()
-        return None
+            start = position = self.audio.start_stream()
 
-    def record_audio(self) -> Optional[str]:
-        """Record system audio"""
-        p = pyaudio.PyAudio()
-        device_index = self.get_input_device_index()
-        
-        if device_index is None:
-            print("No suitable audio input device found")
-            return None
+            with span('capture'):
+                while self.is_recording and position - start < target:
+                    position = self.audio.wait(position)
+                    self.update_meter(int(min(position - start, target) / target * 100))
+            self.update_meter(int(min(position - start, target) / target * 100), force=True)
 
-        try:
-            stream = p.open(
-                format=pyaudio.paInt16,
-                channels=CHANNELS,
-                rate=SAMPLE_RATE,
-                input=True,
-                input_device_index=device_index,
-                frames_per_buffer=1024
-            )
+            self.audio.stop_stream()
+            view, _ = self.audio.read_since(start)
+            self.report_overflows(overflows)
 
-            frames = []
-            chunks_to_record = int(SAMPLE_RATE / 1024 * RECORD_TIME)
-            
-            for i in range(chunks_to_record):
-                if not self.is_recording:
-                    break
-                    
-                data = stream.read(1024, exception_on_overflow=False)
-                frames.append(data)
-                progress = (i / chunks_to_record) * 100
-                self.progress_updated.emit(int(progress))
-
-            stream.stop_stream()
-            stream.close()
-            p.terminate()
-
-            if not frames:
+            if not len(view):
                 return None
 
-            # Save as WAV file
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            filename = f"recording_{timestamp}.wav"
-            
-            wf = wave.open(filename, 'wb')
-            wf.setnchannels(CHANNELS)
-            wf.setsampwidth(p.get_sample_size(pyaudio.paInt16))
-            wf.setframerate(SAMPLE_RATE)
-            wf.writeframes(b''.join(frames))
-            wf.close()
-
-            return filename
+            return view[:target].tobytes()
             
         except Exception as e:
             print(f"Error recording audio: {e}")
-            if 'stream' in locals():
-                stream.close()
-            p.terminate()
+            self.audio.stop_stream()
             return None
 
-    def recognize_song(self, audio_file: str) -> Optional[dict]:
-        """Send audio to Shazam API for recognition"""
+    def report_overflows(self, overflows_before: int):
+        """Tell the user when capture could not keep up"""
+        overflows = self.audio.overflows - overflows_before
+        if overflows:
+            increment('overflows', overflows)
+            print(f"Audio input overflowed {overflows} times")
+            self.status_updated.emit(
+                "Audio input overflowed; the machine may be too busy to capture cleanly."
+            )
+
+    def capture_stats(self) -> dict:
+        """Frames captured, input overflows and dropped frames so far"""
+        return self.audio.stats()
+
+    def recognize_window(self, pcm: bytes) -> Optional[dict]:
+        """Recognize a snapshot of the streaming buffer"""
         try:
-            with open(audio_file, 'rb') as f:
-                files = {
-                    'upload_file': (audio_file, f, 'audio/wav')
-                }
-                headers = {
-                    'x-rapidapi-key': SHAZAM_API_KEY,
-                    'x-rapidapi-host': SHAZAM_API_HOST
-                }
-                response = requests.post(
-                    SHAZAM_API_ENDPOINT,
-                    headers=headers,
-                    files=files
-                )
-            
-            # Clean up the audio file
-            os.remove(audio_file)
-            
-            if response.status_code == 200:
-                result = response.json()
-                if result and 'track' in result:
-                    track = result['track']
-                    return {
-                        'title': track.get('title', 'Unknown'),
-                        'artist': track.get('subtitle', 'Unknown'),
-                        'key': track.get('key', '')
-                    }
-            
-            print(f"API Response: {response.text}")
+            return self.recognize_song(pcm)
+        except Exception as e:
+            print(f"Error recognizing window: {e}")
             return None
-            
+
+    def stream_and_recognize(self) -> dict:
+        """Capture into the ring buffer and try recognition on growing windows.
+
+        Capture keeps running while an attempt is in flight and stops as soon
+        as one of the windows in STREAM_WINDOWS produces a match.
+        """
+        windows = sorted(int(SAMPLE_RATE * seconds) for seconds in STREAM_WINDOWS)
+        total = windows[-1]
+        overflows = self.audio.overflows
+        executor = ThreadPoolExecutor(max_workers=1)
+        pending = None
+        song = None
+        clip = b''
+        vibe_pending = None
+
+        try:
+            start = position = self.audio.start_stream()
+            capture_started = time.perf_counter()
+
+            while self.is_recording and position - start < total:
+                position = self.audio.wait(position)
+                self.update_meter(int(min(position - start, total) / total * 100))
+
+                # Stop early once an attempt has come back with a match
+                if pending is not None and pending.done():
+                    song = pending.result()
+                    pending = None
+                    if song:
+                        break
+
+                # Only one attempt in flight; a skipped window rolls into the next
+                if pending is None and windows and position - start >= windows[0]:
+                    window = windows.pop(0)
+                    while windows and position - start >= windows[0]:
+                        window = windows.pop(0)
+                    self.status_updated.emit(
+                        f"Listening... trying after {window / SAMPLE_RATE:g}s"
+                    )
+                    # Copy the window out; capture keeps writing into the ring
+                    view, _ = self.audio.read_since(start)
+                    clip = view[:window].tobytes()
+                    pending = executor.submit(self.recognize_window, clip)
+                    vibe_pending = self.restart_vibe(vibe_pending, clip)
+
+            self.update_meter(int(min(position - start, total) / total * 100), force=True)
+            self.audio.stop_stream()
+            observe('capture', time.perf_counter() - capture_started)
+            self.report_overflows(overflows)
+
+            if not song and pending is not None:
+                self.status_updated.emit("Processing audio...")
+                song = pending.result()
+                pending = None
+
+            # The final window may have been skipped while an attempt was in flight
+            if not song and windows and position > start:
+                self.status_updated.emit("Processing audio...")
+                view, _ = self.audio.read_since(start)
+                clip = view[:total].tobytes()
+                vibe_pending = self.restart_vibe(vibe_pending, clip)
+                song = self.recognize_window(clip)
+
+        except Exception as e:
+            print(f"Error recording audio: {e}")
+            self.audio.stop_stream()
+            return {'error': 'Recording failed'}
+        finally:
+            executor.shutdown(wait=False)
+
+        if song:
+            return {'song': song, 'vibe': self.suggest_vibe(song, clip, vibe_pending)}
+        return self.failure_result(clip, vibe_pending)
+
+    def restart_vibe(self, pending: Optional[Future], pcm: bytes) -> Optional[Future]:
+        """Analyse a newer window instead of the one still pending"""
+        if pending is not None:
+            pending.cancel()
+        return self.start_vibe(pcm)
+
+    def failure_result(self, pcm: bytes = b'', vibe_pending: Optional[Future] = None) -> dict:
+        """Result for a capture that produced no match"""
+        if self.last_unavailable:
+            queued = self.queue_capture(pcm, vibe_pending)
+            if queued:
+                return queued
+        if self.last_rejection:
+            from .audio_gate import REASON_MESSAGES
+            return {
+                'error': 'No music detected',
+                'reason': self.last_rejection,
+                'message': REASON_MESSAGES[self.last_rejection]
+            }
+        return {'error': 'Recognition failed'}
+
+    def passes_gate(self, pcm: bytes) -> bool:
+        """Check a capture is worth uploading; reports why when it is not"""
+        if not self.gate_enabled:
+            return True
+        with span('gate'):
+            verdict = self.gate.check(pcm)
+        self.last_rejection = verdict['reason']
+        if not verdict['passed']:
+            increment('gate_rejections')
+            from .audio_gate import REASON_MESSAGES
+            self.status_updated.emit(f"Skipped recognition: {REASON_MESSAGES[verdict['reason']]}")
+        return verdict['passed']
+
+    def gate_stats(self) -> dict:
+        """Decision counters of the capture gate"""
+        return self._gate.stats() if self._gate else {}
+
+    def metrics(self) -> dict:
+        """Pipeline timing spans and counters"""
+        return REGISTRY.snapshot()
+
+    def cache_stats(self) -> dict:
+        """Hit/miss counters of the recognition result cache"""
+        cache = getattr(self._backend, 'cache', None)
+        return cache.stats() if cache else {}
+
+    def recognize_song(self, pcm: bytes) -> Optional[dict]:
+        """Recognize a recording with the configured backends"""
+        if not self.passes_gate(pcm):
+            return None
+        increment('recognitions')
+        # Monitoring yields the API quota to clicks in this or any other process
+        priority = BACKGROUND if self.is_monitoring else USER
+        try:
+            with span('recognize'), request_priority(priority):
+                song = self.backend.recognize(pcm)
         except Exception as e:
+            from .offline_queue import is_unavailable
+            self.last_unavailable = is_unavailable(e)
+            increment('recognition_failures')
             print(f"Error recognizing song: {e}")
             return None
+        self.last_unavailable = False
+        if self._offline is not None:
+            # The service answered; replay anything queued right away
+            self._offline.wake()
+        increment('matches' if song else 'no_matches')
+        return song
+
+    def monitor(self):
+        """Keep one stream open and report every song change.
+
+        The last MONITOR_WINDOW seconds are read from the fixed-size ring
+        buffer and recognized every MONITOR_HOP seconds, with at most one
+        attempt in flight, so memory and CPU stay flat however long it runs.
+        A device that fails or stalls is reopened after CAPTURE_RETRY_DELAY
+        seconds until monitoring is stopped.
+        """
+        detector = SongChangeDetector()
+        executor = ThreadPoolExecutor(max_workers=1)
+        try:
+            while self.is_recording:
+                try:
+                    self.monitor_stream(detector, executor)
+                except Exception as e:
+                    print(f"Error monitoring audio: {e}")
+                    self.status_updated.emit(
+                        f"Capture failed: {e}; retrying in {CAPTURE_RETRY_DELAY:g}s"
+                    )
+                    self._stopped.wait(CAPTURE_RETRY_DELAY)
+                finally:
+                    self.audio.stop_stream()
+        finally:
+            executor.shutdown(wait=True)
+
+    def monitor_stream(self, detector: SongChangeDetector, executor: ThreadPoolExecutor):
+        """Monitor one opened stream until stopped or the device fails"""
+        window = int(SAMPLE_RATE * MONITOR_WINDOW)
+        hop = int(SAMPLE_RATE * MONITOR_HOP)
+        pending = None
+        start = position = self.audio.start_stream()
+        next_attempt = start + window
+        overflows = self.audio.overflows
+        self.status_updated.emit("Monitoring...")
+
+        while self.is_recording:
+            position = self.audio.wait(position)
+            self.update_meter()
+
+            if pending is not None and pending.done():
+                song = pending.result()
+                pending = None
+                if detector.update(song):
+                    self.song_changed.emit(song)
+                    self.status_updated.emit(
+                        f"Now playing: {song['title']} - {song['artist']}"
+                    )
+
+            if pending is None and position >= next_attempt:
+                next_attempt = position + hop
+                self.report_overflows(overflows)
+                overflows = self.audio.overflows
+                pending = executor.submit(
+                    self.recognize_song, self.audio.ring.latest(window).tobytes()
+                )
+
+    def close(self):
+        """Release the audio session and backend connections"""
+        self.is_recording = False
+        self._stopped.set()
+        self.wait()
+        if self._offline is not None:
+            self._offline.stop(timeout=5)
+        if self._audio is not None:
+            self._audio.close()
+        if self._backend is not None:
+            self._backend.close()
+        if self._vibes is not None:
+            self._vibes.close()
+        self.store.close()
 
     def run(self):
         """Run the recording process"""
+        if self.is_monitoring:
+            self.monitor()
+            self.is_monitoring = False
+            self.recording_finished.emit({'monitoring': 'stopped'})
+            return
+
         self.status_updated.emit("Initializing audio...")
+        self.last_rejection = None
+        self.last_unavailable = False
+
+        if STREAMING_MODE:
+            self.recording_finished.emit(self.stream_and_recognize())
+            return
         
         # Record audio
-        audio_file = self.record_audio()
-        if not audio_file:
+        pcm = self.record_audio()
+        if not pcm:
             self.recording_finished.emit({'error': 'Recording failed'})
             return
         
         self.status_updated.emit("Processing audio...")
         
-        # Recognize song
-        song = self.recognize_song(audio_file)
+        # Recognize song, analysing its vibe meanwhile
+        vibe_pending = self.start_vibe(pcm)
+        song = self.recognize_song(pcm)
         if song:
-            self.recording_finished.emit({'song': song})
+            self.recording_finished.emit({'song': song, 'vibe': self.suggest_vibe(song, pcm, vibe_pending)})
         else:
-            self.recording_finished.emit({'error': 'Recognition failed'})
+            self.recording_finished.emit(self.failure_result(pcm, vibe_pending))
@@ -0,0 +1,186 @@
+"""Long-lived PortAudio session shared by all recordings"""
+import threading
+from typing import Optional
+
+import numpy as np
+
+from .config import SAMPLE_RATE, CHANNELS, CHUNK_SIZE, RING_BUFFER_SECONDS, CAPTURE_TIMEOUT
+from .metrics import span
+from .ring_buffer import RingBuffer
+
+
+class AudioSession:
+    """Keeps one PyAudio instance, the chosen device and its stream alive.
+
+    PortAudio initialisation and device enumeration happen once. Between
+    recordings the stream is only stopped, not closed, so the next recording
+    starts with a cheap start_stream(). PortAudio only rescans devices when it
+    is re-initialised, so that happens when opening or reading the device
+    fails, or when refresh_devices() is called explicitly.
+
+    Capture runs in PortAudio's callback mode: the callback copies each block
+    into a preallocated RingBuffer and counts input overflows, and readers
+    wait on the buffer instead of calling a blocking read.
+
+    pyaudio is only imported when PortAudio is first needed, so creating a
+    session costs nothing until something is recorded.
+
+    A session can be pinned to `device_index` instead of picking a device,
+    and can borrow a PyAudio instance `pa` owned by someone else, so several
+    sessions capture from different devices under one PortAudio. `rate` is
+    the sample rate the stream is opened at, for devices that only support
+    their own; the ring buffer then holds samples at that rate.
+    """
+
+    def __init__(self, device_index: Optional[int] = None, pa=None, rate: int = SAMPLE_RATE):
+        self._pa = pa
+        self._owns_pa = pa is None
+        self.pinned_device = device_index
+        self.device_index: Optional[int] = device_index
+        self.rate = rate
+        self.stream = None
+        self.ring = RingBuffer(int(rate * RING_BUFFER_SECONDS))
+        self.overflows = 0
+        self.dropped_frames = 0
+        self._lock = threading.RLock()
+        self._pyaudio = None
+
+    @property
+    def pa(self):
+        """The PyAudio instance, importing and initialising PortAudio on first use"""
+        if self._pyaudio is None:
+            import pyaudio
+            self._pyaudio = pyaudio
+        if self._pa is None:
+            self._pa = self._pyaudio.PyAudio()
+            self._owns_pa = True
+        return self._pa
+
+    def find_input_device(self) -> Optional[int]:
+        """Find the system audio input device"""
+        # Look for a loopback device
+        for i in range(self.pa.get_device_count()):
+            device_info = self.pa.get_device_info_by_index(i)
+            if 'loopback' in device_info['name'].lower():
+                return i
+
+        # If no loopback device found, try to find system audio input
+        for i in range(self.pa.get_device_count()):
+            device_info = self.pa.get_device_info_by_index(i)
+            if device_info['maxInputChannels'] > 0:
+                print(f"Using input device: {device_info['name']}")
+                return i
+        return None
+
+    def select_device(self) -> Optional[int]:
+        """Return the cached input device, enumerating devices on first use"""
+        with self._lock:
+            if self.device_index is None:
+                with span('device_enumeration'):
+                    self.device_index = self.find_input_device()
+            return self.device_index
+
+    def refresh_devices(self):
+        """Re-initialise PortAudio so added or removed devices are seen.
+
+        A borrowed PyAudio instance is kept; only its owner can re-initialise it.
+        """
+        with self._lock:
+            self.close()
+            self.device_index = self.pinned_device
+
+    def _open_stream(self):
+        device_index = self.select_device()
+        if device_index is None:
+            raise IOError("No suitable audio input device found")
+        with span('stream_open'):
+            pa = self.pa
+            return pa.open(
+                format=self._pyaudio.paInt16,
+                channels=CHANNELS,
+                rate=self.rate,
+                input=True,
+                input_device_index=device_index,
+                frames_per_buffer=CHUNK_SIZE,
+                start=False,
+                stream_callback=self._callback
+            )
+
+    def _callback(self, in_data, frame_count, time_info, status_flags):
+        """PortAudio callback: copy the block into the ring buffer"""
+        if status_flags & self._pyaudio.paInputOverflow:
+            self.overflows += 1
+        self.ring.write(np.frombuffer(in_data, dtype=np.int16))
+        return None, self._pyaudio.paContinue
+
+    def start_stream(self) -> int:
+        """Start capturing, reusing the open stream when there is one.
+
+        Returns the ring buffer position capture starts from.
+        """
+        with self._lock:
+            if self.stream is None:
+                try:
+                    self.stream = self._open_stream()
+                except Exception:
+                    # The device may have gone away; rescan once and retry
+                    self.refresh_devices()
+                    self.stream = self._open_stream()
+            position = self.ring.written
+            if self.stream.is_stopped():
+                self.stream.start_stream()
+            return position
+
+    def wait(self, position: int) -> int:
+        """Wait for frames past `position`; a stalled device triggers a rescan"""
+        written = self.ring.wait(position, CAPTURE_TIMEOUT)
+        if written <= position:
+            self.refresh_devices()
+            raise IOError("Audio device stopped delivering frames")
+        return written
+
+    def read_since(self, position: int):
+        """Frames captured since `position` as (view, new position).
+
+        Frames overwritten before the reader got to them are added to
+        dropped_frames.
+        """
+        view, position, dropped = self.ring.since(position)
+        self.dropped_frames += dropped
+        return view, position
+
+    def stats(self) -> dict:
+        """Capture health counters"""
+        return {
+            'frames_captured': self.ring.written,
+            'overflows': self.overflows,
+            'dropped_frames': self.dropped_frames
+        }
+
+    def stop_stream(self):
+        """Pause capturing but keep the stream open for the next recording"""
+        with self._lock:
+            if self.stream is not None:
+                try:
+                    if not self.stream.is_stopped():
+                        self.stream.stop_stream()
+                except Exception as e:
+                    print(f"Error stopping audio stream: {e}")
+                    self.close_stream()
+
+    def close_stream(self):
+        with self._lock:
+            if self.stream is not None:
+                try:
+                    self.stream.close()
+                except Exception:
+                    pass
+                self.stream = None
+
+    def close(self):
+        """Close the stream and terminate PortAudio, unless it was borrowed"""
+        with self._lock:
+            self.close_stream()
+            if self._pa is not None and self._owns_pa:
+                self._pa.terminate()
+                self._pa = None
@@ -0,0 +1,254 @@
+"""Recognition backends.
+
+Every backend takes raw 16-bit mono PCM at SAMPLE_RATE and returns a song dict
+(`title`, `artist`, `key`) or None. Backends are picked by name through
+RECOGNITION_BACKENDS (or the VIBECATCH_BACKENDS environment variable); a
+comma-separated list is tried in order, e.g. "fingerprint,shazam".
+"""
+import time
+from typing import Dict, List, Optional, Type
+
+import numpy as np
+
+from .config import (
+    RECOGNITION_BACKENDS, FINGERPRINT_INDEX_FILE, FINGERPRINT_MIN_SCORE,
+    MOCK_LATENCY, RESULT_CACHE_ENABLED, SERVICE_URL, API_CONNECT_TIMEOUT, API_READ_TIMEOUT
+)
+from .fingerprint import Fingerprint, FingerprintIndex, fingerprint
+from .metrics import increment, span
+from .mock_server import mock_track
+from .preprocess import prepare_upload
+from .recognition_client import RecognitionClient
+from .result_cache import ResultCache, acoustic_signature, signature_from_fingerprint
+from .wav import encode_wav, save_debug_recording
+
+
+class RecognitionBackend:
+    """Base class for recognition backends"""
+    name = ''
+    # Whether recognize_upload makes use of precomputed fingerprint `prints`
+    uses_fingerprint = False
+
+    def recognize(self, pcm: bytes) -> Optional[dict]:
+        """Identify a clip of raw PCM"""
+        raise NotImplementedError
+
+    def recognize_upload(self, pcm: bytes, upload: bytes,
+                         prints: Optional[Fingerprint] = None) -> Optional[dict]:
+        """Identify a clip whose prepare_upload/encode_wav result, and optionally
+        fingerprint(), were computed elsewhere"""
+        return self.recognize(pcm)
+
+    def learn(self, song: dict, pcm: bytes, prints: Optional[Fingerprint] = None):
+        """Called when another backend identified a clip this one missed"""
+
+    def close(self):
+        """Release any held resources"""
+
+
+class ShazamBackend(RecognitionBackend):
+    """RapidAPI Shazam recognition"""
+    name = 'shazam'
+
+    def __init__(self, client: Optional[RecognitionClient] = None):
+        self.client = client or RecognitionClient()
+
+    @staticmethod
+    def parse_response(result: Optional[dict]) -> Optional[dict]:
+        """Turn a Shazam response into a song dict"""
+        if result and 'track' in result:
+            track = result['track']
+            return {
+                'title': track.get('title', 'Unknown'),
+                'artist': track.get('subtitle', 'Unknown'),
+                'key': track.get('key', '')
+            }
+        return None
+
+    def recognize(self, pcm: bytes) -> Optional[dict]:
+        with span('encode'):
+            wav_data = encode_wav(*prepare_upload(pcm))
+        return self.recognize_upload(pcm, wav_data)
+
+    def recognize_upload(self, pcm: bytes, upload: bytes,
+                         prints: Optional[Fingerprint] = None) -> Optional[dict]:
+        save_debug_recording(upload)
+        return self.parse_response(self.client.recognize(upload))
+
+    def close(self):
+        self.client.close()
+
+
+class FingerprintBackend(RecognitionBackend):
+    """Local fingerprint index of songs identified before"""
+    name = 'fingerprint'
+    uses_fingerprint = True
+
+    def __init__(self, index: Optional[FingerprintIndex] = None,
+                 min_score: int = FINGERPRINT_MIN_SCORE):
+        self.index = index or FingerprintIndex.load(FINGERPRINT_INDEX_FILE)
+        self.min_score = min_score
+
+    def recognize(self, pcm: bytes) -> Optional[dict]:
+        return self.recognize_upload(pcm, None)
+
+    def recognize_upload(self, pcm: bytes, upload: Optional[bytes],
+                         prints: Optional[Fingerprint] = None) -> Optional[dict]:
+        with span('fingerprint_match'):
+            if prints is None:
+                # Zero-copy view over the captured bytes
+                prints = fingerprint(np.frombuffer(pcm, dtype=np.int16))
+            match = self.index.match_fingerprint(*prints)
+        if match and match[1] >= self.min_score:
+            self.index.touch(match[0]['key'])
+            return match[0]
+        return None
+
+    def learn(self, song: dict, pcm: bytes, prints: Optional[Fingerprint] = None):
+        if prints is None:
+            prints = fingerprint(np.frombuffer(pcm, dtype=np.int16))
+        if self.index.add_fingerprint(song, *prints):
+            self.index.schedule_save()
+
+    def close(self):
+        self.index.close()
+
+
+class MockBackend(RecognitionBackend):
+    """Deterministic offline backend for benchmarks and CI"""
+    name = 'mock'
+
+    def __init__(self, latency: float = MOCK_LATENCY):
+        self.latency = latency
+
+    def recognize(self, pcm: bytes) -> Optional[dict]:
+        if self.latency:
+            time.sleep(self.latency)
+        if not pcm:
+            return None
+        return mock_track(pcm)
+
+
+class ServiceBackend(RecognitionBackend):
+    """Forwards clips to a running `vibecatch serve` instance, so several
+    frontends share its connection pool, cache and fingerprint index"""
+    name = 'service'
+
+    def __init__(self, url: str = SERVICE_URL):
+        self.url = url.rstrip('/') + '/recognize'
+        self._session = None
+
+    def recognize(self, pcm: bytes) -> Optional[dict]:
+        if self._session is None:
+            import requests
+            self._session = requests.Session()
+        with span('encode'):
+            wav_data = encode_wav(pcm)
+        with span('upload'):
+            response = self._session.post(
+                self.url, data=wav_data, headers={'Content-Type': 'audio/wav'},
+                timeout=(API_CONNECT_TIMEOUT, API_READ_TIMEOUT)
+            )
+        response.raise_for_status()
+        with span('parse'):
+            return response.json().get('song')
+
+    def close(self):
+        if self._session is not None:
+            self._session.close()
+            self._session = None
+
+
+class ChainBackend(RecognitionBackend):
+    """Tries backends in order and teaches earlier ones about later hits"""
+
+    def __init__(self, backends: List[RecognitionBackend]):
+        self.backends = backends
+        self.name = ','.join(backend.name for backend in backends)
+        self.uses_fingerprint = any(backend.uses_fingerprint for backend in backends)
+
+    def recognize(self, pcm: bytes) -> Optional[dict]:
+        return self.recognize_upload(pcm, None)
+
+    def recognize_upload(self, pcm: bytes, upload: Optional[bytes],
+                         prints: Optional[Fingerprint] = None) -> Optional[dict]:
+        for i, backend in enumerate(self.backends):
+            if upload is None and prints is None:
+                song = backend.recognize(pcm)
+            else:
+                song = backend.recognize_upload(pcm, upload, prints)
+            if song:
+                for earlier in self.backends[:i]:
+                    try:
+                        earlier.learn(song, pcm, prints)
+                    except Exception as e:
+                        print(f"Error updating {earlier.name} backend: {e}")
+                return song
+        return None
+
+    def close(self):
+        for backend in self.backends:
+            backend.close()
+
+
+class CachedBackend(RecognitionBackend):
+    """Answers repeat captures from a ResultCache before calling `backend`"""
+    uses_fingerprint = True
+
+    def __init__(self, backend: RecognitionBackend, cache: Optional[ResultCache] = None):
+        self.backend = backend
+        self.cache = cache or ResultCache()
+        self.name = backend.name
+
+    def recognize(self, pcm: bytes) -> Optional[dict]:
+        return self.recognize_upload(pcm, None)
+
+    def recognize_upload(self, pcm: bytes, upload: Optional[bytes],
+                         prints: Optional[Fingerprint] = None) -> Optional[dict]:
+        with span('cache_lookup'):
+            if prints is None:
+                signature = acoustic_signature(pcm)
+            else:
+                signature = signature_from_fingerprint(*prints)
+            song = self.cache.get(signature)
+        if song:
+            increment('cache_hits')
+            return song
+        increment('cache_misses')
+        if upload is None and prints is None:
+            song = self.backend.recognize(pcm)
+        else:
+            song = self.backend.recognize_upload(pcm, upload, prints)
+        if song:
+            self.cache.put(signature, song)
+        return song
+
+    def learn(self, song: dict, pcm: bytes, prints: Optional[Fingerprint] = None):
+        self.backend.learn(song, pcm, prints)
+
+    def close(self):
+        self.backend.close()
+        self.cache.close()
+
+
+BACKENDS: Dict[str, Type[RecognitionBackend]] = {
+    ShazamBackend.name: ShazamBackend,
+    FingerprintBackend.name: FingerprintBackend,
+    MockBackend.name: MockBackend,
+    ServiceBackend.name: ServiceBackend,
+}
+
+
+def create_backend(spec: str = RECOGNITION_BACKENDS,
+                   cached: bool = RESULT_CACHE_ENABLED) -> RecognitionBackend:
+    """Build the backend (or chain of backends) named by `spec`"""
+    names = [name.strip().lower() for name in spec.split(',') if name.strip()]
+    unknown = [name for name in names if name not in BACKENDS]
+    if unknown or not names:
+        raise ValueError(f"Unknown recognition backend: {spec!r}")
+
+    backends = [BACKENDS[name]() for name in names]
+    backend = backends[0] if len(backends) == 1 else ChainBackend(backends)
+    if cached:
+        backend = CachedBackend(backend)
+    return backend
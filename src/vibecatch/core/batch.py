@@ -0,0 +1,192 @@
+"""Offline recognition of recorded audio files.
+
+Files are cut into segments, recognized on a bounded thread pool behind a
+rate limiter, and every finished segment is appended to a JSONL checkpoint.
+An interrupted run started again with the same checkpoint skips the segments
+it already has.
+"""
+import csv
+import json
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Dict, Iterator, List, Optional, Set, Tuple
+
+from .audio_file import iter_segments
+from .audio_gate import AudioGate
+from .backends import RecognitionBackend
+from .config import (
+    BATCH_SEGMENT, BATCH_HOP, BATCH_WORKERS, BATCH_RATE_LIMIT, BATCH_CHECKPOINT_FILE
+)
+from .metrics import increment, span
+from .scheduler import BACKGROUND, request_priority
+from .playlist_store import PlaylistStore
+
+REPORT_FIELDS = ['file', 'offset', 'title', 'artist', 'key', 'skipped']
+
+
+class RateLimiter:
+    """Spaces calls at least 1/rate seconds apart across threads"""
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            delay = self._next - now
+            self._next = max(now, self._next) + self.interval
+        if delay > 0:
+            time.sleep(delay)
+
+
+class Checkpoint:
+    """Append-only JSONL log of finished segments"""
+
+    def __init__(self, path: str = BATCH_CHECKPOINT_FILE, resume: bool = True):
+        self.path = path
+        self.records: List[dict] = []
+        if resume and os.path.exists(path):
+            good = 0
+            with open(path, 'rb') as f:
+                for line in f:
+                    try:
+                        self.records.append(json.loads(line))
+                    except ValueError:
+                        # Torn last line from an interrupted run
+                        break
+                    good += len(line)
+            if good < os.path.getsize(path):
+                # Cut it off so new records do not continue the torn line
+                with open(path, 'r+b') as f:
+                    f.truncate(good)
+        self.done: Set[Tuple[str, float]] = {
+            (record['file'], record['offset']) for record in self.records
+        }
+        self._file = open(path, 'a' if resume else 'w')
+        self._lock = threading.Lock()
+
+    def add(self, record: dict):
+        with self._lock:
+            self._file.write(json.dumps(record) + '\n')
+            self._file.flush()
+            self.records.append(record)
+            self.done.add((record['file'], record['offset']))
+
+    def close(self):
+        self._file.close()
+
+
+def write_report(records: List[dict], path: str):
+    """Write records as CSV, or as JSONL when `path` ends in .jsonl/.json"""
+    records = sorted(records, key=lambda record: (record['file'], record['offset']))
+    if path.lower().endswith(('.jsonl', '.json')):
+        with open(path, 'w') as f:
+            for record in records:
+                f.write(json.dumps(record) + '\n')
+        return
+    with open(path, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=REPORT_FIELDS, extrasaction='ignore')
+        writer.writeheader()
+        writer.writerows(records)
+
+
+class BatchRecognizer:
+    """Recognize segments of many files with bounded concurrency"""
+
+    def __init__(self, backend: RecognitionBackend, checkpoint: Checkpoint,
+                 workers: int = BATCH_WORKERS, rate_limit: float = BATCH_RATE_LIMIT,
+                 segment: float = BATCH_SEGMENT, hop: float = BATCH_HOP,
+                 store: Optional[PlaylistStore] = None, playlist_id: Optional[str] = None,
+                 on_record: Optional[Callable[[dict], None]] = None,
+                 gate: Optional[AudioGate] = None):
+        self.backend = backend
+        self.checkpoint = checkpoint
+        self.workers = workers
+        self.limiter = RateLimiter(rate_limit)
+        self.segment = segment
+        self.hop = hop
+        self.store = store
+        self.playlist_id = playlist_id
+        self.on_record = on_record
+        self.gate = gate
+        self.stats = {'segments': 0, 'skipped': 0, 'gated': 0, 'recognized': 0, 'errors': 0}
+
+    def tasks(self, files: List[str]) -> Iterator[Tuple[str, float, bytes]]:
+        """Segments still missing from the checkpoint, decoded lazily"""
+        for path in files:
+            try:
+                for offset, pcm in iter_segments(path, self.segment, self.hop):
+                    offset = round(offset, 3)
+                    if (path, offset) in self.checkpoint.done:
+                        self.stats['skipped'] += 1
+                        continue
+                    yield path, offset, pcm
+            except Exception as e:
+                self.stats['errors'] += 1
+                print(f"Error decoding {path}: {e}")
+
+    def recognize(self, path: str, offset: float, pcm: bytes) -> dict:
+        record = {'file': path, 'offset': offset, 'title': None, 'artist': None, 'key': None}
+        # Silent gaps and talk between tracks never reach the rate limiter
+        if self.gate is not None:
+            with span('gate'):
+                verdict = self.gate.check(pcm)
+            if not verdict['passed']:
+                increment('gate_rejections')
+                record['skipped'] = verdict['reason']
+                return record
+        self.limiter.acquire()
+        increment('recognitions')
+        with span('recognize'), request_priority(BACKGROUND):
+            song = self.backend.recognize(pcm)
+        increment('matches' if song else 'no_matches')
+        if song:
+            record.update(title=song['title'], artist=song['artist'], key=song.get('key', ''))
+        return record
+
+    def run(self, files: List[str]) -> Dict[str, int]:
+        """Process every file; returns counters for the run"""
+        # Only a few segments per worker are decoded ahead, keeping memory flat
+        max_pending = self.workers * 2
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            pending = set()
+            try:
+                for task in self.tasks(files):
+                    pending.add(executor.submit(self.recognize, *task))
+                    if len(pending) >= max_pending:
+                        finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                        self._collect(finished)
+                finished, pending = wait(pending)
+                self._collect(finished)
+            except KeyboardInterrupt:
+                for future in pending:
+                    future.cancel()
+                raise
+        return self.stats
+
+    def _collect(self, futures):
+        for future in futures:
+            try:
+                record = future.result()
+            except Exception as e:
+                self.stats['errors'] += 1
+                increment('recognition_failures')
+                print(f"Error recognizing segment: {e}")
+                continue
+            self.stats['segments'] += 1
+            if record.get('skipped'):
+                self.stats['gated'] += 1
+            self.checkpoint.add(record)
+            if record['title']:
+                self.stats['recognized'] += 1
+                if self.store is not None and self.playlist_id:
+                    song = {key: record[key] for key in ('title', 'artist', 'key')}
+                    self.store.add(song, self.playlist_id)
+            if self.on_record:
+                self.on_record(record)
@@ -0,0 +1,316 @@
+"""Monitoring several input devices at once from one process.
+
+Each device gets its own AudioSession (sharing one PortAudio instance) and
+capture thread, which works like AudioManager.monitor(): the last `window`
+seconds are taken from the device's ring buffer every `hop` seconds, with at
+most one attempt per device in flight. Attempts from all devices share:
+
+- a process pool for the DSP, so the FFT work of screening, encoding and
+  fingerprinting captures from many devices does not contend for one GIL;
+  the backends get the fingerprint and only look it up
+- a thread pool for the network-bound recognition calls
+
+Each device is opened at its own default sample rate, so line-ins that only
+run at 48 kHz work too; windows are resampled to SAMPLE_RATE before they are
+screened. Results are tagged with the device they came from:
+
+    manager = CaptureManager(devices=[1, 3])
+    manager.song_changed.connect(lambda result: print(result['source'], result['song']))
+    manager.start()
+"""
+import multiprocessing
+import signal
+import threading
+import time
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Dict, List, Optional, Union
+
+from .config import (
+    SAMPLE_RATE, MONITOR_WINDOW, MONITOR_HOP, GATE_ENABLED, CAPTURE_DSP_WORKERS,
+    CAPTURE_RECOGNITION_WORKERS, CAPTURE_RETRY_DELAY
+)
+from .events import Signal
+from .metrics import increment, span
+from .monitor import SongChangeDetector
+from .scheduler import BACKGROUND, request_priority
+
+# Per-process gate, created on first use in each DSP worker
+_gate = None
+
+
+def _ignore_interrupts():
+    """DSP workers leave Ctrl+C to the parent, which shuts them down"""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+
+def prepare_capture(pcm: bytes, gate_enabled: bool = True, with_prints: bool = False) -> dict:
+    """Screen a capture and encode it for upload; runs in a DSP worker process.
+
+    Returns `passed` and `reason` from the capture gate and, when it passed,
+    the compact `upload` WAV the Shazam backend would send and, if asked for,
+    the `prints` the fingerprint index and result cache look up.
+    """
+    global _gate
+    from .preprocess import prepare_upload
+    from .wav import encode_wav
+
+    if gate_enabled:
+        if _gate is None:
+            from .audio_gate import AudioGate
+            _gate = AudioGate()
+        verdict = _gate.check(pcm)
+        if not verdict['passed']:
+            return {'passed': False, 'reason': verdict['reason'], 'upload': None, 'prints': None}
+    prints = None
+    if with_prints:
+        import numpy as np
+
+        from .fingerprint import fingerprint
+        prints = fingerprint(np.frombuffer(pcm, dtype=np.int16))
+    return {'passed': True, 'reason': None, 'upload': encode_wav(*prepare_upload(pcm)),
+            'prints': prints}
+
+
+def to_sample_rate(samples, rate: int):
+    """16-bit samples captured at `rate`, resampled to SAMPLE_RATE"""
+    import numpy as np
+
+    from .preprocess import resample
+    return np.clip(resample(samples, rate, SAMPLE_RATE), -32768, 32767).astype(np.int16)
+
+
+def list_input_devices(pa) -> List[dict]:
+    """Every device with input channels, as index/name/channels/rate dicts"""
+    devices = []
+    for i in range(pa.get_device_count()):
+        info = pa.get_device_info_by_index(i)
+        if info['maxInputChannels'] > 0:
+            devices.append({
+                'index': i,
+                'name': info['name'],
+                'channels': int(info['maxInputChannels']),
+                'rate': int(info.get('defaultSampleRate', 0)),
+            })
+    return devices
+
+
+def resolve_devices(available: List[dict], selection: List[Union[int, str]]) -> List[dict]:
+    """Pick devices by index or by a case-insensitive part of their name"""
+    chosen = []
+    for wanted in selection:
+        if isinstance(wanted, int) or str(wanted).isdigit():
+            matches = [device for device in available if device['index'] == int(wanted)]
+        else:
+            matches = [device for device in available
+                       if str(wanted).lower() in device['name'].lower()]
+        if not matches:
+            raise ValueError(f"No input device matches {wanted!r}")
+        for device in matches:
+            if device not in chosen:
+                chosen.append(device)
+    return chosen
+
+
+class CaptureSource:
+    """One monitored input device and its recognition state"""
+
+    def __init__(self, device: dict, session):
+        self.index = device['index']
+        self.name = device['name']
+        self.rate = device.get('rate') or SAMPLE_RATE
+        self.session = session
+        self.detector = SongChangeDetector()
+        self.pending: Optional[Future] = None
+        self.thread: Optional[threading.Thread] = None
+        self.error: Optional[str] = None
+        self.stats = {'attempts': 0, 'matches': 0, 'rejected': 0, 'errors': 0}
+        # Counted from the capture thread and the recognition pool
+        self._stats_lock = threading.Lock()
+
+    @property
+    def label(self) -> str:
+        return f"{self.index}:{self.name}"
+
+    def count(self, name: str):
+        with self._stats_lock:
+            self.stats[name] += 1
+
+    def counters(self) -> Dict[str, int]:
+        with self._stats_lock:
+            return dict(self.stats)
+
+
+class CaptureManager:
+    """Monitors several input devices with shared DSP and recognition pools"""
+
+    def __init__(self, devices: Optional[List[Union[int, str]]] = None, backend=None,
+                 window: float = MONITOR_WINDOW, hop: float = MONITOR_HOP,
+                 dsp_workers: int = CAPTURE_DSP_WORKERS,
+                 recognition_workers: int = CAPTURE_RECOGNITION_WORKERS,
+                 gate_enabled: bool = GATE_ENABLED):
+        self.selection = devices
+        self.window = int(SAMPLE_RATE * window)
+        self.hop = int(SAMPLE_RATE * hop)
+        self.dsp_workers = dsp_workers
+        self.recognition_workers = recognition_workers
+        self.gate_enabled = gate_enabled
+        self.song_changed = Signal()
+        self.status_updated = Signal()
+        self.sources: List[CaptureSource] = []
+        self.running = False
+        self._backend = backend
+        self._pa = None
+        self._dsp: Optional[Executor] = None
+        self._recognizer: Optional[ThreadPoolExecutor] = None
+        self._stopped = threading.Event()
+
+    @property
+    def backend(self):
+        if self._backend is None:
+            from .backends import create_backend
+            self._backend = create_backend()
+        return self._backend
+
+    @property
+    def pa(self):
+        """One PyAudio instance shared by every device's session"""
+        if self._pa is None:
+            import pyaudio
+            self._pa = pyaudio.PyAudio()
+        return self._pa
+
+    def available_devices(self) -> List[dict]:
+        with span('device_enumeration'):
+            return list_input_devices(self.pa)
+
+    def start(self):
+        """Open every selected device and start its capture thread"""
+        from .audio_session import AudioSession
+
+        if self.running:
+            return
+        available = self.available_devices()
+        devices = resolve_devices(available, self.selection) if self.selection else available
+        if not devices:
+            raise IOError("No audio input devices found")
+
+        if self.dsp_workers > 0:
+            # Spawned workers never inherit PortAudio's threads or state
+            self._dsp = ProcessPoolExecutor(
+                max_workers=self.dsp_workers, mp_context=multiprocessing.get_context('spawn'),
+                initializer=_ignore_interrupts
+            )
+        self._recognizer = ThreadPoolExecutor(
+            max_workers=self.recognition_workers, thread_name_prefix='capture-recognize'
+        )
+        self.running = True
+        self._stopped.clear()
+        for device in devices:
+            session = AudioSession(device['index'], self.pa, rate=device['rate'] or SAMPLE_RATE)
+            source = CaptureSource(device, session)
+            source.thread = threading.Thread(
+                target=self.capture, args=(source,), name=f"capture-{device['index']}", daemon=True
+            )
+            self.sources.append(source)
+            source.thread.start()
+
+    def capture(self, source: CaptureSource):
+        """Capture thread of one device; a failing device is retried, not dropped"""
+        session = source.session
+        while self.running:
+            try:
+                self.capture_stream(source)
+            except Exception as e:
+                source.error = str(e)
+                source.count('errors')
+                print(f"Error capturing from {source.label}: {e}")
+                self.status_updated.emit(source.label, f"Capture failed: {e}")
+                self._stopped.wait(CAPTURE_RETRY_DELAY)
+            finally:
+                session.stop_stream()
+
+    def capture_stream(self, source: CaptureSource):
+        session = source.session
+        # Window and hop in the device's own samples
+        window = self.window * source.rate // SAMPLE_RATE
+        hop = self.hop * source.rate // SAMPLE_RATE
+        start = position = session.start_stream()
+        next_attempt = start + window
+        source.error = None
+        self.status_updated.emit(source.label, "Monitoring...")
+
+        while self.running:
+            position = session.wait(position)
+            idle = source.pending is None or source.pending.done()
+            if idle and position >= next_attempt:
+                next_attempt = position + hop
+                clip = session.ring.latest(window)
+                if source.rate != SAMPLE_RATE:
+                    clip = to_sample_rate(clip, source.rate)
+                source.pending = self._recognizer.submit(self.process, source, clip.tobytes())
+
+    def prepare(self, pcm: bytes) -> dict:
+        with_prints = self.backend.uses_fingerprint
+        if self._dsp is None:
+            return prepare_capture(pcm, self.gate_enabled, with_prints)
+        return self._dsp.submit(prepare_capture, pcm, self.gate_enabled, with_prints).result()
+
+    def process(self, source: CaptureSource, pcm: bytes):
+        """Screen, encode and recognize one window of a device"""
+        try:
+            source.count('attempts')
+            with span('prepare'):
+                prepared = self.prepare(pcm)
+            if not prepared['passed']:
+                source.count('rejected')
+                increment('gate_rejections')
+                source.detector.update(None)
+                return
+            increment('recognitions')
+            with span('recognize'), request_priority(BACKGROUND):
+                song = self.backend.recognize_upload(pcm, prepared['upload'], prepared['prints'])
+            if source.detector.update(song):
+                source.count('matches')
+                self.song_changed.emit({
+                    'source': source.name,
+                    'device': source.index,
+                    'song': song,
+                    'at': time.time(),
+                })
+        except Exception as e:
+            source.count('errors')
+            increment('recognition_failures')
+            print(f"Error recognizing audio from {source.label}: {e}")
+
+    def stats(self) -> Dict[str, dict]:
+        """Per-device counters and capture health"""
+        return {
+            source.label: dict(source.counters(), error=source.error, **source.session.stats())
+            for source in self.sources
+        }
+
+    def stop(self):
+        """Stop capturing and wait for attempts in flight"""
+        self.running = False
+        self._stopped.set()
+        for source in self.sources:
+            if source.thread is not None:
+                source.thread.join()
+        if self._recognizer is not None:
+            self._recognizer.shutdown(wait=True)
+            self._recognizer = None
+        if self._dsp is not None:
+            self._dsp.shutdown(wait=True)
+            self._dsp = None
+
+    def close(self):
+        """Stop, then release every device, PortAudio and the backend"""
+        self.stop()
+        for source in self.sources:
+            source.session.close()
+        self.sources = []
+        if self._pa is not None:
+            self._pa.terminate()
+            self._pa = None
+        if self._backend is not None:
+            self._backend.close()
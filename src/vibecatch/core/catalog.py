@@ -0,0 +1,171 @@
+"""Normalized song catalog shared by every playlist.
+
+Each song is stored once as a Track with interned strings, and playlists are
+compact arrays of track IDs. Every track also carries a bitmask of the
+playlists that contain it. So "is this song in that playlist" and "which
+playlists contain this song" are both answered without scanning anything.
+
+Serialized form (playlists.json, version 2):
+
+    {"version": 2,
+     "tracks": [["Ready 2 Go", "Shermanology", "714164044"]],
+     "playlists": {"hyped": [0], "feelgood": [0]}}
+
+The original format, a song dict per playlist entry, is still read and
+migrated on load.
+"""
+import sys
+from array import array
+from typing import Dict, List, Optional, Tuple
+
+CATALOG_VERSION = 2
+
+
+def normalize_name(title: str, artist: str) -> Tuple[str, str]:
+    """Case- and whitespace-insensitive identity of a song"""
+    return (' '.join(title.split()).casefold(), ' '.join(artist.split()).casefold())
+
+
+class Track:
+    """One song in the catalog.
+
+    Supports song['title'] and song.get('key'), so tracks can be used
+    wherever song dicts were.
+    """
+    __slots__ = ('id', 'title', 'artist', 'key', 'playlists')
+
+    def __init__(self, track_id: int, title: str, artist: str, key: str = ''):
+        self.id = track_id
+        self.title = sys.intern(title)
+        self.artist = sys.intern(artist)
+        self.key = sys.intern(key) if key else ''
+        # Bit i is set when the catalog's i-th playlist contains the track
+        self.playlists = 0
+
+    def __getitem__(self, field: str) -> str:
+        if field not in ('title', 'artist', 'key'):
+            raise KeyError(field)
+        return getattr(self, field)
+
+    def get(self, field: str, default=None):
+        try:
+            return self[field]
+        except KeyError:
+            return default
+
+    def to_dict(self) -> dict:
+        return {'title': self.title, 'artist': self.artist, 'key': self.key}
+
+    def __repr__(self) -> str:
+        return f"Track({self.id}, {self.title!r}, {self.artist!r}, {self.key!r})"
+
+
+class Catalog:
+    """Tracks by ID, Shazam key and normalized name, plus playlists of IDs"""
+
+    def __init__(self):
+        self.tracks: List[Track] = []
+        self.playlists: Dict[str, array] = {}
+        self._by_key: Dict[str, Track] = {}
+        self._by_name: Dict[Tuple[str, str], Track] = {}
+        self._bits: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.tracks)
+
+    @property
+    def song_count(self) -> int:
+        """Playlist entries across all playlists"""
+        return sum(len(ids) for ids in self.playlists.values())
+
+    def add_playlist(self, playlist_id: str):
+        if playlist_id not in self.playlists:
+            self._bits[playlist_id] = 1 << len(self._bits)
+            self.playlists[playlist_id] = array('I')
+
+    def find(self, song: dict) -> Optional[Track]:
+        """The catalog track for a song, by Shazam key or normalized title/artist"""
+        key = song.get('key')
+        if key and key in self._by_key:
+            return self._by_key[key]
+        return self._by_name.get(normalize_name(song['title'], song['artist']))
+
+    def track_for(self, song: dict) -> Track:
+        """Find the song's track, adding it to the catalog when new"""
+        track = self.find(song)
+        key = song.get('key') or ''
+        if track is None:
+            track = Track(len(self.tracks), song['title'], song['artist'], key)
+            self.tracks.append(track)
+            self._by_name[normalize_name(track.title, track.artist)] = track
+        elif key and not track.key:
+            # Learned the key of a song first added by name only
+            track.key = sys.intern(key)
+        if track.key:
+            self._by_key.setdefault(track.key, track)
+        return track
+
+    def contains(self, playlist_id: str, song: dict) -> bool:
+        bit = self._bits.get(playlist_id)
+        if bit is None:
+            return False
+        track = self.find(song)
+        return track is not None and bool(track.playlists & bit)
+
+    def add(self, song: dict, playlist_id: str) -> bool:
+        """Add a song to a playlist; returns False for duplicates"""
+        self.add_playlist(playlist_id)
+        return self._add_track(self.track_for(song), playlist_id)
+
+    def _add_track(self, track: Track, playlist_id: str) -> bool:
+        bit = self._bits[playlist_id]
+        if track.playlists & bit:
+            return False
+        track.playlists |= bit
+        self.playlists[playlist_id].append(track.id)
+        return True
+
+    def playlists_of(self, song: dict) -> List[str]:
+        """IDs of the playlists that contain a song"""
+        track = self.find(song)
+        if track is None or not track.playlists:
+            return []
+        return [playlist_id for playlist_id, bit in self._bits.items() if track.playlists & bit]
+
+    def songs(self, playlist_id: str) -> List[Track]:
+        tracks = self.tracks
+        return [tracks[track_id] for track_id in self.playlists.get(playlist_id, ())]
+
+    def export(self) -> dict:
+        """Copy of the catalog that another thread can serialize with to_json"""
+        return {
+            'tracks': list(self.tracks),
+            'playlists': {playlist_id: array('I', ids) for playlist_id, ids in self.playlists.items()},
+        }
+
+    @staticmethod
+    def to_json(exported: dict) -> dict:
+        """Version 2 file contents of an export()"""
+        return {
+            'version': CATALOG_VERSION,
+            'tracks': [[track.title, track.artist, track.key] for track in exported['tracks']],
+            'playlists': {playlist_id: ids.tolist() for playlist_id, ids in exported['playlists'].items()},
+        }
+
+    def load_json(self, data: dict) -> bool:
+        """Fill the catalog from playlists.json contents; True when they were in the old format"""
+        if data.get('version') == CATALOG_VERSION:
+            tracks = [self.track_for({'title': title, 'artist': artist, 'key': key})
+                      for title, artist, key in data.get('tracks', [])]
+            for playlist_id, ids in data.get('playlists', {}).items():
+                self.add_playlist(playlist_id)
+                for track_id in ids:
+                    self._add_track(tracks[track_id], playlist_id)
+            return False
+
+        # Version 1: a full song dict in every playlist it belongs to
+        for playlist_id, songs in data.items():
+            self.add_playlist(playlist_id)
+            for song in songs:
+                self.add(song, playlist_id)
+        return True
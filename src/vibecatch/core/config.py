@@ -1,29 +1,34 @@
-from ..styles import colors
+import os
+import tempfile
 
 # Vibe categories configuration
 VIBE_CATEGORIES = {
     'happiness': {
         'name': 'Happiness and Joy',
-        'description': 'Upbeat tempos and major keys activate the brain\'s reward system, releasing dopamine and serotonin.',
-        'color': colors.GREEN
+        'description': 'Upbeat tempos and major keys activate the brain\'s reward system, releasing dopamine and serotonin.'
     },
     'emotional': {
         'name': 'Emotional Depth',
-        'description': 'Minor keys and slower tempos evoke introspection and connection.',
-        'color': colors.PINK
+        'description': 'Minor keys and slower tempos evoke introspection and connection.'
     },
     'relaxation': {
         'name': 'Relaxation and Calm',
-        'description': 'Gentle rhythms and smooth harmonies help lower cortisol and activate the parasympathetic nervous system.',
-        'color': colors.CYAN
+        'description': 'Gentle rhythms and smooth harmonies help lower cortisol and activate the parasympathetic nervous system.'
     },
     'excitement': {
         'name': 'Excitement and Energy',
-        'description': 'Fast-paced beats and dynamic rhythms increase physical and mental arousal.',
-        'color': colors.ORANGE
+        'description': 'Fast-paced beats and dynamic rhythms increase physical and mental arousal.'
     }
 }
 
+# Playlist storage
+PLAYLISTS_FILE = 'playlists.json'
+PLAYLISTS_JOURNAL_FILE = 'playlists.journal'
+PLAYLIST_COMPACT_EVERY = 500  # journal entries before the snapshot is rewritten
+PLAYLIST_FSYNC = True  # fsync every journal write
+PLAYLIST_WRITE_BEHIND = True  # write playlist files from a background thread
+PERSISTENCE_FLUSH_INTERVAL = 0.25  # seconds to coalesce journal writes
+
 # Window configuration
 WINDOW_MIN_WIDTH = 1000
 WINDOW_MIN_HEIGHT = 700
@@ -35,13 +40,138 @@ BIT_DEPTH = 16
 CHANNELS = 1
 MAX_FILE_SIZE = 500 * 1000  # 500KB max for Shazam API
 RECORD_TIME = 5  # seconds
+CHUNK_SIZE = 1024  # frames per PortAudio callback
+RING_BUFFER_SECONDS = 12  # capture history, must cover the longest window
+CAPTURE_TIMEOUT = 2  # seconds without frames before the device is considered gone
+
+# Live level meter shown while listening
+METER_RATE = 25  # meter frames per second sent to the UI
+METER_WINDOW = 0.5  # seconds of audio in the waveform
+METER_WAVEFORM_POINTS = 64
+METER_FFT_SIZE = 2048
+METER_BANDS = 16  # log-spaced spectrum bands between METER_MIN_FREQ and METER_MAX_FREQ
+METER_MIN_FREQ = 60  # Hz
+METER_MAX_FREQ = 12000  # Hz
+METER_FLOOR_DB = -60  # dBFS shown as an empty meter
+
+# Multi-device capture (vibecatch listen)
+CAPTURE_DSP_WORKERS = 2  # processes screening and encoding captures, 0 for in-thread
+CAPTURE_RECOGNITION_WORKERS = 4  # recognitions in flight across all devices
+CAPTURE_RETRY_DELAY = 5  # seconds before reopening a device that failed
+
+# Upload preprocessing, keeps clips well under MAX_FILE_SIZE
+UPLOAD_SAMPLE_RATE = 16000  # None uploads at SAMPLE_RATE
+UPLOAD_MAX_SECONDS = 5  # only the loudest segment of this length is uploaded
+UPLOAD_PEAK_LEVEL = 0.9  # fraction of full scale after normalization
+
+# Streaming recognition: try growing windows and stop at the first match
+STREAMING_MODE = True
+STREAM_WINDOWS = [1.5, 3, RECORD_TIME]  # seconds of audio per attempt
+
+# Capture gate: skip uploads of silence, noise, hum and speech
+GATE_ENABLED = True
+GATE_FRAME_SIZE = 2048  # samples per analysis frame
+GATE_MIN_RMS_DB = -50  # dBFS
+GATE_MAX_FLATNESS = 0.4  # spectral flatness; white noise is about 0.56
+GATE_MIN_ONSET_RATE = 0.2  # onsets per second
+GATE_MAX_QUIET_RATIO = 0.5  # fraction of frames 20 dB under the overall level
+GATE_TONAL_FLATNESS = 0.05  # below this a clip is tonal enough to pass without onsets...
+GATE_MIN_SPECTRAL_CHANGE = 0.004  # ...if its spectrum moves at least this much (a hum does not)
+
+# Vibe suggestions from tempo, key and energy
+VIBE_SUGGESTIONS = True
+VIBE_CACHE_FILE = 'vibe_cache.jsonl'
+VIBE_CACHE_MAX_ENTRIES = 5000
+
+# Fingerprint configuration
+FINGERPRINT_INDEX_FILE = 'fingerprints.npz'
+FINGERPRINT_MIN_SCORE = 15  # aligned hash matches needed for a local hit
+FINGERPRINT_MAX_ENTRIES = 2_000_000  # hashes kept (12 bytes each); least recently used tracks go first
+FINGERPRINT_SAVE_DELAY = 10  # seconds; songs learned meanwhile are saved together
+
+# Debugging: keep a copy of every uploaded recording on disk
+SAVE_RECORDINGS = os.environ.get('VIBECATCH_SAVE_RECORDINGS', '') == '1'
+RECORDINGS_DIR = 'recordings'
 
 # Layout configuration
 LAYOUT_SPACING = 6
 LAYOUT_MARGINS = 6
 GRID_SPACING = 6
 
+# Continuous monitoring
+MONITOR_WINDOW = RECORD_TIME  # seconds of audio per recognition attempt
+MONITOR_HOP = 10  # seconds between recognition attempts
+MONITOR_CLEAR_AFTER = 3  # missed windows before the current song is forgotten
+
+# Batch recognition of audio files (vibecatch batch)
+AUDIO_FILE_EXTENSIONS = ('.wav', '.mp3', '.flac', '.ogg', '.m4a', '.aac', '.opus')
+BATCH_SEGMENT = RECORD_TIME  # seconds of audio per recognition attempt
+BATCH_HOP = 30  # seconds between segment starts
+BATCH_WORKERS = 4
+BATCH_RATE_LIMIT = 2.0  # recognition requests per second, 0 for unlimited
+BATCH_CHECKPOINT_FILE = 'batch_checkpoint.jsonl'
+
+# Recognition backends, tried in order: shazam, fingerprint, mock, service
+RECOGNITION_BACKENDS = os.environ.get('VIBECATCH_BACKENDS', 'fingerprint,shazam')
+MOCK_LATENCY = float(os.environ.get('VIBECATCH_MOCK_LATENCY', '0'))  # seconds
+
+# Recognition result cache
+RESULT_CACHE_ENABLED = True
+RESULT_CACHE_FILE = 'recognition_cache.jsonl'
+RESULT_CACHE_MAX_ENTRIES = 5000
+RESULT_CACHE_TTL = 24 * 60 * 60  # seconds
+RESULT_CACHE_SIGNATURE_SIZE = 64  # smallest fingerprint hashes kept per capture
+RESULT_CACHE_MIN_VOTES = 5  # time-aligned hash matches needed for a hit
+
 # API configuration
-SHAZAM_API_HOST = "shazam-api6.p.rapidapi.com"
-SHAZAM_API_KEY = "fa5a6a869emsha1e5c0d55e85365p18dc1djsnd0540648d450"
-SHAZAM_API_ENDPOINT = "https://shazam-api6.p.rapidapi.com/shazam/recognize/"
+SHAZAM_API_HOST = os.environ.get('VIBECATCH_SHAZAM_HOST', "shazam-api6.p.rapidapi.com")
+SHAZAM_API_KEY = os.environ.get('VIBECATCH_SHAZAM_KEY', "fa5a6a869emsha1e5c0d55e85365p18dc1djsnd0540648d450")
+SHAZAM_API_ENDPOINT = os.environ.get(
+    'VIBECATCH_SHAZAM_ENDPOINT', "https://shazam-api6.p.rapidapi.com/shazam/recognize/"
+)
+
+# HTTP client configuration
+API_CONNECT_TIMEOUT = 3.05  # seconds
+API_READ_TIMEOUT = 15  # seconds
+API_MAX_RETRIES = 3
+API_BACKOFF_FACTOR = 0.5  # seconds, doubled on every retry
+API_MAX_BACKOFF = 30  # seconds, also caps Retry-After
+API_POOL_SIZE = 4
+API_BREAKER_THRESHOLD = 5  # consecutive failed calls before the circuit opens
+API_BREAKER_RESET = 30  # seconds before a trial call is let through
+
+# Recognition API quota, shared by every VibeCatch process on the host
+SCHEDULER_ENABLED = True
+SCHEDULER_STATE_FILE = os.environ.get(
+    'VIBECATCH_QUOTA_FILE', os.path.join(tempfile.gettempdir(), 'vibecatch_quota.json')
+)
+SCHEDULER_RATE = float(os.environ.get('VIBECATCH_API_RATE', 1.0))  # API calls per second at most
+SCHEDULER_BURST = 5  # calls that may go out back to back
+SCHEDULER_MIN_RATE = 0.02  # floor when rate-limit headers slow us down
+SCHEDULER_MAX_WAIT = 60  # seconds a call waits for quota before giving up
+
+# Offline queue: captures taken while recognition is unreachable, replayed later
+OFFLINE_QUEUE_ENABLED = True
+OFFLINE_QUEUE_DIR = 'offline_queue'
+OFFLINE_QUEUE_MAX_ENTRIES = 200  # oldest captures are dropped beyond this
+OFFLINE_REPLAY_WORKERS = 4
+OFFLINE_RETRY_INTERVAL = 15  # seconds, doubled while the API stays unreachable
+OFFLINE_MAX_RETRY_INTERVAL = 300  # seconds
+
+# Local recognition service (vibecatch serve)
+SERVICE_HOST = '127.0.0.1'
+SERVICE_PORT = 8766
+SERVICE_WORKERS = 4  # recognitions in flight across all clients
+SERVICE_MAX_MESSAGE = 1024 * 1024  # bytes per WebSocket message
+SERVICE_MAX_UPLOAD = 10 * 1024 * 1024  # bytes per HTTP request body
+SERVICE_URL = os.environ.get('VIBECATCH_SERVICE_URL', f"http://{SERVICE_HOST}:{SERVICE_PORT}")
+# Needed to change playlists through the service; a random one is printed at startup when unset
+SERVICE_TOKEN = os.environ.get('VIBECATCH_SERVICE_TOKEN', '')
+SERVICE_MIN_RATE = 8000  # Hz, accepted range for raw PCM
+SERVICE_MAX_RATE = 192000
+
+# Instrumentation
+METRICS_PREFIX = 'vibecatch'
+METRICS_SAMPLES = 1024  # recent durations kept per span for percentiles
+METRICS_FILE = os.environ.get('VIBECATCH_METRICS_FILE', '')  # .json or Prometheus text
+PROFILE_FILE = 'vibecatch.prof'
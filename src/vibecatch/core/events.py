@@ -0,0 +1,29 @@
+"""Qt-free signals for core components"""
+import threading
+from typing import Callable, List
+
+
+class Signal:
+    """Callback list with the connect/disconnect/emit shape of a Qt signal.
+
+    Slots run synchronously on the emitting thread; a UI adapter that needs
+    them on its own thread can connect a Qt signal's emit as the slot.
+    """
+
+    def __init__(self):
+        self._slots: List[Callable] = []
+        self._lock = threading.Lock()
+
+    def connect(self, slot: Callable):
+        with self._lock:
+            self._slots.append(slot)
+
+    def disconnect(self, slot: Callable):
+        with self._lock:
+            self._slots.remove(slot)
+
+    def emit(self, *args):
+        with self._lock:
+            slots = list(self._slots)
+        for slot in slots:
+            slot(*args)
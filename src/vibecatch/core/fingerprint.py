@@ -0,0 +1,336 @@
+"""Spectral-peak audio fingerprints and a local inverted index.
+
+Audio is turned into a sparse constellation of spectrogram peaks and pairs of
+nearby peaks are packed into 32-bit hashes (anchor frequency, target frequency,
+time delta). The index maps each hash to the (track, offset) pairs it was seen
+at, so a new capture can be matched by counting hashes that agree on a common
+time offset.
+"""
+import json
+import os
+import threading
+import time
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from .config import SAMPLE_RATE, FINGERPRINT_MAX_ENTRIES, FINGERPRINT_SAVE_DELAY
+
+# Spectrogram parameters
+FFT_SIZE = 2048
+HOP_SIZE = 1024
+MAX_FREQ = 5000  # Hz, peaks above this are too fragile over a microphone
+
+# Peak picking parameters
+PEAK_NEIGHBORHOOD_TIME = 8  # frames on each side
+PEAK_NEIGHBORHOOD_FREQ = 12  # bins on each side
+PEAK_MIN_DB = 10.0  # minimum height above the frame median
+PEAKS_PER_SECOND = 30  # strongest peaks kept, noise peaks fall below the cut
+
+# Hash parameters
+FAN_OUT = 5
+MAX_DELTA_FRAMES = 63
+
+FREQ_BITS = 10
+DELTA_BITS = 6
+
+# (hashes, anchor frame of each)
+Fingerprint = Tuple[np.ndarray, np.ndarray]
+
+
+def _spectrogram(samples: np.ndarray) -> np.ndarray:
+    """Compute a log-magnitude spectrogram of shape (frames, bins)"""
+    if len(samples) < FFT_SIZE:
+        return np.empty((0, 0), dtype=np.float32)
+
+    frames = np.lib.stride_tricks.sliding_window_view(samples, FFT_SIZE)[::HOP_SIZE]
+    window = np.hanning(FFT_SIZE).astype(np.float32)
+    spectrum = np.abs(np.fft.rfft(frames * window, axis=1))
+
+    max_bin = min(int(MAX_FREQ * FFT_SIZE / SAMPLE_RATE), (1 << FREQ_BITS) - 1)
+    return 20 * np.log10(spectrum[:, 1:max_bin + 1] + 1e-6).astype(np.float32)
+
+
+def _max_filter(values: np.ndarray, size: int, axis: int) -> np.ndarray:
+    """Running maximum along one axis with edge padding"""
+    pad = [(0, 0)] * values.ndim
+    pad[axis] = (size, size)
+    padded = np.pad(values, pad, mode='edge')
+    windows = np.lib.stride_tricks.sliding_window_view(padded, 2 * size + 1, axis=axis)
+    return windows.max(axis=-1)
+
+
+def find_peaks(spectrogram: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Return (frame, bin) coordinates of local spectral maxima sorted by time"""
+    if spectrogram.size == 0:
+        return np.empty(0, dtype=np.int32), np.empty(0, dtype=np.int32)
+
+    # A rectangular max filter is separable, so filter each axis in turn
+    local_max = _max_filter(spectrogram, PEAK_NEIGHBORHOOD_FREQ, axis=1)
+    local_max = _max_filter(local_max, PEAK_NEIGHBORHOOD_TIME, axis=0)
+
+    height = spectrogram - np.median(spectrogram, axis=1, keepdims=True)
+    frames, bins = np.nonzero((spectrogram == local_max) & (height > PEAK_MIN_DB))
+
+    # Keep only the strongest peaks, then restore time order
+    limit = int(PEAKS_PER_SECOND * len(spectrogram) * HOP_SIZE / SAMPLE_RATE) + 1
+    if len(frames) > limit:
+        strongest = np.argpartition(-height[frames, bins], limit)[:limit]
+        keep = np.sort(strongest)
+        frames, bins = frames[keep], bins[keep]
+    return frames.astype(np.int32), bins.astype(np.int32)
+
+
+def fingerprint(samples: np.ndarray) -> Fingerprint:
+    """Turn mono PCM into (hashes, offsets) arrays.
+
+    Each hash packs an anchor peak's frequency bin, a later peak's frequency
+    bin and the frame delta between them; the offset is the anchor frame.
+    """
+    samples = np.asarray(samples, dtype=np.float32)
+    frames, bins = find_peaks(_spectrogram(samples))
+
+    hashes = []
+    offsets = []
+    # Pair each anchor with the next FAN_OUT peaks in time order
+    for step in range(1, FAN_OUT + 1):
+        if len(frames) <= step:
+            break
+        anchor_t, target_t = frames[:-step], frames[step:]
+        anchor_f, target_f = bins[:-step], bins[step:]
+        delta = target_t - anchor_t
+        valid = (delta > 0) & (delta <= MAX_DELTA_FRAMES)
+
+        packed = (
+            (anchor_f[valid].astype(np.uint32) << (FREQ_BITS + DELTA_BITS))
+            | (target_f[valid].astype(np.uint32) << DELTA_BITS)
+            | delta[valid].astype(np.uint32)
+        )
+        hashes.append(packed)
+        offsets.append(anchor_t[valid].astype(np.uint32))
+
+    if not hashes:
+        return np.empty(0, dtype=np.uint32), np.empty(0, dtype=np.uint32)
+    return np.concatenate(hashes), np.concatenate(offsets)
+
+
+class FingerprintIndex:
+    """On-disk inverted index from fingerprint hash to (track, offset).
+
+    Entries are kept as parallel arrays sorted by hash, which makes both
+    lookups and saving a handful of vectorized NumPy operations. The arrays
+    are replaced, never modified in place, so a match only needs the lock to
+    take a consistent set of them.
+
+    Beyond `max_entries` hashes, the tracks least recently learned or matched
+    are dropped. Saves requested with schedule_save() are delayed by
+    `save_delay` seconds so that songs learned in a burst are written once.
+    """
+
+    def __init__(self, path: Optional[str] = None, max_entries: int = FINGERPRINT_MAX_ENTRIES,
+                 save_delay: float = FINGERPRINT_SAVE_DELAY):
+        self.path = path
+        self.max_entries = max_entries
+        self.save_delay = save_delay
+        self.tracks: List[dict] = []
+        self.track_ids = {}
+        # Per track: when it was last learned or matched, and where its next capture starts
+        self.last_used = np.empty(0, dtype=np.float64)
+        self.next_offsets = np.empty(0, dtype=np.int64)
+        self.hashes = np.empty(0, dtype=np.uint32)
+        self.entry_tracks = np.empty(0, dtype=np.uint32)
+        self.offsets = np.empty(0, dtype=np.uint32)
+        self._lock = threading.RLock()
+        self._dirty = False
+        self._save_timer: Optional[threading.Timer] = None
+
+    @classmethod
+    def load(cls, path: str, **kwargs) -> 'FingerprintIndex':
+        """Load an index from file, or start an empty one"""
+        index = cls(path, **kwargs)
+        if os.path.exists(path):
+            try:
+                with np.load(path, allow_pickle=False) as data:
+                    index.tracks = json.loads(str(data['tracks']))
+                    index.hashes = data['hashes']
+                    index.entry_tracks = data['entry_tracks']
+                    index.offsets = data['offsets']
+                    if 'last_used' in data:
+                        index.last_used = data['last_used']
+                        index.next_offsets = data['next_offsets']
+                    else:
+                        index._rebuild_track_state()
+                index.track_ids = {track['key']: i for i, track in enumerate(index.tracks)}
+            except Exception as e:
+                print(f"Error loading fingerprint index: {e}")
+                index = cls(path, **kwargs)
+        return index
+
+    def _rebuild_track_state(self):
+        """Track state of an index saved before it was stored"""
+        count = len(self.tracks)
+        self.last_used = np.zeros(count, dtype=np.float64)
+        ends = np.full(count, -1 - MAX_DELTA_FRAMES, dtype=np.int64)
+        np.maximum.at(ends, self.entry_tracks.astype(np.int64), self.offsets.astype(np.int64))
+        self.next_offsets = ends + MAX_DELTA_FRAMES + 1
+
+    def save(self):
+        """Write the index to file atomically"""
+        if not self.path:
+            return
+        tmp_path = f"{self.path}.tmp"
+        try:
+            with self._lock, open(tmp_path, 'wb') as f:
+                self._dirty = False
+                np.savez(
+                    f,
+                    tracks=np.array(json.dumps(self.tracks)),
+                    hashes=self.hashes,
+                    entry_tracks=self.entry_tracks,
+                    offsets=self.offsets,
+                    last_used=self.last_used,
+                    next_offsets=self.next_offsets
+                )
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            print(f"Error saving fingerprint index: {e}")
+
+    def schedule_save(self):
+        """Save within save_delay seconds, together with anything else learned meanwhile"""
+        with self._lock:
+            self._dirty = True
+            if self._save_timer is not None and self._save_timer.is_alive():
+                return
+            self._save_timer = threading.Timer(self.save_delay, self._save_if_dirty)
+            self._save_timer.daemon = True
+            self._save_timer.start()
+
+    def _save_if_dirty(self):
+        if self._dirty:
+            self.save()
+
+    def close(self):
+        """Write out a pending save"""
+        with self._lock:
+            timer, self._save_timer = self._save_timer, None
+        if timer is not None:
+            timer.cancel()
+        self._save_if_dirty()
+
+    def __len__(self) -> int:
+        return len(self.tracks)
+
+    def add(self, song: dict, samples: np.ndarray) -> int:
+        """Index a recognized capture under the song's key; returns hashes added"""
+        if not song.get('key'):
+            return 0
+        return self.add_fingerprint(song, *fingerprint(samples))
+
+    def add_fingerprint(self, song: dict, hashes: np.ndarray, offsets: np.ndarray) -> int:
+        """add() for a capture already fingerprinted"""
+        if not song.get('key') or len(hashes) == 0:
+            return 0
+
+        with self._lock:
+            return self._add_hashes(song, hashes, offsets)
+
+    def touch(self, key: str):
+        """Mark a track as used, so it is kept over ones not heard for longer"""
+        with self._lock:
+            track_id = self.track_ids.get(key)
+            if track_id is not None:
+                self.last_used[track_id] = time.time()
+
+    def _add_hashes(self, song: dict, hashes: np.ndarray, offsets: np.ndarray) -> int:
+        track_id = self.track_ids.get(song['key'])
+        if track_id is None:
+            track_id = len(self.tracks)
+            self.tracks.append({
+                'title': song['title'],
+                'artist': song['artist'],
+                'key': song['key']
+            })
+            self.track_ids[song['key']] = track_id
+            self.last_used = np.append(self.last_used, 0.0)
+            self.next_offsets = np.append(self.next_offsets, 0)
+
+        # Offsets of a new capture are shifted past anything already stored for
+        # the track so separate captures never alias onto each other
+        base = int(self.next_offsets[track_id])
+        self.next_offsets[track_id] = base + int(offsets.max()) + MAX_DELTA_FRAMES + 1
+        self.last_used[track_id] = time.time()
+
+        # Sort only the new run, then merge it in: O(n) instead of re-sorting n
+        order = np.argsort(hashes, kind='stable')
+        hashes = hashes[order]
+        positions = np.searchsorted(self.hashes, hashes, side='right')
+        self.hashes = np.insert(self.hashes, positions, hashes)
+        self.entry_tracks = np.insert(
+            self.entry_tracks, positions, np.full(len(hashes), track_id, dtype=np.uint32)
+        )
+        self.offsets = np.insert(self.offsets, positions, (offsets[order] + base).astype(np.uint32))
+        if len(self.hashes) > self.max_entries:
+            self._evict()
+        return len(hashes)
+
+    def _evict(self):
+        """Drop the least recently used tracks until at most max_entries hashes remain"""
+        sizes = np.bincount(self.entry_tracks, minlength=len(self.tracks))
+        oldest_first = np.argsort(self.last_used, kind='stable')
+        excess = len(self.hashes) - self.max_entries
+        dropped = oldest_first[:int(np.searchsorted(np.cumsum(sizes[oldest_first]), excess)) + 1]
+
+        kept_tracks = np.ones(len(self.tracks), dtype=bool)
+        kept_tracks[dropped] = False
+        new_ids = (np.cumsum(kept_tracks) - 1).astype(np.uint32)
+        kept = kept_tracks[self.entry_tracks]
+        # Filtering keeps the hash order
+        self.hashes = self.hashes[kept]
+        self.offsets = self.offsets[kept]
+        self.entry_tracks = new_ids[self.entry_tracks[kept]]
+        self.tracks = [track for track, keep in zip(self.tracks, kept_tracks) if keep]
+        self.last_used = self.last_used[kept_tracks]
+        self.next_offsets = self.next_offsets[kept_tracks]
+        self.track_ids = {track['key']: i for i, track in enumerate(self.tracks)}
+
+    def match(self, samples: np.ndarray) -> Optional[Tuple[dict, int]]:
+        """Find the best matching track for a capture.
+
+        Returns (song, score) where score is the number of hashes agreeing on
+        the same time alignment, or None if nothing was found.
+        """
+        if len(self.hashes) == 0:
+            return None
+        return self.match_fingerprint(*fingerprint(samples))
+
+    def match_fingerprint(self, query_hashes: np.ndarray,
+                          query_offsets: np.ndarray) -> Optional[Tuple[dict, int]]:
+        """match() for a capture already fingerprinted, e.g. in another process"""
+        with self._lock:
+            index_hashes, entry_tracks = self.hashes, self.entry_tracks
+            index_offsets, tracks_list = self.offsets, self.tracks
+        if len(index_hashes) == 0 or len(query_hashes) == 0:
+            return None
+
+        # Locate the block of index entries for every query hash
+        starts = np.searchsorted(index_hashes, query_hashes, side='left')
+        counts = np.searchsorted(index_hashes, query_hashes, side='right') - starts
+        if not counts.any():
+            return None
+
+        # Expand each query hash into one row per index entry it hits
+        query_rows = np.repeat(np.arange(len(query_hashes)), counts)
+        block_starts = np.repeat(starts, counts)
+        within = np.arange(len(query_rows)) - np.repeat(np.cumsum(counts) - counts, counts)
+        entries = block_starts + within
+
+        tracks = entry_tracks[entries].astype(np.int64)
+        deltas = index_offsets[entries].astype(np.int64) - query_offsets[query_rows].astype(np.int64)
+
+        # Votes for a (track, alignment) pair; the tallest bin wins
+        shift = int(deltas.min())
+        span = int(deltas.max()) - shift + 1
+        pair_ids, votes = np.unique(tracks * span + (deltas - shift), return_counts=True)
+        best = int(np.argmax(votes))
+        track_id = int(pair_ids[best] // span)
+        return dict(tracks_list[track_id]), int(votes[best])
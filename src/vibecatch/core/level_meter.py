@@ -0,0 +1,96 @@
+"""Live level, waveform and spectrum frames for the UI.
+
+The capture loops call LevelMeter.due() after every chunk, and compute a frame
+from the ring buffer only when one is due. So the UI gets METER_RATE
+updates per second, whatever the chunk rate. Each frame is a small dict of
+plain floats, all scaled to 0..1:
+
+- `level`: RMS of the last chunk's worth of audio on a dB scale
+- `peak`: peak of the waveform window
+- `waveform`: per-bucket peaks of the last METER_WINDOW seconds
+- `spectrum`: log-spaced band magnitudes of the last METER_FFT_SIZE samples
+"""
+import time
+from typing import Optional
+
+import numpy as np
+
+from .config import (
+    SAMPLE_RATE, CHUNK_SIZE, METER_RATE, METER_WINDOW, METER_WAVEFORM_POINTS, METER_FFT_SIZE,
+    METER_BANDS, METER_MIN_FREQ, METER_MAX_FREQ, METER_FLOOR_DB
+)
+
+FULL_SCALE = 32768.0
+
+
+class LevelMeter:
+    """Rate-limited meter frames computed from captured samples"""
+
+    def __init__(self, rate: float = METER_RATE, sample_rate: int = SAMPLE_RATE,
+                 window: float = METER_WINDOW, points: int = METER_WAVEFORM_POINTS,
+                 fft_size: int = METER_FFT_SIZE, bands: int = METER_BANDS,
+                 floor_db: float = METER_FLOOR_DB):
+        self.interval = 1.0 / rate
+        self.points = points
+        self.fft_size = fft_size
+        self.floor_db = floor_db
+        self.window = max(int(sample_rate * window) // points * points, fft_size)
+        self._next = 0.0
+        self._hann = np.hanning(fft_size).astype(np.float32)
+        # Scale so a full-scale sine reads 0 dB
+        self._fft_scale = 2.0 / (self._hann.sum() * FULL_SCALE)
+
+        # First FFT bin of each band; a band narrower than a bin gets one bin
+        freqs = np.fft.rfftfreq(fft_size, 1.0 / sample_rate)
+        edges = np.geomspace(METER_MIN_FREQ, min(METER_MAX_FREQ, sample_rate / 2), bands + 1)
+        self._band_starts = np.minimum(np.searchsorted(freqs, edges[:-1]), len(freqs) - 1)
+        self._band_end = max(int(np.searchsorted(freqs, edges[-1])), self._band_starts[-1] + 1)
+
+    def due(self, now: Optional[float] = None) -> bool:
+        """Whether the next frame should be sent; claims it when it should"""
+        now = time.monotonic() if now is None else now
+        if now < self._next:
+            return False
+        self._next += self.interval
+        if self._next <= now:
+            # Skip missed frames rather than bursting to catch up
+            self._next = now + self.interval
+        return True
+
+    def reset(self):
+        self._next = 0.0
+
+    def scale(self, amplitude: np.ndarray) -> np.ndarray:
+        """Linear amplitude (1.0 = full scale) to 0..1 on a dB scale"""
+        db = 20 * np.log10(np.maximum(amplitude, 1e-9))
+        return np.clip(1 - db / self.floor_db, 0.0, 1.0)
+
+    def measure(self, samples: np.ndarray) -> dict:
+        """Meter frame for the most recent samples (int16, oldest first)"""
+        samples = np.asarray(samples[-self.window:], dtype=np.float32)
+        if len(samples) == 0:
+            return {'level': 0.0, 'peak': 0.0, 'waveform': [], 'spectrum': []}
+
+        recent = samples[-CHUNK_SIZE:]
+        rms = float(np.sqrt(np.mean(np.square(recent)))) / FULL_SCALE
+
+        bucket = len(samples) // self.points
+        if bucket:
+            peaks = np.abs(samples[-bucket * self.points:]).reshape(self.points, bucket).max(axis=1)
+        else:
+            peaks = np.abs(samples)
+        peaks = peaks / FULL_SCALE
+
+        block = samples[-self.fft_size:]
+        if len(block) < self.fft_size:
+            block = np.pad(block, (self.fft_size - len(block), 0))
+        magnitude = np.abs(np.fft.rfft(block * self._hann)) * self._fft_scale
+        # Peak bin per band, so narrow tones are not averaged away in wide bands
+        spectrum = np.maximum.reduceat(magnitude[:self._band_end], self._band_starts)
+
+        return {
+            'level': float(self.scale(np.array([rms]))[0]),
+            'peak': float(self.scale(np.array([peaks.max()]))[0]),
+            'waveform': np.round(np.minimum(peaks, 1.0), 3).tolist(),
+            'spectrum': np.round(self.scale(spectrum), 3).tolist(),
+        }
@@ -0,0 +1,155 @@
+"""Timing spans and counters for the recognition pipeline.
+
+Code paths record into the process-wide REGISTRY:
+
+    with span('encode'):
+        wav = encode_wav(pcm)
+    increment('cache_hits')
+
+Spans keep a count, total, max and the most recent durations (for
+percentiles); counters only ever go up. The registry can be read as a dict
+or dumped as JSON or in the Prometheus text exposition format.
+"""
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Callable, Deque, Dict, Iterator, Optional
+
+from .config import METRICS_PREFIX, METRICS_SAMPLES
+
+QUANTILES = (0.5, 0.9, 0.99)
+
+
+class SpanStats:
+    """Durations observed for one span name"""
+
+    def __init__(self, samples: int = METRICS_SAMPLES):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.recent: Deque[float] = deque(maxlen=samples)
+
+    def observe(self, seconds: float):
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        self.recent.append(seconds)
+
+    def quantiles(self) -> Dict[float, float]:
+        """Quantiles over the most recent observations"""
+        ordered = sorted(self.recent)
+        if not ordered:
+            return {}
+        return {q: ordered[min(int(q * len(ordered)), len(ordered) - 1)] for q in QUANTILES}
+
+    def snapshot(self) -> dict:
+        quantiles = self.quantiles()
+        return {
+            'count': self.count,
+            'total_ms': round(self.total * 1000, 3),
+            'mean_ms': round(self.total / self.count * 1000, 3) if self.count else 0.0,
+            'max_ms': round(self.max * 1000, 3),
+            **{f'p{int(q * 100)}_ms': round(value * 1000, 3) for q, value in quantiles.items()},
+        }
+
+
+class MetricsRegistry:
+    """Thread-safe collection of spans and counters"""
+
+    def __init__(self, prefix: str = METRICS_PREFIX):
+        self.prefix = prefix
+        self.spans: Dict[str, SpanStats] = {}
+        self.counters: Dict[str, int] = {}
+        self.started = time.time()
+        self._lock = threading.Lock()
+
+    def observe(self, name: str, seconds: float):
+        """Record one duration for span `name`"""
+        with self._lock:
+            stats = self.spans.get(name)
+            if stats is None:
+                stats = self.spans[name] = SpanStats()
+            stats.observe(seconds)
+
+    @contextmanager
+    def span(self, name: str) -> Iterator[None]:
+        """Time the enclosed block, including when it raises"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start)
+
+    def increment(self, name: str, amount: int = 1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def reset(self):
+        with self._lock:
+            self.spans.clear()
+            self.counters.clear()
+            self.started = time.time()
+
+    def snapshot(self) -> dict:
+        """Spans and counters as plain data"""
+        with self._lock:
+            return {
+                'uptime_s': round(time.time() - self.started, 3),
+                'spans': {name: stats.snapshot() for name, stats in sorted(self.spans.items())},
+                'counters': dict(sorted(self.counters.items())),
+            }
+
+    def to_prometheus(self) -> str:
+        """Prometheus text exposition format"""
+        span_metric = f'{self.prefix}_span_seconds'
+        lines = [
+            f'# HELP {span_metric} Time spent in each recognition pipeline stage',
+            f'# TYPE {span_metric} summary',
+        ]
+        with self._lock:
+            for name, stats in sorted(self.spans.items()):
+                for q, value in stats.quantiles().items():
+                    lines.append(f'{span_metric}{{span="{name}",quantile="{q}"}} {value:.6f}')
+                lines.append(f'{span_metric}_sum{{span="{name}"}} {stats.total:.6f}')
+                lines.append(f'{span_metric}_count{{span="{name}"}} {stats.count}')
+            for name, value in sorted(self.counters.items()):
+                metric = f'{self.prefix}_{name}_total'
+                lines.append(f'# TYPE {metric} counter')
+                lines.append(f'{metric} {value}')
+        return '\n'.join(lines) + '\n'
+
+    def dump(self, path: str):
+        """Write JSON when `path` ends in .json, Prometheus text otherwise"""
+        if path.lower().endswith('.json'):
+            content = json.dumps(self.snapshot(), indent=2)
+        else:
+            content = self.to_prometheus()
+        # Replace atomically so a scraper never reads half a file
+        temp_path = f"{path}.tmp"
+        with open(temp_path, 'w') as f:
+            f.write(content)
+        os.replace(temp_path, path)
+
+
+REGISTRY = MetricsRegistry()
+span = REGISTRY.span
+observe = REGISTRY.observe
+increment = REGISTRY.increment
+
+
+def profile_call(func: Callable, path: Optional[str], *args, **kwargs):
+    """Run `func` under cProfile, save the stats to `path` and print the top entries"""
+    import cProfile
+    import pstats
+
+    profiler = cProfile.Profile()
+    try:
+        return profiler.runcall(func, *args, **kwargs)
+    finally:
+        if path:
+            profiler.dump_stats(path)
+            print(f"Profile written to {path} (open with: python -m pstats {path})")
+        pstats.Stats(profiler).sort_stats('cumulative').print_stats(25)
@@ -0,0 +1,118 @@
+"""Local stand-in for the Shazam recognition API.
+
+Answers uploads with a deterministic track picked from the clip's bytes after
+a configurable delay, so recognition latency and throughput can be measured
+without network access or API quota:
+
+    python -m vibecatch.core.mock_server --port 8765 --latency 0.3
+    VIBECATCH_SHAZAM_ENDPOINT=http://127.0.0.1:8765/shazam/recognize/ python -m vibecatch
+"""
+import argparse
+import io
+import json
+import threading
+import time
+import wave
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional, Tuple
+
+MOCK_TRACKS = [
+    {'title': 'Ready 2 Go', 'artist': 'Shermanology', 'key': '714164044'},
+    {'title': 'Mock Sunrise', 'artist': 'The Test Tones', 'key': 'mock-1'},
+    {'title': 'Offline Anthem', 'artist': 'Localhost', 'key': 'mock-2'},
+    {'title': 'Deterministic Blues', 'artist': 'CRC32', 'key': 'mock-3'},
+]
+
+
+def mock_track(pcm: bytes) -> dict:
+    """Pick a track for a clip; the same samples always give the same track"""
+    return dict(MOCK_TRACKS[zlib.crc32(pcm) % len(MOCK_TRACKS)])
+
+
+def wav_frames(audio: bytes) -> bytes:
+    """Return the PCM payload of a WAV upload, or the bytes as they are"""
+    if not audio.startswith(b'RIFF'):
+        return audio
+    try:
+        with wave.open(io.BytesIO(audio), 'rb') as wf:
+            return wf.readframes(wf.getnframes())
+    except wave.Error:
+        return audio
+
+
+def extract_upload(body: bytes, content_type: str) -> bytes:
+    """Pull the file part out of a multipart/form-data body"""
+    if 'boundary=' not in content_type:
+        return body
+    boundary = content_type.split('boundary=', 1)[1].strip('"').encode()
+    for part in body.split(b'--' + boundary):
+        headers, sep, content = part.partition(b'\r\n\r\n')
+        if sep and b'name="upload_file"' in headers:
+            return content[:-2] if content.endswith(b'\r\n') else content
+    return body
+
+
+class MockShazamHandler(BaseHTTPRequestHandler):
+    latency = 0.0
+    status = 200
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        audio = extract_upload(self.rfile.read(length), self.headers.get('Content-Type', ''))
+        time.sleep(self.latency)
+
+        if self.status == 200:
+            track = mock_track(wav_frames(audio))
+            body = json.dumps({'track': {
+                'title': track['title'],
+                'subtitle': track['artist'],
+                'key': track['key']
+            }}).encode()
+        else:
+            body = json.dumps({'error': 'mock failure'}).encode()
+
+        self.send_response(self.status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_mock_server(host: str = '127.0.0.1', port: int = 0, latency: float = 0.0,
+                      status: int = 200) -> Tuple[ThreadingHTTPServer, str]:
+    """Serve the mock API from a background thread; returns (server, endpoint URL)"""
+    handler = type('ConfiguredMockShazamHandler', (MockShazamHandler,), {
+        'latency': latency,
+        'status': status
+    })
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server, f"http://{host}:{server.server_port}/shazam/recognize/"
+
+
+def main(argv: Optional[list] = None):
+    """Run the mock API in the foreground"""
+    parser = argparse.ArgumentParser(description="Mock Shazam recognition API")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency', type=float, default=0.0, help="seconds per request")
+    parser.add_argument('--status', type=int, default=200, help="HTTP status to answer with")
+    args = parser.parse_args(argv)
+
+    server, endpoint = start_mock_server(args.host, args.port, args.latency, args.status)
+    print(f"Mock recognition API listening on {endpoint}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+"""Song change detection for continuous monitoring"""
+from typing import Optional
+
+from .config import MONITOR_CLEAR_AFTER
+
+
+class SongChangeDetector:
+    """Collapses a stream of per-window results into song change events.
+
+    Consecutive hits of the same track are reported once. After
+    `clear_after` windows in a row without a match the current song is
+    forgotten, so a track that comes back after a gap is reported again.
+    """
+
+    def __init__(self, clear_after: int = MONITOR_CLEAR_AFTER):
+        self.clear_after = clear_after
+        self.current: Optional[dict] = None
+        self.misses = 0
+
+    @staticmethod
+    def song_id(song: dict) -> tuple:
+        """Identity of a song; falls back to title/artist when there is no key"""
+        if song.get('key'):
+            return ('key', song['key'])
+        return ('name', song['title'].casefold(), song['artist'].casefold())
+
+    def update(self, song: Optional[dict]) -> bool:
+        """Feed one window's result; returns True when it is a new song"""
+        if not song:
+            self.misses += 1
+            if self.misses >= self.clear_after:
+                self.current = None
+            return False
+
+        self.misses = 0
+        if self.current is not None and self.song_id(self.current) == self.song_id(song):
+            return False
+        self.current = song
+        return True
+
+    def reset(self):
+        self.current = None
+        self.misses = 0
@@ -0,0 +1,262 @@
+"""Durable queue of captures taken while recognition was unreachable.
+
+A capture that could not be looked up (no network, API down, circuit open)
+is shrunk with prepare_upload, encoded as the exact WAV that would have been
+uploaded (about 160 KB for 5 seconds), and written to OFFLINE_QUEUE_DIR with
+a small JSON sidecar. The sidecar is written last and atomically, so a
+capture only counts as queued once it is complete on disk.
+
+OfflineReplayer drains the queue from a background thread: it retries the
+oldest capture with a growing back-off until the API answers, then replays
+the rest on a small thread pool. Recognized songs go into the playlist that
+was suggested for the capture when it was queued.
+"""
+import json
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Optional
+
+from .config import (
+    SAMPLE_RATE, OFFLINE_QUEUE_DIR, OFFLINE_QUEUE_MAX_ENTRIES, OFFLINE_REPLAY_WORKERS,
+    OFFLINE_RETRY_INTERVAL, OFFLINE_MAX_RETRY_INTERVAL
+)
+from .events import Signal
+from .metrics import increment
+from .playlist_store import atomic_write_json
+from .recognition_client import RecognitionUnavailable
+from .scheduler import BACKGROUND, request_priority
+
+
+def is_unavailable(error: Exception) -> bool:
+    """Whether a recognition error means the service could not be reached.
+
+    Other errors, a bad response or a broken capture, will not go away by
+    retrying the same capture later.
+    """
+    import requests
+
+    return isinstance(error, (RecognitionUnavailable, requests.ConnectionError, requests.Timeout))
+
+
+class OfflineQueue:
+    """Captures on disk, oldest first"""
+
+    def __init__(self, directory: str = OFFLINE_QUEUE_DIR,
+                 max_entries: int = OFFLINE_QUEUE_MAX_ENTRIES):
+        self.directory = directory
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+
+    def _path(self, entry_id: str, extension: str) -> str:
+        return os.path.join(self.directory, f"{entry_id}.{extension}")
+
+    def put(self, pcm: bytes, playlist: Optional[str] = None, vibe: Optional[dict] = None) -> str:
+        """Queue raw PCM at SAMPLE_RATE; returns the entry id"""
+        from .preprocess import prepare_upload
+        from .wav import encode_wav
+
+        upload = encode_wav(*prepare_upload(pcm))
+        created = time.time()
+        # Sortable by time, unique across processes
+        entry_id = f"{int(created * 1000):013d}-{uuid.uuid4().hex[:8]}"
+        with self._lock:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(self._path(entry_id, 'wav'), 'wb') as f:
+                f.write(upload)
+            atomic_write_json(self._path(entry_id, 'json'), {
+                'id': entry_id,
+                'created': created,
+                'playlist': playlist,
+                'vibe': vibe,
+                'attempts': 0,
+            })
+            self._trim()
+        increment('offline_queued')
+        return entry_id
+
+    def _trim(self):
+        """Drop the oldest captures beyond max_entries"""
+        ids = self._ids()
+        for entry_id in ids[:max(0, len(ids) - self.max_entries)]:
+            self._delete(entry_id)
+            increment('offline_dropped')
+
+    def _ids(self) -> List[str]:
+        if not os.path.isdir(self.directory):
+            return []
+        return sorted(name[:-5] for name in os.listdir(self.directory) if name.endswith('.json'))
+
+    def entries(self) -> List[dict]:
+        """Metadata of every complete capture, oldest first"""
+        entries = []
+        with self._lock:
+            for entry_id in self._ids():
+                try:
+                    with open(self._path(entry_id, 'json'), 'r') as f:
+                        entries.append(json.load(f))
+                except (OSError, ValueError) as e:
+                    print(f"Error reading queued capture {entry_id}: {e}")
+        return entries
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._ids())
+
+    def upload(self, entry: dict) -> bytes:
+        with open(self._path(entry['id'], 'wav'), 'rb') as f:
+            return f.read()
+
+    def update(self, entry: dict):
+        with self._lock:
+            if os.path.exists(self._path(entry['id'], 'json')):
+                atomic_write_json(self._path(entry['id'], 'json'), entry)
+
+    def _delete(self, entry_id: str):
+        # Sidecar first: without it a leftover WAV is never picked up
+        for extension in ('json', 'wav'):
+            try:
+                os.remove(self._path(entry_id, extension))
+            except FileNotFoundError:
+                pass
+
+    def remove(self, entry: dict):
+        with self._lock:
+            self._delete(entry['id'])
+
+    def clean(self):
+        """Remove WAV files whose sidecar never got written, and sidecars without a WAV"""
+        with self._lock:
+            if not os.path.isdir(self.directory):
+                return
+            names = set(os.listdir(self.directory))
+            for name in names:
+                entry_id, extension = os.path.splitext(name)
+                if extension == '.wav' and f"{entry_id}.json" not in names:
+                    os.remove(os.path.join(self.directory, name))
+                elif extension == '.json' and f"{entry_id}.wav" not in names:
+                    os.remove(os.path.join(self.directory, name))
+
+
+def replay_pcm(upload: bytes) -> bytes:
+    """SAMPLE_RATE PCM of a queued upload, for backends that match locally"""
+    import numpy as np
+
+    from .audio_file import decode_wav
+    from .preprocess import resample
+
+    pcm, rate = decode_wav(upload)
+    if rate == SAMPLE_RATE:
+        return pcm
+    samples = resample(np.frombuffer(pcm, dtype=np.int16), rate, SAMPLE_RATE)
+    return np.clip(samples, -32768, 32767).astype(np.int16).tobytes()
+
+
+class OfflineReplayer:
+    """Background thread that drains an OfflineQueue once recognition is back.
+
+    `add_song(song, playlist_id)` files each recognized song; `song_replayed`
+    is emitted with (song, entry) afterwards.
+    """
+
+    def __init__(self, queue: OfflineQueue, get_backend: Callable,
+                 add_song: Callable[[dict, str], bool],
+                 workers: int = OFFLINE_REPLAY_WORKERS,
+                 retry_interval: float = OFFLINE_RETRY_INTERVAL,
+                 max_retry_interval: float = OFFLINE_MAX_RETRY_INTERVAL):
+        self.queue = queue
+        self.get_backend = get_backend
+        self.add_song = add_song
+        self.workers = workers
+        self.retry_interval = retry_interval
+        self.max_retry_interval = max_retry_interval
+        self.song_replayed = Signal()
+        self.stats = {'replayed': 0, 'recognized': 0, 'unrecognized': 0}
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            self._wake.set()
+            return
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self.run, name='offline-replay', daemon=True)
+        self._thread.start()
+
+    def wake(self):
+        """Try again now, e.g. right after a capture was queued or went through"""
+        self._wake.set()
+
+    def stop(self, timeout: Optional[float] = None):
+        self._stopped.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def replay(self, entry: dict) -> bool:
+        """Recognize one queued capture; False while the service is unreachable"""
+        if self._stopped.is_set():
+            return False
+        try:
+            upload = self.queue.upload(entry)
+            with request_priority(BACKGROUND):
+                song = self.get_backend().recognize_upload(replay_pcm(upload), upload)
+        except FileNotFoundError:
+            # Removed by another replay, or the WAV went missing; nothing to retry
+            self.queue.remove(entry)
+            return True
+        except Exception as e:
+            if is_unavailable(e):
+                entry['attempts'] = entry.get('attempts', 0) + 1
+                self.queue.update(entry)
+                return False
+            # Anything else will not get better by retrying
+            print(f"Error replaying queued capture {entry['id']}: {e}")
+            song = None
+
+        self.stats['replayed'] += 1
+        if song:
+            self.stats['recognized'] += 1
+            if entry.get('playlist'):
+                self.add_song(song, entry['playlist'])
+            self.song_replayed.emit(song, entry)
+        else:
+            self.stats['unrecognized'] += 1
+        self.queue.remove(entry)
+        increment('offline_replayed')
+        return True
+
+    def drain(self) -> bool:
+        """Replay everything queued; False if the service became unreachable"""
+        entries = self.queue.entries()
+        if not entries:
+            return True
+        # The oldest capture doubles as the connectivity probe
+        if not self.replay(entries[0]):
+            return False
+        with ThreadPoolExecutor(max_workers=self.workers,
+                                thread_name_prefix='offline-replay') as executor:
+            results = list(executor.map(self.replay, entries[1:]))
+        return all(results)
+
+    def run(self):
+        self.queue.clean()
+        delay = self.retry_interval
+        while not self._stopped.is_set():
+            self._wake.clear()
+            try:
+                drained = self.drain()
+            except Exception as e:
+                print(f"Error replaying queued captures: {e}")
+                drained = False
+            if drained and not len(self.queue):
+                delay = self.retry_interval
+                # Nothing left; sleep until a capture gets queued
+                self._wake.wait()
+                continue
+            self._wake.wait(delay)
+            delay = min(delay * 2, self.max_retry_interval) if not drained else self.retry_interval
@@ -0,0 +1,118 @@
+"""Write-behind persistence for the playlist journal"""
+import json
+import os
+import queue
+import threading
+import time
+from typing import Callable, List, Optional
+
+from .config import PERSISTENCE_FLUSH_INTERVAL
+
+_APPEND = 'append'
+_COMPACT = 'compact'
+_FLUSH = 'flush'
+_STOP = 'stop'
+
+
+class WriteBehindWriter(threading.Thread):
+    """Background thread that owns all playlist file writes.
+
+    Journal entries are queued by the caller and written in batches: after
+    the first entry arrives the writer waits up to `flush_interval` for more,
+    then writes them with a single write and fsync. Compaction requests carry
+    a snapshot taken by the caller and replace any journal lines still queued
+    before them, since the snapshot already contains those songs.
+    """
+
+    def __init__(self, journal_path: str, write_snapshot: Callable[[dict], None],
+                 fsync: bool = True, flush_interval: float = PERSISTENCE_FLUSH_INTERVAL):
+        super().__init__(name='playlist-writer', daemon=True)
+        self.journal_path = journal_path
+        self.write_snapshot = write_snapshot
+        self.fsync = fsync
+        self.flush_interval = flush_interval
+        self.flushes = 0
+        self._queue: 'queue.Queue[tuple]' = queue.Queue()
+        self._journal = None
+
+    def append(self, entry: dict):
+        self._queue.put((_APPEND, entry))
+
+    def compact(self, snapshot: dict):
+        self._queue.put((_COMPACT, snapshot))
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Block until everything queued so far is on disk"""
+        done = threading.Event()
+        self._queue.put((_FLUSH, done))
+        return done.wait(timeout)
+
+    def close(self, timeout: Optional[float] = None):
+        """Write everything still queued and stop the thread"""
+        self._queue.put((_STOP, None))
+        self.join(timeout)
+
+    def run(self):
+        running = True
+        while running:
+            batch = [self._queue.get()]
+            # Coalesce whatever arrives shortly after the first item
+            deadline = time.monotonic() + self.flush_interval
+            while batch[-1][0] == _APPEND:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            running = self._process(batch)
+
+    def _process(self, batch: List[tuple]) -> bool:
+        lines = []
+        for op, payload in batch:
+            try:
+                if op == _APPEND:
+                    lines.append(json.dumps(payload) + '\n')
+                elif op == _COMPACT:
+                    lines = []
+                    self._compact(payload)
+                elif op == _FLUSH:
+                    self._write_lines(lines)
+                    lines = []
+                    payload.set()
+                elif op == _STOP:
+                    self._write_lines(lines)
+                    self._close_journal()
+                    return False
+            except Exception as e:
+                print(f"Error saving playlists: {e}")
+                if op == _FLUSH:
+                    payload.set()
+        try:
+            self._write_lines(lines)
+        except Exception as e:
+            print(f"Error saving playlists: {e}")
+        return True
+
+    def _write_lines(self, lines: List[str]):
+        if not lines:
+            return
+        if self._journal is None:
+            self._journal = open(self.journal_path, 'a')
+        self._journal.write(''.join(lines))
+        self._journal.flush()
+        if self.fsync:
+            os.fsync(self._journal.fileno())
+        self.flushes += 1
+
+    def _compact(self, snapshot: dict):
+        self.write_snapshot(snapshot)
+        self._close_journal()
+        if os.path.exists(self.journal_path):
+            os.remove(self.journal_path)
+
+    def _close_journal(self):
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
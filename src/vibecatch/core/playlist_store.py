@@ -0,0 +1,214 @@
+"""Indexed, incrementally persisted playlist storage.
+
+Playlists live in memory in a Catalog: each song once, playlists as arrays of
+track IDs, so duplicate checks and "which playlists contain this song" are
+O(1). Every add is appended to a journal file as one JSON line; the full snapshot in
+playlists.json is only rewritten when the journal is compacted. Snapshots are
+written to a temporary file and atomically renamed into place, and a torn
+last journal line from a crash is skipped on load. With write-behind enabled
+all file writes happen on a WriteBehindWriter thread, so adding a song never
+waits for the disk.
+"""
+import json
+import os
+import threading
+from array import array
+from typing import Dict, List, Optional, Tuple
+
+from .catalog import Catalog, Track
+from .config import (
+    PLAYLISTS_FILE, PLAYLISTS_JOURNAL_FILE, PLAYLIST_COMPACT_EVERY, PLAYLIST_FSYNC,
+    PLAYLIST_WRITE_BEHIND, VIBE_CATEGORIES
+)
+from .persistence import WriteBehindWriter
+
+
+def atomic_write_json(path: str, data, indent: Optional[int] = None):
+    """Write JSON to a temporary file, fsync it and rename it over `path`"""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(data, f, indent=indent)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+class PlaylistStore:
+    """Playlists with O(1) duplicate checks and an append-only journal"""
+
+    def __init__(self, path: str = PLAYLISTS_FILE, journal_path: str = PLAYLISTS_JOURNAL_FILE,
+                 compact_every: int = PLAYLIST_COMPACT_EVERY, fsync: bool = PLAYLIST_FSYNC,
+                 write_behind: bool = PLAYLIST_WRITE_BEHIND):
+        self.path = path
+        self.journal_path = journal_path
+        self.compact_every = compact_every
+        self.fsync = fsync
+        self.catalog = Catalog()
+        self._journal = None
+        self.journal_entries = 0
+        self.loaded = False
+        self.writer: Optional[WriteBehindWriter] = None
+        if write_behind:
+            self.writer = WriteBehindWriter(journal_path, self._write_snapshot, fsync)
+            self.writer.start()
+        self._lock = threading.RLock()
+
+    @property
+    def playlists(self) -> Dict[str, array]:
+        """Track IDs of every playlist"""
+        return self.catalog.playlists
+
+    def load(self) -> Dict[str, array]:
+        """Load the snapshot and replay the journal on top of it"""
+        with self._lock:
+            data = {}
+            if os.path.exists(self.path):
+                try:
+                    with open(self.path, 'r') as f:
+                        data = json.load(f)
+                except Exception as e:
+                    print(f"Error loading playlists: {e}")
+
+            self.catalog = Catalog()
+            legacy = False
+            try:
+                legacy = self.catalog.load_json(data) and bool(data)
+            except Exception as e:
+                print(f"Error loading playlists: {e}")
+            for playlist_id in VIBE_CATEGORIES:
+                self.catalog.add_playlist(playlist_id)
+
+            self.journal_entries = 0
+            entries, torn = self._read_journal()
+            for entry in entries:
+                if entry.get('op') == 'add':
+                    self.catalog.add(entry['song'], entry['playlist'])
+                    self.journal_entries += 1
+
+            # New entries must not be appended after a torn line, and a file
+            # in the old format is rewritten in the catalog format once
+            if torn or legacy:
+                try:
+                    self.compact()
+                except Exception as e:
+                    print(f"Error saving playlists: {e}")
+            self.loaded = True
+            return self.playlists
+
+    def ensure_loaded(self) -> Dict[str, array]:
+        """Load on first use"""
+        with self._lock:
+            if not self.loaded:
+                self.load()
+            return self.playlists
+
+    def _read_journal(self) -> Tuple[List[dict], bool]:
+        """Journal entries, and whether a torn write from a crash was found"""
+        entries = []
+        if not os.path.exists(self.journal_path):
+            return entries, False
+        with open(self.journal_path, 'r') as f:
+            for line in f:
+                try:
+                    entries.append(json.loads(line))
+                except ValueError:
+                    print("Skipping incomplete playlist journal entry")
+                    return entries, True
+        return entries, False
+
+    @property
+    def song_count(self) -> int:
+        return self.catalog.song_count
+
+    def contains(self, playlist_id: str, song: dict) -> bool:
+        """Check by track key or normalized title/artist"""
+        with self._lock:
+            return self.catalog.contains(playlist_id, song)
+
+    def playlists_of(self, song: dict) -> List[str]:
+        """Playlists that already contain a song"""
+        with self._lock:
+            return self.catalog.playlists_of(song)
+
+    def add(self, song: dict, playlist_id: str) -> bool:
+        """Add a song to a playlist; returns False for duplicates or unknown playlists"""
+        with self._lock:
+            if playlist_id not in self.playlists or not self.catalog.add(song, playlist_id):
+                return False
+            try:
+                song = {'title': song['title'], 'artist': song['artist'], 'key': song.get('key', '')}
+                entry = {'op': 'add', 'playlist': playlist_id, 'song': song}
+                if self.writer is not None:
+                    self.writer.append(entry)
+                    self.journal_entries += 1
+                else:
+                    self._append_journal(entry)
+                # Compact once the journal is a sizeable fraction of the
+                # snapshot, so rewrites stay amortized O(1) per add
+                if self.journal_entries >= max(self.compact_every, self.song_count // 2):
+                    self.compact()
+            except Exception as e:
+                print(f"Error saving playlists: {e}")
+            return True
+
+    def _append_journal(self, entry: dict):
+        if self._journal is None:
+            self._journal = open(self.journal_path, 'a')
+        self._journal.write(json.dumps(entry) + '\n')
+        self._journal.flush()
+        if self.fsync:
+            os.fsync(self._journal.fileno())
+        self.journal_entries += 1
+
+    def snapshot(self) -> Dict[str, List[dict]]:
+        """Every playlist as a list of song dicts"""
+        with self._lock:
+            return {
+                playlist_id: [track.to_dict() for track in self.catalog.songs(playlist_id)]
+                for playlist_id in self.playlists
+            }
+
+    def _write_snapshot(self, exported: dict):
+        atomic_write_json(self.path, Catalog.to_json(exported))
+
+    def compact(self):
+        """Fold the journal into a fresh snapshot"""
+        with self._lock:
+            if self.writer is not None:
+                # Serialized on the writer thread from a copy of the ID arrays
+                self.writer.compact(self.catalog.export())
+                self.journal_entries = 0
+                return
+            self._write_snapshot(self.catalog.export())
+            if self._journal is not None:
+                self._journal.close()
+                self._journal = None
+            if os.path.exists(self.journal_path):
+                os.remove(self.journal_path)
+            self.journal_entries = 0
+
+    def get(self, playlist_id: str) -> List[Track]:
+        """Get songs from a playlist"""
+        with self._lock:
+            return self.catalog.songs(playlist_id)
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until every add so far is on disk"""
+        if self.writer is not None:
+            return self.writer.flush(timeout)
+        return True
+
+    def close(self):
+        """Compact any pending journal entries and stop the writer"""
+        with self._lock:
+            if self.journal_entries:
+                try:
+                    self.compact()
+                except Exception as e:
+                    print(f"Error saving playlists: {e}")
+            if self.writer is not None:
+                self.writer.close()
+                self.writer = None
+            if self._journal is not None:
+                self._journal.close()
+                self._journal = None
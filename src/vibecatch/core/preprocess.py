@@ -0,0 +1,65 @@
+"""Upload preprocessing: resample, pick the loudest segment, fit the size cap"""
+from typing import Optional, Tuple
+
+import numpy as np
+
+from .config import (
+    SAMPLE_RATE, BIT_DEPTH, MAX_FILE_SIZE, UPLOAD_SAMPLE_RATE, UPLOAD_MAX_SECONDS,
+    UPLOAD_PEAK_LEVEL
+)
+
+WAV_HEADER_SIZE = 44
+
+
+def resample(samples: np.ndarray, src_rate: int, dst_rate: int) -> np.ndarray:
+    """Band-limited resampling by truncating or zero-padding the spectrum"""
+    if src_rate == dst_rate or len(samples) == 0:
+        return np.asarray(samples, dtype=np.float32)
+    n_out = int(round(len(samples) * dst_rate / src_rate))
+    spectrum = np.fft.rfft(np.asarray(samples, dtype=np.float32))
+    out = np.fft.irfft(spectrum[:n_out // 2 + 1], n_out)
+    return (out * (n_out / len(samples))).astype(np.float32)
+
+
+def loudest_segment(samples: np.ndarray, length: int) -> np.ndarray:
+    """The `length`-sample window with the most energy"""
+    if len(samples) <= length:
+        return samples
+    energy = np.concatenate([[0.0], np.cumsum(np.square(samples, dtype=np.float64))])
+    window_energy = energy[length:] - energy[:-length]
+    start = int(np.argmax(window_energy))
+    return samples[start:start + length]
+
+
+def normalize(samples: np.ndarray, peak: float = UPLOAD_PEAK_LEVEL) -> np.ndarray:
+    """Scale so the loudest sample sits at `peak` of full scale"""
+    loudest = float(np.max(np.abs(samples))) if len(samples) else 0.0
+    if loudest == 0:
+        return samples
+    return samples * (peak * 32767 / loudest)
+
+
+def max_upload_samples(rate: int, max_bytes: int = MAX_FILE_SIZE,
+                       max_seconds: Optional[float] = UPLOAD_MAX_SECONDS) -> int:
+    """Largest clip, in samples, that fits the byte budget and duration cap"""
+    limit = (max_bytes - WAV_HEADER_SIZE) // (BIT_DEPTH // 8)
+    if max_seconds:
+        limit = min(limit, int(rate * max_seconds))
+    return limit
+
+
+def prepare_upload(pcm: bytes, rate: int = SAMPLE_RATE,
+                   target_rate: Optional[int] = UPLOAD_SAMPLE_RATE,
+                   max_bytes: int = MAX_FILE_SIZE) -> Tuple[bytes, int]:
+    """Shrink a capture for upload; returns (16-bit PCM, sample rate).
+
+    The clip is resampled to `target_rate`, cut down to its loudest segment
+    that fits both UPLOAD_MAX_SECONDS and the `max_bytes` WAV size cap, and
+    peak-normalized.
+    """
+    samples = np.frombuffer(pcm, dtype=np.int16)
+    out_rate = target_rate or rate
+    samples = resample(samples, rate, out_rate)
+    samples = loudest_segment(samples, max_upload_samples(out_rate, max_bytes))
+    samples = normalize(samples)
+    return np.clip(np.round(samples), -32768, 32767).astype(np.int16).tobytes(), out_rate
@@ -0,0 +1,175 @@
+"""HTTP client for the Shazam recognition API"""
+import threading
+import time
+from typing import TYPE_CHECKING, Optional
+
+from .config import (
+    SHAZAM_API_KEY, SHAZAM_API_HOST, SHAZAM_API_ENDPOINT,
+    API_CONNECT_TIMEOUT, API_READ_TIMEOUT, API_MAX_RETRIES, API_BACKOFF_FACTOR,
+    API_MAX_BACKOFF, API_POOL_SIZE, API_BREAKER_THRESHOLD, API_BREAKER_RESET
+)
+from .metrics import increment, observe, span
+from .scheduler import RecognitionScheduler, get_scheduler
+
+if TYPE_CHECKING:
+    import requests
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class RecognitionUnavailable(Exception):
+    """The recognition service could not be reached or kept failing"""
+
+
+class CircuitBreaker:
+    """Stops calling a failing service until a cool-down has passed.
+
+    After `failure_threshold` consecutive failures the circuit opens and
+    requests are refused for `reset_timeout` seconds. The first request after
+    that is let through as a trial: success closes the circuit again, failure
+    re-opens it.
+    """
+
+    def __init__(self, failure_threshold: int = API_BREAKER_THRESHOLD,
+                 reset_timeout: float = API_BREAKER_RESET):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self._lock = threading.Lock()
+
+    @property
+    def is_open(self) -> bool:
+        with self._lock:
+            return self.opened_at is not None
+
+    def allow_request(self) -> bool:
+        """Check whether a request may be sent now"""
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if time.monotonic() - self.opened_at >= self.reset_timeout:
+                # Half-open: let one trial request through
+                self.opened_at = time.monotonic()
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+
+
+class RecognitionClient:
+    """Shazam API client with a pooled keep-alive session.
+
+    Requests use connect/read timeouts, are retried with exponential backoff
+    on connection errors, 429 and 5xx responses, and go through a circuit
+    breaker so a dead API fails fast instead of stalling every capture.
+    Every attempt first waits for the host-wide quota held by `scheduler`.
+    """
+
+    def __init__(self, endpoint: str = SHAZAM_API_ENDPOINT, host: str = SHAZAM_API_HOST,
+                 api_key: str = SHAZAM_API_KEY,
+                 connect_timeout: float = API_CONNECT_TIMEOUT,
+                 read_timeout: float = API_READ_TIMEOUT,
+                 max_retries: int = API_MAX_RETRIES,
+                 backoff_factor: float = API_BACKOFF_FACTOR,
+                 breaker: Optional[CircuitBreaker] = None,
+                 scheduler: Optional[RecognitionScheduler] = None,
+                 use_scheduler: bool = True):
+        self.endpoint = endpoint
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.breaker = breaker or CircuitBreaker()
+        self.scheduler = (scheduler or get_scheduler()) if use_scheduler else None
+        self.headers = {
+            'x-rapidapi-key': api_key,
+            'x-rapidapi-host': host
+        }
+        self._session = None
+        self._session_lock = threading.Lock()
+
+    @property
+    def session(self) -> 'requests.Session':
+        """Pooled session, created (and requests imported) on first upload"""
+        with self._session_lock:
+            if self._session is None:
+                import requests
+                from requests.adapters import HTTPAdapter
+
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=API_POOL_SIZE)
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                session.headers.update(self.headers)
+                self._session = session
+            return self._session
+
+    def backoff_delay(self, attempt: int, response: Optional['requests.Response'] = None) -> float:
+        """Seconds to wait before retry number `attempt` (0-based)"""
+        if response is not None:
+            retry_after = response.headers.get('Retry-After', '')
+            if retry_after.isdigit():
+                return min(float(retry_after), API_MAX_BACKOFF)
+        return min(self.backoff_factor * (2 ** attempt), API_MAX_BACKOFF)
+
+    def recognize(self, wav_data: bytes) -> Optional[dict]:
+        """Upload a WAV clip and return the decoded JSON response.
+
+        Returns None when the API answered but could not recognize the clip,
+        and raises RecognitionUnavailable when it could not be reached.
+        """
+        import requests
+
+        if not self.breaker.allow_request():
+            raise RecognitionUnavailable("Recognition API circuit is open")
+
+        last_error = None
+        for attempt in range(self.max_retries + 1):
+            response = None
+            if attempt:
+                increment('api_retries')
+            if self.scheduler is not None and not self.scheduler.acquire():
+                raise RecognitionUnavailable("Recognition API quota exhausted")
+            try:
+                with span('upload'):
+                    response = self.session.post(
+                        self.endpoint,
+                        files={'upload_file': ('recording.wav', wav_data, 'audio/wav')},
+                        timeout=self.timeout
+                    )
+                # From sending the request until the response headers arrived
+                observe('api_latency', response.elapsed.total_seconds())
+                if self.scheduler is not None:
+                    self.scheduler.observe_response(response.status_code, response.headers)
+                if response.status_code not in RETRY_STATUSES:
+                    self.breaker.record_success()
+                    if response.status_code == 200:
+                        with span('parse'):
+                            return response.json()
+                    print(f"API Response: {response.text}")
+                    return None
+                last_error = f"HTTP {response.status_code}"
+            except (requests.ConnectionError, requests.Timeout) as e:
+                last_error = str(e)
+
+            if attempt < self.max_retries:
+                time.sleep(self.backoff_delay(attempt, response))
+
+        self.breaker.record_failure()
+        increment('api_failures')
+        raise RecognitionUnavailable(f"Recognition API failed: {last_error}")
+
+    def close(self):
+        """Close pooled connections"""
+        if self._session is not None:
+            self._session.close()
+            self._session = None
@@ -0,0 +1,226 @@
+"""Persistent cache of recognition results keyed by an acoustic signature.
+
+A capture's signature is its fingerprint hashes (spread by a multiplicative
+mix) with the anchor frame of each. A cached entry keeps the bottom-k of
+them, a MinHash sample that captures of the same passage share even when
+they were cut at different points. A lookup checks every hash of the new
+capture against those samples. A candidate only counts as a hit when enough
+of its matches agree on one time offset between the two captures, as in
+FingerprintIndex.match, so a few hashes shared by chance with an unrelated
+song are not enough.
+
+Entries are appended to the cache file as JSON lines; the file is rewritten
+without evicted or expired entries once it has grown to twice the cache.
+"""
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .config import (
+    RESULT_CACHE_FILE, RESULT_CACHE_MAX_ENTRIES, RESULT_CACHE_TTL,
+    RESULT_CACHE_SIGNATURE_SIZE, RESULT_CACHE_MIN_VOTES
+)
+from .fingerprint import fingerprint
+
+# (sorted hash values, anchor frame of each)
+Signature = Tuple[np.ndarray, np.ndarray]
+
+# Frames two matches may disagree by and still count as one alignment
+ALIGNMENT_TOLERANCE = 1
+
+
+def signature_from_fingerprint(hashes: np.ndarray, offsets: np.ndarray) -> Signature:
+    """Signature of already computed fingerprint hashes"""
+    if len(hashes) == 0:
+        return np.empty(0, dtype=np.uint64), np.empty(0, dtype=np.int64)
+    # Spread the packed hashes so the smallest values are a fair sample
+    mixed = (hashes.astype(np.uint64) * np.uint64(2654435761)) & np.uint64(0xffffffff)
+    values, first = np.unique(mixed, return_index=True)
+    return values, offsets[first].astype(np.int64)
+
+
+def acoustic_signature(pcm: bytes) -> Signature:
+    """Mixed fingerprint hashes of a clip, sorted, with their anchor frames"""
+    return signature_from_fingerprint(*fingerprint(np.frombuffer(pcm, dtype=np.int16)))
+
+
+class ResultCache:
+    """LRU + TTL cache from acoustic signature to song dict"""
+
+    def __init__(self, path: Optional[str] = RESULT_CACHE_FILE,
+                 max_entries: int = RESULT_CACHE_MAX_ENTRIES, ttl: float = RESULT_CACHE_TTL,
+                 size: int = RESULT_CACHE_SIGNATURE_SIZE, min_votes: int = RESULT_CACHE_MIN_VOTES):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.size = size
+        self.min_votes = min_votes
+        self.hits = 0
+        self.misses = 0
+        self.entries: 'OrderedDict[int, dict]' = OrderedDict()
+        # Signature value -> (entry id, anchor frame) of every entry holding it
+        self.lookup: Dict[int, List[Tuple[int, int]]] = {}
+        self.next_id = 0
+        self.log_lines = 0
+        self._log = None
+        self._lock = threading.Lock()
+        self.load()
+
+    def load(self):
+        """Load unexpired entries from file"""
+        if not self.path or not os.path.exists(self.path):
+            return
+        now = time.time()
+        stale = False
+        try:
+            with open(self.path, 'r') as f:
+                for line in f:
+                    self.log_lines += 1
+                    try:
+                        entry = json.loads(line)
+                        pairs = entry['signature']
+                        values = [int(value) for value, _ in pairs]
+                        offsets = [int(offset) for _, offset in pairs]
+                        stored = float(entry['time'])
+                        song = dict(entry['song'])
+                    except (ValueError, KeyError, TypeError):
+                        # Torn or hand-edited line, or a file from before
+                        # signatures had offsets
+                        stale = True
+                        continue
+                    if now - stored < self.ttl:
+                        self._insert(values, offsets, song, stored)
+        except OSError as e:
+            print(f"Error loading result cache: {e}")
+            return
+        if stale or self.log_lines > 2 * max(len(self.entries), 1):
+            self.compact()
+
+    def compact(self):
+        """Rewrite the cache file with just the live entries"""
+        if not self.path:
+            return
+        if self._log is not None:
+            self._log.close()
+            self._log = None
+        tmp_path = f"{self.path}.tmp"
+        try:
+            with open(tmp_path, 'w') as f:
+                for entry in self.entries.values():
+                    f.write(self._line(entry))
+            os.replace(tmp_path, self.path)
+            self.log_lines = len(self.entries)
+        except Exception as e:
+            print(f"Error saving result cache: {e}")
+
+    @staticmethod
+    def _line(entry: dict) -> str:
+        return json.dumps({
+            'signature': [list(pair) for pair in zip(entry['values'], entry['offsets'])],
+            'song': entry['song'],
+            'time': entry['time'],
+        }) + '\n'
+
+    def _append(self, entry: dict):
+        if not self.path:
+            return
+        try:
+            if self._log is None:
+                self._log = open(self.path, 'a')
+            self._log.write(self._line(entry))
+            self._log.flush()
+            self.log_lines += 1
+        except Exception as e:
+            print(f"Error saving result cache: {e}")
+        if self.log_lines > 2 * self.max_entries:
+            self.compact()
+
+    def _insert(self, values: List[int], offsets: List[int], song: dict, timestamp: float) -> dict:
+        entry_id = self.next_id
+        self.next_id += 1
+        entry = {'values': values, 'offsets': offsets, 'song': song, 'time': timestamp}
+        self.entries[entry_id] = entry
+        for value, offset in zip(values, offsets):
+            self.lookup.setdefault(value, []).append((entry_id, offset))
+        while len(self.entries) > self.max_entries:
+            self._remove(next(iter(self.entries)))
+        return entry
+
+    def _remove(self, entry_id: int):
+        entry = self.entries.pop(entry_id)
+        for value in entry['values']:
+            matches = [match for match in self.lookup.get(value, ()) if match[0] != entry_id]
+            if matches:
+                self.lookup[value] = matches
+            else:
+                self.lookup.pop(value, None)
+
+    def _best_candidate(self, signature: Signature) -> Optional[Tuple[int, int]]:
+        """(entry id, aligned matches) of the entry agreeing best with a signature"""
+        deltas: Dict[int, List[int]] = {}
+        lookup = self.lookup
+        for value, offset in zip(signature[0].tolist(), signature[1].tolist()):
+            for entry_id, entry_offset in lookup.get(value, ()):
+                deltas.setdefault(entry_id, []).append(entry_offset - offset)
+
+        best = None
+        for entry_id, entry_deltas in deltas.items():
+            if len(entry_deltas) < self.min_votes:
+                continue
+            # Largest group of matches within ALIGNMENT_TOLERANCE frames of each other
+            ordered = np.sort(entry_deltas)
+            ends = np.searchsorted(ordered, ordered + 2 * ALIGNMENT_TOLERANCE, side='right')
+            score = int((ends - np.arange(len(ordered))).max())
+            if best is None or score > best[1]:
+                best = (entry_id, score)
+        return best
+
+    def get(self, signature: Signature) -> Optional[dict]:
+        """Return the cached song for a signature, counting the hit or miss"""
+        with self._lock:
+            candidate = self._best_candidate(signature)
+            if candidate is not None and candidate[1] >= self.min_votes:
+                entry_id = candidate[0]
+                entry = self.entries[entry_id]
+                if time.time() - entry['time'] < self.ttl:
+                    self.entries.move_to_end(entry_id)
+                    self.hits += 1
+                    return dict(entry['song'])
+                self._remove(entry_id)
+
+            self.misses += 1
+            return None
+
+    def put(self, signature: Signature, song: dict):
+        """Cache a recognition result and append it to the cache file"""
+        values, offsets = signature
+        if len(values) < self.min_votes:
+            return
+        # Bottom-k: the values are sorted, so the first ones are the smallest
+        values = values[:self.size].tolist()
+        offsets = offsets[:self.size].tolist()
+        with self._lock:
+            entry = self._insert(values, offsets, dict(song), time.time())
+            self._append(entry)
+
+    def close(self):
+        with self._lock:
+            if self._log is not None:
+                self._log.close()
+                self._log = None
+
+    def stats(self) -> dict:
+        """Hit/miss counters for measuring saved API calls"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'entries': len(self.entries)
+            }
@@ -0,0 +1,67 @@
+"""Preallocated NumPy ring buffer for captured audio"""
+import threading
+from typing import Optional, Tuple
+
+import numpy as np
+
+
+class RingBuffer:
+    """Fixed-size int16 ring buffer with zero-copy reads.
+
+    Every sample is stored twice, at i and i + capacity, so the most recent
+    `n <= capacity` samples are always one contiguous slice and can be handed
+    out as a view without copying. Positions are absolute frame counts since
+    the buffer was created, which lets readers tell how much they missed.
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.data = np.zeros(2 * capacity, dtype=np.int16)
+        self.written = 0
+        self._cond = threading.Condition()
+
+    def write(self, samples: np.ndarray):
+        """Append samples, overwriting the oldest ones once full"""
+        total = len(samples)
+        samples = samples[-self.capacity:]
+        n = len(samples)
+        with self._cond:
+            start = (self.written + total - n) % self.capacity
+            first = min(n, self.capacity - start)
+            # Primary copy, wrapping at capacity
+            self.data[start:start + first] = samples[:first]
+            self.data[:n - first] = samples[first:]
+            # Mirror copy, so reads never have to wrap
+            self.data[self.capacity + start:self.capacity + start + first] = samples[:first]
+            self.data[self.capacity:self.capacity + n - first] = samples[first:]
+            self.written += total
+            self._cond.notify_all()
+
+    def latest(self, n: int) -> np.ndarray:
+        """View of the most recent `n` samples (fewer if not yet written).
+
+        The view aliases the buffer; copy it if it must outlive the next
+        `capacity` samples of capture.
+        """
+        with self._cond:
+            n = min(n, self.written, self.capacity)
+            end = self.written % self.capacity + self.capacity
+            return self.data[end - n:end]
+
+    def since(self, position: int) -> Tuple[np.ndarray, int, int]:
+        """Samples written after `position`.
+
+        Returns (view, new position, dropped) where `dropped` counts samples
+        that were overwritten before this reader got to them.
+        """
+        with self._cond:
+            available = self.written - position
+            dropped = max(0, available - self.capacity)
+            view = self.latest(available - dropped) if available > 0 else self.data[:0]
+            return view, self.written, dropped
+
+    def wait(self, position: int, timeout: Optional[float] = None) -> int:
+        """Block until more than `position` samples were written; returns the write position"""
+        with self._cond:
+            self._cond.wait_for(lambda: self.written > position, timeout)
+            return self.written
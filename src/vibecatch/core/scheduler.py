@@ -0,0 +1,261 @@
+"""Quota-aware scheduling of recognition API calls.
+
+Every VibeCatch process on a host draws from one token bucket kept in a small
+state file (SCHEDULER_STATE_FILE) under an exclusive file lock, so the GUI,
+batch runs and `listen` together stay inside the API plan's rate limit.
+
+Callers waiting for a token are served by priority: user-initiated lookups
+(USER, the default) go ahead of monitoring, batch and multi-device capture
+(BACKGROUND), which mark themselves with:
+
+    with request_priority(BACKGROUND):
+        backend.recognize(pcm)
+
+Rate-limit response headers adjust the shared refill rate, so the remaining
+quota is spread over the time left in the provider's window, and a 429 with
+Retry-After pauses every process until the provider accepts calls again.
+"""
+import contextvars
+import heapq
+import itertools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Mapping, Optional, Tuple, TypeVar
+
+from .config import (
+    SCHEDULER_ENABLED, SCHEDULER_STATE_FILE, SCHEDULER_RATE, SCHEDULER_BURST,
+    SCHEDULER_MIN_RATE, SCHEDULER_MAX_WAIT
+)
+from .metrics import increment, observe
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+USER = 0
+BACKGROUND = 1
+
+# Header names used by RapidAPI and the common X-RateLimit-* variants
+REMAINING_HEADERS = ('x-ratelimit-requests-remaining', 'x-ratelimit-remaining')
+RESET_HEADERS = ('x-ratelimit-requests-reset', 'x-ratelimit-reset')
+
+_priority: contextvars.ContextVar = contextvars.ContextVar('vibecatch_priority', default=USER)
+
+T = TypeVar('T')
+
+
+@contextmanager
+def request_priority(priority: int) -> Iterator[None]:
+    """Run the enclosed recognition calls at `priority`"""
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+class SharedTokenBucket:
+    """Token bucket whose state lives in a file shared by every process"""
+
+    def __init__(self, path: str = SCHEDULER_STATE_FILE, rate: float = SCHEDULER_RATE,
+                 capacity: float = SCHEDULER_BURST, min_rate: float = SCHEDULER_MIN_RATE):
+        self.path = path
+        self.base_rate = rate
+        self.capacity = capacity
+        self.min_rate = min_rate
+        self._file = None
+        self._lock = threading.Lock()
+
+    def _lock_file(self):
+        if self._file is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._file = open(self.path, 'a+')
+        self._file.seek(0)
+        if fcntl is not None:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_EX)
+        else:
+            msvcrt.locking(self._file.fileno(), msvcrt.LK_LOCK, 1)
+
+    def _unlock_file(self):
+        self._file.seek(0)
+        if fcntl is not None:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+        else:
+            msvcrt.locking(self._file.fileno(), msvcrt.LK_UNLCK, 1)
+
+    def _fresh_state(self, now: float) -> dict:
+        return {
+            'tokens': self.capacity, 'updated': now, 'rate': self.base_rate, 'blocked_until': 0.0
+        }
+
+    def _update(self, change: Callable[[dict, float], T]) -> T:
+        """Refill, apply `change` and write back, all under the file lock"""
+        with self._lock:
+            self._lock_file()
+            try:
+                now = time.time()
+                self._file.seek(0)
+                try:
+                    state = json.loads(self._file.read() or 'null') or self._fresh_state(now)
+                except ValueError:
+                    # Torn write from a crashed process: start over with a full bucket
+                    state = self._fresh_state(now)
+                elapsed = max(0.0, now - state['updated'])
+                state['tokens'] = min(self.capacity, state['tokens'] + elapsed * state['rate'])
+                state['updated'] = now
+                result = change(state, now)
+                self._file.seek(0)
+                self._file.truncate()
+                self._file.write(json.dumps(state))
+                self._file.flush()
+                return result
+            finally:
+                self._unlock_file()
+
+    def try_acquire(self) -> float:
+        """Take a token; returns 0, or the seconds until one will be available"""
+        def take(state: dict, now: float) -> float:
+            if state['blocked_until'] > now:
+                return state['blocked_until'] - now
+            if state['tokens'] >= 1:
+                state['tokens'] -= 1
+                return 0.0
+            return (1 - state['tokens']) / state['rate']
+        return self._update(take)
+
+    def set_rate(self, rate: float):
+        """Change the refill rate for every process, within [min_rate, base rate]"""
+        rate = min(self.base_rate, max(self.min_rate, rate))
+
+        def apply(state: dict, now: float):
+            state['rate'] = rate
+        self._update(apply)
+
+    def block(self, seconds: float):
+        """Hand out no tokens for `seconds`, in any process, then allow one trial call"""
+        def apply(state: dict, now: float):
+            state['tokens'] = 1.0
+            state['blocked_until'] = max(state['blocked_until'], now + seconds)
+        self._update(apply)
+
+    def state(self) -> dict:
+        return self._update(lambda state, now: dict(state))
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+def _header(headers: Mapping[str, str], names: Tuple[str, ...]) -> Optional[float]:
+    for name in names:
+        value = headers.get(name)
+        if value is not None:
+            try:
+                return float(value)
+            except ValueError:
+                return None
+    return None
+
+
+class RecognitionScheduler:
+    """Hands out the shared quota to waiting callers, highest priority first"""
+
+    def __init__(self, bucket: Optional[SharedTokenBucket] = None,
+                 max_wait: float = SCHEDULER_MAX_WAIT):
+        self.bucket = bucket or SharedTokenBucket()
+        self.max_wait = max_wait
+        self.granted = {USER: 0, BACKGROUND: 0}
+        self.timeouts = 0
+        self._waiting: List[Tuple[int, int]] = []
+        self._counter = itertools.count()
+        self._cond = threading.Condition()
+
+    def acquire(self, priority: Optional[int] = None, timeout: Optional[float] = None) -> bool:
+        """Wait for a token; False if none came within `timeout` seconds"""
+        priority = _priority.get() if priority is None else priority
+        timeout = self.max_wait if timeout is None else timeout
+        entry = (priority, next(self._counter))
+        start = time.monotonic()
+        with self._cond:
+            heapq.heappush(self._waiting, entry)
+            # A higher-priority caller may now be first in line
+            self._cond.notify_all()
+            try:
+                while True:
+                    if self._waiting[0] is entry:
+                        wait = self.bucket.try_acquire()
+                        if wait == 0:
+                            self.granted[priority] = self.granted.get(priority, 0) + 1
+                            return True
+                    else:
+                        # Woken when the head is served or gives up
+                        wait = timeout
+                    remaining = timeout - (time.monotonic() - start)
+                    if remaining <= 0:
+                        self.timeouts += 1
+                        return False
+                    self._cond.wait(min(wait, remaining))
+            finally:
+                self._waiting.remove(entry)
+                heapq.heapify(self._waiting)
+                self._cond.notify_all()
+                waited = time.monotonic() - start
+                if waited > 0.001:
+                    increment('quota_waits')
+                observe('quota_wait', waited)
+
+    def observe_response(self, status: int, headers: Mapping[str, str]):
+        """Adapt the shared rate to the provider's rate-limit headers"""
+        headers = {name.lower(): value for name, value in headers.items()}
+        if status == 429:
+            retry_after = _header(headers, ('retry-after',))
+            self.bucket.block(retry_after if retry_after is not None else 1 / self.bucket.min_rate)
+            increment('quota_throttled')
+            return
+
+        remaining = _header(headers, REMAINING_HEADERS)
+        reset = _header(headers, RESET_HEADERS)
+        if remaining is None or reset is None:
+            return
+        # Some providers send an epoch timestamp, others seconds from now
+        if reset > 1e9:
+            reset -= time.time()
+        if remaining <= 0:
+            self.bucket.block(max(reset, 1.0))
+            return
+        self.bucket.set_rate(remaining / max(reset, 1.0))
+
+    def stats(self) -> Dict[str, object]:
+        with self._cond:
+            waiting = len(self._waiting)
+        return {
+            'granted_user': self.granted.get(USER, 0),
+            'granted_background': self.granted.get(BACKGROUND, 0),
+            'timeouts': self.timeouts,
+            'waiting': waiting,
+            'bucket': self.bucket.state(),
+        }
+
+
+_scheduler: Optional[RecognitionScheduler] = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler() -> Optional[RecognitionScheduler]:
+    """The process-wide scheduler, or None when SCHEDULER_ENABLED is off"""
+    global _scheduler
+    if not SCHEDULER_ENABLED:
+        return None
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = RecognitionScheduler()
+        return _scheduler
@@ -0,0 +1,362 @@
+"""Local recognition service shared by the desktop and web frontends.
+
+One asyncio server owns a single recognition backend (pooled HTTP client,
+result cache and fingerprint index) and the playlist store, and serves any
+number of clients:
+
+    GET  /health               service and cache counters
+    GET  /metrics              pipeline timings and counters, Prometheus text
+    GET  /playlists            every playlist
+    POST /playlists/<id>       add the JSON song in the body
+    POST /recognize            recognize a WAV, or raw 16-bit PCM with ?rate=
+    GET  /ws/recognize?rate=   WebSocket: stream PCM, receive matches as found
+
+A WebSocket client sends binary messages of little-endian 16-bit mono PCM.
+Like the desktop app, the service tries growing windows first (STREAM_WINDOWS)
+and then keeps recognizing every MONITOR_HOP seconds for as long as audio
+keeps coming, sending a `match` message whenever the song changes.
+
+Requests from web pages are only served when their Origin is on this
+machine. Changing a playlist (POST /playlists/<id>, the WebSocket `add`
+command) also needs the service token, sent as an X-VibeCatch-Token header
+or a ?token= query parameter.
+
+    python -m vibecatch serve --port 8766
+"""
+import asyncio
+import hmac
+import json
+import re
+import secrets
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+from urllib.parse import urlsplit
+
+import numpy as np
+
+from .audio_file import decode_wav
+from .backends import RecognitionBackend, create_backend
+from .config import (
+    SAMPLE_RATE, STREAM_WINDOWS, MONITOR_WINDOW, MONITOR_HOP, SERVICE_HOST, SERVICE_PORT,
+    SERVICE_WORKERS, SERVICE_MAX_MESSAGE, SERVICE_MAX_UPLOAD, SERVICE_TOKEN, SERVICE_MIN_RATE,
+    SERVICE_MAX_RATE
+)
+from .metrics import REGISTRY
+from .monitor import SongChangeDetector
+from .playlist_store import PlaylistStore
+from .preprocess import resample
+from .websocket import ProtocolError, Request, WebSocket, http_response, read_request
+
+PLAYLIST_PATH = re.compile(r'^/playlists/([\w-]+)/?$')
+LOCAL_HOSTS = {'localhost', '127.0.0.1', '::1'}
+
+
+def is_local_origin(request: Request) -> bool:
+    """Whether a request comes from a page on this machine, or not from a browser at all"""
+    origin = request.headers.get('origin')
+    if origin is None:
+        return True
+    try:
+        return urlsplit(origin).hostname in LOCAL_HOSTS
+    except ValueError:
+        return False
+
+
+def parse_rate(request: Request) -> Optional[int]:
+    """Sample rate from ?rate=, or None when it is not a supported number"""
+    try:
+        rate = int(request.query.get('rate', SAMPLE_RATE))
+    except ValueError:
+        return None
+    return rate if SERVICE_MIN_RATE <= rate <= SERVICE_MAX_RATE else None
+
+
+class StreamSession:
+    """Recognition state of one streaming WebSocket client.
+
+    Only the most recent audio needed for the largest window is kept, and at
+    most one recognition per client is in flight; windows that pass while
+    one is running roll into the next attempt.
+    """
+
+    def __init__(self, service: 'RecognitionService', ws: WebSocket, rate: int):
+        self.service = service
+        self.ws = ws
+        self.rate = rate
+        self.buffer = bytearray()
+        self.received = 0
+        self.matches = 0
+        self.windows = sorted(int(rate * seconds) for seconds in STREAM_WINDOWS)
+        self.monitor_window = int(rate * MONITOR_WINDOW)
+        self.hop = int(rate * MONITOR_HOP)
+        self.keep = max(self.windows + [self.monitor_window])
+        self.next_attempt = self.windows[0]
+        self.detector = SongChangeDetector()
+        self.pending: Optional[asyncio.Task] = None
+        self._carry = b''
+
+    def feed(self, chunk: bytes):
+        """Append a chunk of PCM and start an attempt when one is due"""
+        chunk = self._carry + chunk
+        usable = len(chunk) - len(chunk) % 2
+        self._carry = chunk[usable:]
+        self.buffer += chunk[:usable]
+        self.received += usable // 2
+        # Trim in bulk so the copy is amortized over many chunks
+        if len(self.buffer) > 4 * self.keep:
+            del self.buffer[:len(self.buffer) - 2 * self.keep]
+        self.maybe_attempt()
+
+    def maybe_attempt(self):
+        if self.pending is not None or self.received < self.next_attempt:
+            return
+        if self.windows:
+            window = self.windows.pop(0)
+            while self.windows and self.received >= self.windows[0]:
+                window = self.windows.pop(0)
+            self.next_attempt = self.windows[0] if self.windows else self.received + self.hop
+        else:
+            window = self.monitor_window
+            self.next_attempt = self.received + self.hop
+        clip = bytes(self.buffer[-2 * min(window, self.received):])
+        self.pending = asyncio.ensure_future(self._attempt(clip, self.received / self.rate))
+
+    async def _attempt(self, clip: bytes, at: float):
+        try:
+            song = await self.service.recognize(clip, self.rate)
+            if song and self.windows:
+                # Matched early: no need for the larger initial windows
+                self.windows = []
+                self.next_attempt = int(at * self.rate) + self.hop
+            if self.detector.update(song):
+                self.matches += 1
+                await self.ws.send_json({'type': 'match', 'song': song, 'at': round(at, 2)})
+            elif not song:
+                await self.ws.send_json({'type': 'nomatch', 'at': round(at, 2)})
+        except ConnectionError:
+            self.ws.closed = True
+        except Exception as e:
+            print(f"Error streaming recognition: {e}")
+            try:
+                await self.ws.send_json({'type': 'error', 'message': 'Recognition failed'})
+            except ConnectionError:
+                self.ws.closed = True
+        finally:
+            self.pending = None
+        if not self.ws.closed:
+            self.maybe_attempt()
+
+    async def finish(self):
+        """Let the attempt in flight complete"""
+        while self.pending is not None:
+            await self.pending
+
+
+class RecognitionService:
+    """asyncio HTTP/WebSocket front end over one shared backend"""
+
+    def __init__(self, backend: Optional[RecognitionBackend] = None,
+                 store: Optional[PlaylistStore] = None, workers: int = SERVICE_WORKERS,
+                 token: Optional[str] = None):
+        self.backend = backend or create_backend()
+        self.store = store or PlaylistStore()
+        self.token = token or SERVICE_TOKEN or secrets.token_urlsafe(16)
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='recognize')
+        self.clients = 0
+        self.recognitions = 0
+        self.server: Optional[asyncio.AbstractServer] = None
+
+    def _recognize(self, pcm: bytes, rate: int) -> Optional[dict]:
+        if rate != SAMPLE_RATE:
+            samples = resample(np.frombuffer(pcm, dtype=np.int16), rate, SAMPLE_RATE)
+            pcm = np.clip(samples, -32768, 32767).astype(np.int16).tobytes()
+        try:
+            return self.backend.recognize(pcm)
+        except Exception as e:
+            print(f"Error recognizing song: {e}")
+            return None
+
+    async def recognize(self, pcm: bytes, rate: int = SAMPLE_RATE) -> Optional[dict]:
+        """Run the blocking backend on the shared worker pool"""
+        self.recognitions += 1
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, self._recognize, pcm, rate)
+
+    def authorized(self, request: Request) -> bool:
+        """Whether a request carries the token needed to change playlists"""
+        token = request.headers.get('x-vibecatch-token') or request.query.get('token', '')
+        return hmac.compare_digest(token.encode(), self.token.encode())
+
+    async def start(self, host: str = SERVICE_HOST, port: int = SERVICE_PORT) -> asyncio.AbstractServer:
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self.executor, self.store.ensure_loaded)
+        self.server = await asyncio.start_server(
+            self.handle, host, port, limit=SERVICE_MAX_MESSAGE
+        )
+        return self.server
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Serve one connection"""
+        self.clients += 1
+        try:
+            request = await read_request(reader, SERVICE_MAX_UPLOAD)
+            if request is None:
+                return
+            if not is_local_origin(request):
+                writer.write(http_response(403, {'error': 'Only local pages may use the service'}))
+                return
+            if request.is_websocket and request.path == '/ws/recognize':
+                await self.stream(request, reader, writer)
+                return
+            writer.write(await self.route(request))
+            await writer.drain()
+        except ProtocolError as e:
+            writer.write(http_response(400, {'error': str(e)}))
+        except ConnectionError:
+            pass
+        except Exception as e:
+            print(f"Error handling request: {e}")
+            writer.write(http_response(500, {'error': 'Internal error'}))
+        finally:
+            self.clients -= 1
+            try:
+                writer.close()
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def route(self, request: Request) -> bytes:
+        if request.path == '/health':
+            cache = getattr(self.backend, 'cache', None)
+            return http_response(200, {
+                'status': 'ok',
+                'backend': self.backend.name,
+                'clients': self.clients,
+                'recognitions': self.recognitions,
+                'cache': cache.stats() if cache else {},
+            })
+
+        if request.path == '/metrics':
+            if request.query.get('format') == 'json':
+                return http_response(200, REGISTRY.snapshot())
+            return http_response(200, REGISTRY.to_prometheus().encode(),
+                                 content_type='text/plain; version=0.0.4')
+
+        if request.path == '/playlists':
+            if request.method != 'GET':
+                return http_response(405, {'error': 'Use GET'})
+            return http_response(200, self.store.snapshot())
+
+        match = PLAYLIST_PATH.match(request.path)
+        if match:
+            if request.method != 'POST':
+                return http_response(405, {'error': 'Use POST'})
+            if not self.authorized(request):
+                return http_response(401, {'error': 'Missing or wrong service token'})
+            playlist_id = match.group(1)
+            if playlist_id not in self.store.playlists:
+                return http_response(404, {'error': f'Unknown playlist {playlist_id}'})
+            try:
+                body = json.loads(request.body)
+                song = {'title': body['title'], 'artist': body['artist'], 'key': body.get('key', '')}
+            except (ValueError, KeyError, TypeError):
+                return http_response(400, {'error': 'Expected a JSON song with title and artist'})
+            added = self.store.add(song, playlist_id)
+            return http_response(201 if added else 200, {'added': added})
+
+        if request.path == '/recognize':
+            if request.method != 'POST':
+                return http_response(405, {'error': 'Use POST'})
+            if request.body.startswith(b'RIFF'):
+                try:
+                    pcm, rate = decode_wav(request.body)
+                except Exception:
+                    return http_response(400, {'error': 'Unreadable WAV file'})
+            else:
+                pcm, rate = request.body, parse_rate(request)
+                if rate is None:
+                    return http_response(400, {'error': f'rate must be {SERVICE_MIN_RATE}-{SERVICE_MAX_RATE} Hz'})
+            song = await self.recognize(pcm, rate)
+            return http_response(200, {'song': song})
+
+        return http_response(404, {'error': 'Not found'})
+
+    async def stream(self, request: Request, reader: asyncio.StreamReader,
+                     writer: asyncio.StreamWriter):
+        """Streaming recognition over a WebSocket"""
+        rate = parse_rate(request)
+        if rate is None:
+            writer.write(http_response(400, {'error': f'rate must be {SERVICE_MIN_RATE}-{SERVICE_MAX_RATE} Hz'}))
+            await writer.drain()
+            return
+        can_edit = self.authorized(request)
+        ws = await WebSocket.accept(request, reader, writer, SERVICE_MAX_MESSAGE)
+        session = StreamSession(self, ws, rate)
+        await ws.send_json({'type': 'ready', 'sample_rate': session.rate})
+        try:
+            while True:
+                message = await ws.receive()
+                if message is None:
+                    break
+                if isinstance(message, bytes):
+                    session.feed(message)
+                    continue
+                try:
+                    command = json.loads(message)
+                except ValueError:
+                    await ws.send_json({'type': 'error', 'message': 'Expected JSON'})
+                    continue
+                if command.get('type') == 'stop':
+                    break
+                if command.get('type') == 'add':
+                    if not can_edit:
+                        await ws.send_json({'type': 'error', 'message': 'Missing or wrong service token'})
+                        continue
+                    song = command.get('song') or {}
+                    added = False
+                    if song.get('title') and song.get('artist'):
+                        added = self.store.add({
+                            'title': song['title'],
+                            'artist': song['artist'],
+                            'key': song.get('key', '')
+                        }, command.get('playlist', ''))
+                    await ws.send_json({'type': 'added', 'added': added,
+                                        'playlist': command.get('playlist')})
+        except ProtocolError as e:
+            await ws.send_json({'type': 'error', 'message': str(e)})
+        finally:
+            await session.finish()
+            if not ws.closed:
+                try:
+                    await ws.send_json({'type': 'done', 'matches': session.matches})
+                    await ws.close()
+                except ConnectionError:
+                    pass
+
+    def close(self):
+        if self.server is not None:
+            self.server.close()
+        self.executor.shutdown(wait=True)
+        self.backend.close()
+        self.store.close()
+
+
+def serve(host: str = SERVICE_HOST, port: int = SERVICE_PORT,
+          backend: Optional[RecognitionBackend] = None, workers: int = SERVICE_WORKERS):
+    """Run the service until interrupted"""
+    service = RecognitionService(backend, workers=workers)
+
+    async def run():
+        server = await service.start(host, port)
+        print(f"VibeCatch service listening on http://{host}:{port}")
+        if not SERVICE_TOKEN:
+            print(f"Token for playlist changes: {service.token}")
+        async with server:
+            await server.serve_forever()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.close()
@@ -0,0 +1,280 @@
+"""Tempo, key and energy analysis to suggest a vibe category.
+
+All features come from one short-time FFT over the capture:
+
+- tempo: autocorrelation of the spectral-flux onset envelope, weighted
+  toward common tempos around 120 BPM
+- key and mode: chroma correlated against the Krumhansl-Kessler major and
+  minor key profiles, all 24 keys at once
+- energy: RMS level and spectral centroid (brightness)
+
+The categories in VIBE_CATEGORIES are scored from these features. Songs are
+analysed once per track key and cached, so catching a song again costs
+nothing. The analysis can start in the background while the capture is
+being recognized, and the cache is an append-only JSON-lines file,
+rewritten once it has grown to twice its entries.
+"""
+import json
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Optional
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from .config import SAMPLE_RATE, VIBE_CACHE_FILE, VIBE_CACHE_MAX_ENTRIES, VIBE_CATEGORIES
+
+FRAME_SIZE = 4096
+HOP_SIZE = 1024
+TEMPO_RANGE = (60, 180)  # BPM
+CHROMA_RANGE = (55, 5000)  # Hz
+PITCH_CLASSES = ['C', 'C#', 'D', 'D#', 'E', 'F', 'F#', 'G', 'G#', 'A', 'A#', 'B']
+MAJOR_PROFILE = np.array([6.35, 2.23, 3.48, 2.33, 4.38, 4.09, 2.52, 5.19, 2.39, 3.66, 2.29, 2.88])
+MINOR_PROFILE = np.array([6.33, 2.68, 3.52, 5.38, 2.60, 3.53, 2.54, 4.75, 3.98, 2.69, 3.34, 3.17])
+EPSILON = 1e-10
+
+
+def _key_profiles() -> np.ndarray:
+    """24 z-scored key profiles: rows 0-11 major, 12-23 minor, by tonic"""
+    profiles = np.array(
+        [np.roll(MAJOR_PROFILE, tonic) for tonic in range(12)]
+        + [np.roll(MINOR_PROFILE, tonic) for tonic in range(12)]
+    )
+    profiles -= profiles.mean(axis=1, keepdims=True)
+    return profiles / np.linalg.norm(profiles, axis=1, keepdims=True)
+
+
+KEY_PROFILES = _key_profiles()
+
+
+def estimate_tempo(flux: np.ndarray, frame_rate: float) -> float:
+    """Beats per minute from the autocorrelation of the onset envelope"""
+    envelope = flux - flux.mean()
+    if len(envelope) < 4 or not envelope.any():
+        return 0.0
+    n = 1 << int(np.ceil(np.log2(2 * len(envelope))))
+    spectrum = np.fft.rfft(envelope, n)
+    autocorr = np.fft.irfft(spectrum * np.conj(spectrum), n)[:len(envelope)]
+
+    lags = np.arange(len(autocorr))
+    with np.errstate(divide='ignore'):
+        bpm = 60 * frame_rate / lags
+    valid = (bpm >= TEMPO_RANGE[0]) & (bpm <= TEMPO_RANGE[1])
+    if not valid.any():
+        return 0.0
+    # Log-normal prior around 120 BPM settles octave ambiguity
+    weight = np.exp(-0.5 * (np.log2(bpm[valid] / 120) / 0.9) ** 2)
+    best = int(np.argmax(autocorr[valid] * weight))
+    return float(bpm[valid][best])
+
+
+def analyze(pcm: bytes, rate: int = SAMPLE_RATE) -> dict:
+    """Tempo, key, mode, energy and brightness of a capture"""
+    samples = np.frombuffer(pcm, dtype=np.int16).astype(np.float32) / 32768.0
+    if len(samples) < FRAME_SIZE:
+        samples = np.pad(samples, (0, FRAME_SIZE - len(samples)))
+    frames = sliding_window_view(samples, FRAME_SIZE)[::HOP_SIZE]
+    magnitude = np.abs(np.fft.rfft(frames * np.hanning(FRAME_SIZE), axis=1))
+    freqs = np.fft.rfftfreq(FRAME_SIZE, 1 / rate)
+
+    # Tempo
+    log_magnitude = np.log1p(100 * magnitude / (magnitude.max() + EPSILON))
+    flux = np.sum(np.maximum(np.diff(log_magnitude, axis=0), 0), axis=1)
+    tempo = estimate_tempo(flux, rate / HOP_SIZE)
+
+    # Key and mode
+    band = (freqs >= CHROMA_RANGE[0]) & (freqs <= CHROMA_RANGE[1])
+    pitch_class = np.round(12 * np.log2(freqs[band] / 440.0)).astype(int) % 12
+    pitch_class = (pitch_class + 9) % 12  # A = 9 when C = 0
+    chroma = np.bincount(pitch_class, weights=np.square(magnitude[:, band]).sum(axis=0), minlength=12)
+    chroma = chroma - chroma.mean()
+    chroma /= np.linalg.norm(chroma) + EPSILON
+    correlations = KEY_PROFILES @ chroma
+    best_key = int(np.argmax(correlations))
+    tonic, minor = best_key % 12, best_key >= 12
+    # Positive when the best major key beats the best minor key
+    mode_strength = float(correlations[:12].max() - correlations[12:].max())
+
+    # Energy and brightness
+    rms_db = float(20 * np.log10(np.sqrt(np.mean(np.square(samples))) + EPSILON))
+    power = np.square(magnitude).sum(axis=0)
+    centroid = float((freqs * power).sum() / (power.sum() + EPSILON))
+
+    return {
+        'tempo': round(tempo, 1),
+        'key': f"{PITCH_CLASSES[tonic]} {'minor' if minor else 'major'}",
+        'mode': 'minor' if minor else 'major',
+        'mode_strength': round(mode_strength, 3),
+        'energy': round(float(np.clip((rms_db + 40) / 30, 0, 1)), 3),
+        'brightness': round(float(np.clip(centroid / 4000, 0, 1)), 3),
+    }
+
+
+def score_vibes(features: dict) -> Dict[str, float]:
+    """Score each vibe category between 0 and 1"""
+    tempo = float(np.clip((features['tempo'] - 60) / 120, 0, 1)) if features['tempo'] else 0.5
+    major = float(np.clip(0.5 + features['mode_strength'] * 2, 0, 1))
+    energy = features['energy']
+    brightness = features['brightness']
+    scores = {
+        # Upbeat tempos and major keys
+        'happiness': 0.45 * major + 0.3 * (1 - abs(tempo - 0.55) * 2) + 0.25 * energy,
+        # Minor keys and slower tempos
+        'emotional': 0.5 * (1 - major) + 0.3 * (1 - tempo) + 0.2 * (1 - brightness),
+        # Gentle rhythms, low energy
+        'relaxation': 0.4 * (1 - energy) + 0.35 * (1 - tempo) + 0.25 * (1 - brightness),
+        # Fast, dynamic, loud
+        'excitement': 0.45 * tempo + 0.35 * energy + 0.2 * brightness,
+    }
+    return {vibe: round(float(np.clip(scores[vibe], 0, 1)), 3) for vibe in VIBE_CATEGORIES}
+
+
+def suggest(pcm: bytes, rate: int = SAMPLE_RATE) -> dict:
+    """Features, category scores and the categories ranked best first"""
+    features = analyze(pcm, rate)
+    scores = score_vibes(features)
+    return dict(features, scores=scores, ranking=sorted(scores, key=scores.get, reverse=True))
+
+
+class VibeCache:
+    """Vibe suggestions by track key, least recently used evicted first"""
+
+    def __init__(self, path: Optional[str] = VIBE_CACHE_FILE,
+                 max_entries: int = VIBE_CACHE_MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self.entries: 'OrderedDict[str, dict]' = OrderedDict()
+        self.log_lines = 0
+        self._log = None
+        self._lock = threading.Lock()
+        self.load()
+
+    def load(self):
+        """Replay the cache file; later lines for a key replace earlier ones"""
+        if not self.path or not os.path.exists(self.path):
+            return
+        stale = False
+        try:
+            with open(self.path, 'r') as f:
+                for line in f:
+                    self.log_lines += 1
+                    try:
+                        entry = json.loads(line)
+                        key, vibe = str(entry['key']), dict(entry['vibe'])
+                    except (ValueError, KeyError, TypeError):
+                        # Torn last line, or a file from before the log format
+                        stale = True
+                        continue
+                    self.entries[key] = vibe
+                    self.entries.move_to_end(key)
+        except OSError as e:
+            print(f"Error loading vibe cache: {e}")
+            return
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+        if stale or self.log_lines > 2 * max(len(self.entries), 1):
+            self.compact()
+
+    def compact(self):
+        """Rewrite the cache file with just the cached entries"""
+        if not self.path:
+            return
+        if self._log is not None:
+            self._log.close()
+            self._log = None
+        tmp_path = f"{self.path}.tmp"
+        try:
+            with open(tmp_path, 'w') as f:
+                for key, vibe in self.entries.items():
+                    f.write(self._line(key, vibe))
+            os.replace(tmp_path, self.path)
+            self.log_lines = len(self.entries)
+        except Exception as e:
+            print(f"Error saving vibe cache: {e}")
+
+    @staticmethod
+    def _line(key: str, vibe: dict) -> str:
+        return json.dumps({'key': key, 'vibe': vibe}) + '\n'
+
+    def _append(self, key: str, vibe: dict):
+        if not self.path:
+            return
+        try:
+            if self._log is None:
+                self._log = open(self.path, 'a')
+            self._log.write(self._line(key, vibe))
+            self._log.flush()
+            self.log_lines += 1
+        except Exception as e:
+            print(f"Error saving vibe cache: {e}")
+        if self.log_lines > 2 * self.max_entries:
+            self.compact()
+
+    def get(self, key: str) -> Optional[dict]:
+        with self._lock:
+            vibe = self.entries.get(key)
+            if vibe is not None:
+                self.entries.move_to_end(key)
+            return vibe
+
+    def put(self, key: str, vibe: dict):
+        """Cache a suggestion and append it to the cache file"""
+        with self._lock:
+            self.entries[key] = vibe
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+            self._append(key, vibe)
+
+    def close(self):
+        with self._lock:
+            if self._log is not None:
+                self._log.close()
+                self._log = None
+
+
+class VibeSuggester:
+    """Suggests a vibe for recognized songs, analysing each track only once"""
+
+    def __init__(self, cache: Optional[VibeCache] = None):
+        self.cache = cache if cache is not None else VibeCache()
+        self.hits = 0
+        self.misses = 0
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def start(self, pcm: bytes, rate: int = SAMPLE_RATE) -> Future:
+        """Analyse a capture in the background while it is being recognized"""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='vibe')
+        return self._executor.submit(suggest, pcm, rate)
+
+    def suggest(self, song: dict, pcm: bytes, rate: int = SAMPLE_RATE,
+                pending: Optional[Future] = None) -> dict:
+        """Cached suggestion for the song, else the analysis of its capture.
+
+        `pending` is an analysis from start(); it is used instead of
+        analysing the capture again, or cancelled on a cache hit.
+        """
+        key = song.get('key')
+        if key:
+            vibe = self.cache.get(key)
+            if vibe is not None:
+                self.hits += 1
+                if pending is not None:
+                    pending.cancel()
+                return vibe
+        self.misses += 1
+        vibe = pending.result() if pending is not None else suggest(pcm, rate)
+        if key:
+            self.cache.put(key, vibe)
+        return vibe
+
+    def stats(self) -> dict:
+        return {'hits': self.hits, 'misses': self.misses, 'entries': len(self.cache.entries)}
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+        self.cache.close()
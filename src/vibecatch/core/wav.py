@@ -0,0 +1,35 @@
+"""In-memory WAV encoding for captured audio"""
+import io
+import os
+import wave
+from datetime import datetime
+from typing import Optional
+
+from .config import SAMPLE_RATE, BIT_DEPTH, CHANNELS, SAVE_RECORDINGS, RECORDINGS_DIR
+
+
+def encode_wav(pcm: bytes, sample_rate: int = SAMPLE_RATE, channels: int = CHANNELS) -> bytes:
+    """Wrap raw 16-bit PCM in a WAV container without touching the disk"""
+    buffer = io.BytesIO()
+    with wave.open(buffer, 'wb') as wf:
+        wf.setnchannels(channels)
+        wf.setsampwidth(BIT_DEPTH // 8)
+        wf.setframerate(sample_rate)
+        wf.writeframes(pcm)
+    return buffer.getvalue()
+
+
+def save_debug_recording(wav_data: bytes) -> Optional[str]:
+    """Spill an encoded recording to disk when SAVE_RECORDINGS is enabled"""
+    if not SAVE_RECORDINGS:
+        return None
+    try:
+        os.makedirs(RECORDINGS_DIR, exist_ok=True)
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+        filename = os.path.join(RECORDINGS_DIR, f"recording_{timestamp}.wav")
+        with open(filename, 'wb') as f:
+            f.write(wav_data)
+        return filename
+    except Exception as e:
+        print(f"Error saving debug recording: {e}")
+        return None
@@ -0,0 +1,224 @@
+"""Minimal asyncio HTTP/1.1 request parsing and RFC 6455 WebSocket framing.
+
+Only what the local recognition service needs: one request per connection,
+server-side WebSockets, fragmented messages, ping/pong and close.
+"""
+import asyncio
+import base64
+import hashlib
+import json
+import struct
+from typing import Dict, Optional, Tuple, Union
+from urllib.parse import parse_qs, urlsplit
+
+WEBSOCKET_GUID = '258EAFA5-E914-47DA-95CA-C5AB0DC85B11'
+MAX_HEADER_SIZE = 16 * 1024
+
+OP_CONTINUATION = 0x0
+OP_TEXT = 0x1
+OP_BINARY = 0x2
+OP_CLOSE = 0x8
+OP_PING = 0x9
+OP_PONG = 0xA
+
+REASONS = {
+    101: 'Switching Protocols', 200: 'OK', 201: 'Created', 204: 'No Content',
+    400: 'Bad Request', 401: 'Unauthorized', 403: 'Forbidden', 404: 'Not Found',
+    405: 'Method Not Allowed',
+    413: 'Payload Too Large', 500: 'Internal Server Error', 503: 'Service Unavailable',
+}
+
+
+class ProtocolError(Exception):
+    """The peer sent something that is not valid HTTP or WebSocket"""
+
+
+class Request:
+    """A parsed HTTP request"""
+
+    def __init__(self, method: str, target: str, headers: Dict[str, str], body: bytes = b''):
+        self.method = method
+        parts = urlsplit(target)
+        self.path = parts.path
+        self.query = {key: values[-1] for key, values in parse_qs(parts.query).items()}
+        self.headers = headers
+        self.body = body
+
+    @property
+    def is_websocket(self) -> bool:
+        return (self.headers.get('upgrade', '').lower() == 'websocket'
+                and 'upgrade' in self.headers.get('connection', '').lower())
+
+
+async def read_request(reader: asyncio.StreamReader, max_body: int) -> Optional[Request]:
+    """Read one request; None if the peer closed before sending anything"""
+    try:
+        head = await reader.readuntil(b'\r\n\r\n')
+    except asyncio.IncompleteReadError as e:
+        if not e.partial:
+            return None
+        raise ProtocolError("Incomplete request")
+    except asyncio.LimitOverrunError:
+        raise ProtocolError("Request headers too large")
+
+    lines = head.decode('latin-1').split('\r\n')
+    try:
+        method, target, _ = lines[0].split(' ', 2)
+    except ValueError:
+        raise ProtocolError("Malformed request line")
+    headers = {}
+    for line in lines[1:]:
+        if ':' in line:
+            name, value = line.split(':', 1)
+            headers[name.strip().lower()] = value.strip()
+
+    try:
+        length = int(headers.get('content-length', 0) or 0)
+    except ValueError:
+        raise ProtocolError("Invalid Content-Length")
+    if length < 0:
+        raise ProtocolError("Invalid Content-Length")
+    if length > max_body:
+        raise ProtocolError("Request body too large")
+    body = await reader.readexactly(length) if length else b''
+    return Request(method.upper(), target, headers, body)
+
+
+def http_response(status: int, body: Union[bytes, dict, list] = b'',
+                  content_type: str = 'application/json',
+                  headers: Optional[Dict[str, str]] = None) -> bytes:
+    """Serialize a complete HTTP response; dicts and lists are sent as JSON"""
+    if isinstance(body, (dict, list)):
+        body = json.dumps(body).encode()
+    lines = [f"HTTP/1.1 {status} {REASONS.get(status, '')}"]
+    all_headers = {
+        'Content-Type': content_type,
+        'Content-Length': str(len(body)),
+        'Connection': 'close',
+    }
+    all_headers.update(headers or {})
+    lines.extend(f"{name}: {value}" for name, value in all_headers.items())
+    return ('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1') + body
+
+
+def accept_key(key: str) -> str:
+    """Sec-WebSocket-Accept value for a client's Sec-WebSocket-Key"""
+    digest = hashlib.sha1((key + WEBSOCKET_GUID).encode()).digest()
+    return base64.b64encode(digest).decode()
+
+
+def encode_frame(opcode: int, payload: bytes = b'') -> bytes:
+    """A single unmasked (server to client) frame"""
+    length = len(payload)
+    if length < 126:
+        header = struct.pack('!BB', 0x80 | opcode, length)
+    elif length < 1 << 16:
+        header = struct.pack('!BBH', 0x80 | opcode, 126, length)
+    else:
+        header = struct.pack('!BBQ', 0x80 | opcode, 127, length)
+    return header + payload
+
+
+def unmask(payload: bytes, mask: bytes) -> bytes:
+    """XOR the payload with the repeating 4-byte mask, as one big integer"""
+    if not payload:
+        return payload
+    n = len(payload)
+    key = (mask * (n // 4 + 1))[:n]
+    return (int.from_bytes(payload, 'big') ^ int.from_bytes(key, 'big')).to_bytes(n, 'big')
+
+
+class WebSocket:
+    """Server side of an upgraded connection"""
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter,
+                 max_message: int):
+        self.reader = reader
+        self.writer = writer
+        self.max_message = max_message
+        self.closed = False
+        self._send_lock = asyncio.Lock()
+
+    @classmethod
+    async def accept(cls, request: Request, reader: asyncio.StreamReader,
+                     writer: asyncio.StreamWriter, max_message: int) -> 'WebSocket':
+        """Complete the opening handshake"""
+        key = request.headers.get('sec-websocket-key')
+        if not key:
+            raise ProtocolError("Missing Sec-WebSocket-Key")
+        writer.write(
+            "HTTP/1.1 101 Switching Protocols\r\n"
+            "Upgrade: websocket\r\n"
+            "Connection: Upgrade\r\n"
+            f"Sec-WebSocket-Accept: {accept_key(key)}\r\n\r\n".encode()
+        )
+        await writer.drain()
+        return cls(reader, writer, max_message)
+
+    async def _read_frame(self) -> Tuple[bool, int, bytes]:
+        first, second = await self.reader.readexactly(2)
+        length = second & 0x7F
+        if length == 126:
+            length, = struct.unpack('!H', await self.reader.readexactly(2))
+        elif length == 127:
+            length, = struct.unpack('!Q', await self.reader.readexactly(8))
+        if length > self.max_message:
+            raise ProtocolError("WebSocket message too large")
+        if not second & 0x80:
+            raise ProtocolError("Client frames must be masked")
+        mask = await self.reader.readexactly(4)
+        payload = unmask(await self.reader.readexactly(length), mask)
+        return bool(first & 0x80), first & 0x0F, payload
+
+    async def receive(self) -> Optional[Union[str, bytes]]:
+        """Next text or binary message; None once the connection is closed"""
+        message_opcode = None
+        fragments = []
+        size = 0
+        while not self.closed:
+            try:
+                fin, opcode, payload = await self._read_frame()
+            except (asyncio.IncompleteReadError, ConnectionError):
+                self.closed = True
+                return None
+
+            if opcode == OP_PING:
+                await self._send(OP_PONG, payload)
+                continue
+            if opcode == OP_PONG:
+                continue
+            if opcode == OP_CLOSE:
+                await self.close(payload[:2] or struct.pack('!H', 1000))
+                return None
+
+            if opcode != OP_CONTINUATION:
+                message_opcode = opcode
+            elif message_opcode is None:
+                raise ProtocolError("Continuation frame without a message")
+            size += len(payload)
+            if size > self.max_message:
+                raise ProtocolError("WebSocket message too large")
+            fragments.append(payload)
+            if fin:
+                data = b''.join(fragments)
+                return data.decode('utf-8') if message_opcode == OP_TEXT else data
+        return None
+
+    async def _send(self, opcode: int, payload: bytes):
+        if self.closed and opcode != OP_CLOSE:
+            return
+        async with self._send_lock:
+            self.writer.write(encode_frame(opcode, payload))
+            await self.writer.drain()
+
+    async def send_json(self, message: dict):
+        await self._send(OP_TEXT, json.dumps(message).encode())
+
+    async def close(self, code: bytes = struct.pack('!H', 1000)):
+        if self.closed:
+            return
+        try:
+            await self._send(OP_CLOSE, code)
+        except ConnectionError:
+            pass
+        self.closed = True
@@ -12,6 +12,14 @@ RED = "#ff5555"
 YELLOW = "#f1fa8c"
 DARKER = "#44475a"
 
+# Playlist colors, by vibe category
+VIBE_COLORS = {
+    'happiness': GREEN,
+    'emotional': PINK,
+    'relaxation': CYAN,
+    'excitement': ORANGE
+}
+
 # Hover states
 GREEN_HOVER = "#5af78e"
 GREEN_PRESSED = "#45e06b"
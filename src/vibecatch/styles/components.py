@@ -51,6 +51,29 @@ RECORD_BUTTON = f"""
     }}
 """
 
+MONITOR_BUTTON = f"""
+    QPushButton {{
+        background-color: {colors.DARKER};
+        border-radius: 8px;
+        padding: 8px;
+        font-size: 16px;
+        font-weight: bold;
+        color: {colors.FOREGROUND};
+        min-height: 45px;
+        margin: 6px;
+    }}
+    QPushButton:hover {{
+        background-color: {colors.COMMENT};
+    }}
+    QPushButton:checked {{
+        background-color: {colors.PURPLE};
+        color: {colors.CURRENT_LINE};
+    }}
+    QPushButton:disabled {{
+        background-color: {colors.CURRENT_LINE};
+    }}
+"""
+
 # Progress bar styles
 PROGRESS_BAR = f"""
     QProgressBar {{
@@ -98,7 +121,7 @@ PLAYLIST_DESCRIPTION = f"""
 """
 
 SONG_LIST = f"""
-    QListWidget {{
+    QListView {{
         background-color: {colors.CURRENT_LINE};
         border-radius: 4px;
         color: {colors.FOREGROUND};
@@ -108,12 +131,12 @@ SONG_LIST = f"""
         max-height: 150px;
         margin: 4px;
     }}
-    QListWidget::item {{
+    QListView::item {{
         padding: 4px;
         border-radius: 2px;
         margin: 1px;
     }}
-    QListWidget::item:hover {{
+    QListView::item:hover {{
         background-color: {colors.DARKER};
     }}
 """
@@ -131,6 +154,12 @@ DIALOG_SONG_INFO = f"""
     margin: 8px;
 """
 
+DIALOG_VIBE_INFO = f"""
+    color: {colors.COMMENT};
+    font-size: 13px;
+    margin-bottom: 8px;
+"""
+
 DIALOG_BUTTON = lambda color: f"""
     QPushButton {{
         background-color: {color};
@@ -0,0 +1,58 @@
+from typing import Dict, List, Optional
+
+from PyQt5.QtCore import QObject, pyqtSignal
+
+from ..core.audio_manager import AudioManager
+from ..core.catalog import Track
+
+
+class QtAudioManager(QObject):
+    """Qt face of the core AudioManager.
+
+    Re-emits the core callbacks as Qt signals. They fire on the audio
+    thread, so connected widgets receive them as queued calls on the GUI
+    thread.
+    """
+    progress_updated = pyqtSignal(int)
+    meter_updated = pyqtSignal(dict)
+    status_updated = pyqtSignal(str)
+    recording_finished = pyqtSignal(dict)
+    song_changed = pyqtSignal(dict)
+    song_replayed = pyqtSignal(dict, dict)
+
+    def __init__(self, manager: Optional[AudioManager] = None, parent=None):
+        super().__init__(parent)
+        self.manager = manager or AudioManager()
+        self.manager.progress_updated.connect(self.progress_updated.emit)
+        self.manager.meter_updated.connect(self.meter_updated.emit)
+        self.manager.status_updated.connect(self.status_updated.emit)
+        self.manager.recording_finished.connect(self.recording_finished.emit)
+        self.manager.song_changed.connect(self.song_changed.emit)
+        self.manager.song_replayed.connect(self.song_replayed.emit)
+
+    def start_recording(self):
+        self.manager.start_recording()
+
+    def stop_recording(self):
+        self.manager.stop_recording()
+
+    def start_monitoring(self):
+        self.manager.start_monitoring()
+
+    def load_playlists(self) -> Dict[str, List[Track]]:
+        return self.manager.load_playlists()
+
+    def add_to_playlist(self, song: dict, playlist_id: str) -> bool:
+        return self.manager.add_to_playlist(song, playlist_id)
+
+    def get_playlist(self, playlist_id: str) -> List[Track]:
+        return self.manager.get_playlist(playlist_id)
+
+    def playlists_containing(self, song: dict) -> List[str]:
+        return self.manager.playlists_containing(song)
+
+    def resume_offline_queue(self):
+        self.manager.resume_offline_queue()
+
+    def close(self):
+        self.manager.close()
@@ -2,7 +2,7 @@ from PyQt5.QtWidgets import (
     QMainWindow, QWidget, QVBoxLayout, QGridLayout, 
     QFrame, QLabel, QDialog, QPushButton
 )
-from PyQt5.QtCore import Qt
+from PyQt5.QtCore import Qt, QThread, QTimer, pyqtSignal
 
 from ..core.config import VIBE_CATEGORIES, WINDOW_MIN_WIDTH, WINDOW_MIN_HEIGHT, WINDOW_TITLE
 from ..styles import components
@@ -10,9 +10,10 @@ from .playlist_widget import PlaylistWidget
 from .record_widget import RecordWidget
 
 class AddToPlaylistDialog(QDialog):
-    def __init__(self, song, parent=None):
+    def __init__(self, song, vibe=None, parent=None):
         super().__init__(parent)
         self.song = song
+        self.vibe = vibe
         self.selected_playlist = None
         self.setup_ui()
 
@@ -31,12 +32,24 @@ class AddToPlaylistDialog(QDialog):
         song_info.setStyleSheet(components.DIALOG_SONG_INFO)
         song_info.setAlignment(Qt.AlignCenter)
         layout.addWidget(song_info)
-        
+
+        # Best matching vibe first when the capture was analysed
+        order = list(VIBE_CATEGORIES)
+        if self.vibe:
+            features = QLabel(f"~{self.vibe['tempo']:.0f} BPM \u00b7 {self.vibe['key']}")
+            features.setStyleSheet(components.DIALOG_VIBE_INFO)
+            features.setAlignment(Qt.AlignCenter)
+            layout.addWidget(features)
+            order = [v for v in self.vibe['ranking'] if v in VIBE_CATEGORIES]
+
         # Add playlist buttons
-        for vibe_id, vibe_info in VIBE_CATEGORIES.items():
-            btn = QPushButton(vibe_info['name'])
-            btn.setStyleSheet(components.DIALOG_BUTTON(vibe_info['color']))
+        for index, vibe_id in enumerate(order):
+            name = VIBE_CATEGORIES[vibe_id]['name']
+            btn = QPushButton(f"{name} (Suggested)" if self.vibe and index == 0 else name)
+            btn.setStyleSheet(components.DIALOG_BUTTON(components.colors.VIBE_COLORS[vibe_id]))
             btn.clicked.connect(lambda checked, v=vibe_id: self.select_playlist(v))
+            if self.vibe and index == 0:
+                btn.setDefault(True)
             layout.addWidget(btn)
 
     def select_playlist(self, playlist_id):
@@ -44,12 +57,27 @@ class AddToPlaylistDialog(QDialog):
         self.selected_playlist = playlist_id
         self.accept()
 
+class PlaylistLoader(QThread):
+    """Reads the playlist files off the GUI thread"""
+    loaded = pyqtSignal()
+
+    def __init__(self, audio_manager, parent=None):
+        super().__init__(parent)
+        self.audio_manager = audio_manager
+
+    def run(self):
+        self.audio_manager.load_playlists()
+        self.loaded.emit()
+
 class MainWindow(QMainWindow):
     def __init__(self, audio_manager):
         super().__init__()
         self.audio_manager = audio_manager
+        self.playlist_loader = None
         self.setup_ui()
-        self.load_playlists()
+        self.audio_manager.song_replayed.connect(self.handle_song_replayed)
+        # Load after the first paint so a large library never delays the window
+        QTimer.singleShot(0, self.load_playlists)
 
     def setup_ui(self):
         """Initialize the UI components"""
@@ -100,6 +128,7 @@ class MainWindow(QMainWindow):
         # Add record widget
         self.record_widget = RecordWidget()
         self.record_widget.recording_started.connect(self.start_recording)
+        self.record_widget.monitoring_toggled.connect(self.toggle_monitoring)
         main_layout.addWidget(self.record_widget)
         
         # Create playlists section
@@ -121,11 +150,18 @@ class MainWindow(QMainWindow):
         main_layout.addWidget(playlists_section)
 
     def load_playlists(self):
-        """Load existing playlists"""
+        """Load existing playlists in the background"""
+        self.playlist_loader = PlaylistLoader(self.audio_manager, self)
+        self.playlist_loader.loaded.connect(self.show_playlists)
+        self.playlist_loader.start()
+
+    def show_playlists(self):
+        """Fill the playlist widgets once loading is done"""
         for vibe_id in VIBE_CATEGORIES:
             songs = self.audio_manager.get_playlist(vibe_id)
-            for song in songs:
-                self.playlist_widgets[vibe_id].add_song(song['title'], song['artist'])
+            self.playlist_widgets[vibe_id].set_songs(songs)
+        # Captures queued during an earlier outage go into the playlists now
+        self.audio_manager.resume_offline_queue()
 
     def start_recording(self):
         """Start the recording process"""
@@ -133,33 +169,82 @@ class MainWindow(QMainWindow):
         self.record_widget.update_status("")
         
         # Connect signals from audio manager
-        self.audio_manager.progress_updated.connect(self.record_widget.update_progress)
+        self.audio_manager.meter_updated.connect(self.record_widget.update_meter)
         self.audio_manager.status_updated.connect(self.record_widget.update_status)
         self.audio_manager.recording_finished.connect(self.handle_recording_finished)
         
         # Start recording
         self.audio_manager.start_recording()
 
+    def toggle_monitoring(self, enabled):
+        """Start or stop continuous monitoring"""
+        if not enabled:
+            self.audio_manager.stop_recording()
+            return
+
+        self.record_widget.update_status("")
+        self.audio_manager.meter_updated.connect(self.record_widget.update_meter)
+        self.audio_manager.status_updated.connect(self.record_widget.update_status)
+        self.audio_manager.recording_finished.connect(self.handle_recording_finished)
+        self.audio_manager.song_changed.connect(self.handle_song_changed)
+        self.audio_manager.start_monitoring()
+
+    def handle_song_changed(self, song):
+        """Handle a new song heard while monitoring"""
+        self.record_widget.update_status(f"Now playing: '{song['title']}' by {song['artist']}")
+
     def handle_recording_finished(self, result):
         """Handle recording completion"""
         # Disconnect signals
-        self.audio_manager.progress_updated.disconnect(self.record_widget.update_progress)
+        self.audio_manager.meter_updated.disconnect(self.record_widget.update_meter)
         self.audio_manager.status_updated.disconnect(self.record_widget.update_status)
         self.audio_manager.recording_finished.disconnect(self.handle_recording_finished)
         
         # Reset record widget
         self.record_widget.stop_recording()
+
+        if result and 'monitoring' in result:
+            self.audio_manager.song_changed.disconnect(self.handle_song_changed)
+            self.record_widget.update_status("Monitoring stopped. Click to start listening.")
+            return
         
         if result and 'song' in result:
             song = result['song']
-            self.show_playlist_dialog(song)
+            self.show_playlist_dialog(song, result.get('vibe'))
+        elif result and result.get('queued'):
+            self.record_widget.update_status(
+                f"Recognition is unavailable. {result['message']}. Click to record another song."
+            )
+        elif result and 'message' in result:
+            self.record_widget.update_status(
+                f"No music detected: {result['message']}. Click to try again."
+            )
         else:
             self.record_widget.update_status("Couldn't recognize the song. Click to try again.")
 
-    def show_playlist_dialog(self, song):
+    def handle_song_replayed(self, song, entry):
+        """Show a song recognized from the offline queue in its playlist"""
+        playlist_id = entry.get('playlist')
+        if playlist_id in self.playlist_widgets:
+            self.playlist_widgets[playlist_id].add_song(song['title'], song['artist'])
+            # Leave the status of a capture in progress alone
+            if self.record_widget.record_button.isEnabled():
+                self.record_widget.update_status(
+                    f"Recognized '{song['title']}' from an earlier capture and added it to "
+                    f"{VIBE_CATEGORIES[playlist_id]['name']}."
+                )
+
+    def show_playlist_dialog(self, song, vibe=None):
         """Show dialog to select playlist"""
-        dialog = AddToPlaylistDialog(song, self)
-        if dialog.exec_() == QDialog.Accepted and dialog.selected_playlist:
+        # Non-blocking: the event loop keeps running while the dialog is open
+        dialog = AddToPlaylistDialog(song, vibe, self)
+        dialog.finished.connect(lambda code: self.handle_playlist_selected(dialog, song, code))
+        dialog.open()
+
+    def handle_playlist_selected(self, dialog, song, code):
+        """Add the song to the playlist picked in the dialog"""
+        dialog.deleteLater()
+        if code == QDialog.Accepted and dialog.selected_playlist:
             playlist_id = dialog.selected_playlist
             # Update both the playlist widget and the audio manager's playlist
             if self.audio_manager.add_to_playlist(song, playlist_id):
@@ -0,0 +1,77 @@
+from typing import Optional
+
+from PyQt5.QtCore import QPointF, QRectF
+from PyQt5.QtGui import QColor, QPainter, QPen, QPolygonF
+from PyQt5.QtWidgets import QSizePolicy, QWidget
+
+from ..styles import colors
+
+
+class MeterWidget(QWidget):
+    """Live input meter: spectrum bars, the recent waveform and a level bar.
+
+    Frames come from the core LevelMeter at a fixed rate; the widget only
+    repaints when one arrives.
+    """
+    LEVEL_BAR_HEIGHT = 4
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.frame: Optional[dict] = None
+        self.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Fixed)
+        self.setFixedHeight(40)
+        self.setToolTip("Input level: the bars should move with the music")
+
+    def set_frame(self, frame: dict):
+        self.frame = frame
+        self.update()
+
+    def clear(self):
+        self.frame = None
+        self.update()
+
+    @staticmethod
+    def level_color(level: float) -> QColor:
+        if level > 0.95:
+            return QColor(colors.RED)
+        if level > 0.8:
+            return QColor(colors.YELLOW)
+        return QColor(colors.GREEN)
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.setRenderHint(QPainter.Antialiasing)
+        painter.fillRect(self.rect(), QColor(colors.CURRENT_LINE))
+        if not self.frame:
+            return
+
+        width = self.width()
+        height = self.height() - self.LEVEL_BAR_HEIGHT
+
+        spectrum = self.frame.get('spectrum') or []
+        if spectrum:
+            bar_width = width / len(spectrum)
+            bar_color = QColor(colors.PURPLE)
+            bar_color.setAlpha(160)
+            for i, value in enumerate(spectrum):
+                bar_height = value * height
+                painter.fillRect(
+                    QRectF(i * bar_width + 1, height - bar_height, bar_width - 2, bar_height),
+                    bar_color
+                )
+
+        waveform = self.frame.get('waveform') or []
+        if len(waveform) > 1:
+            middle = height / 2
+            step = width / (len(waveform) - 1)
+            # Peaks mirrored around the middle line, as an outline
+            upper = [QPointF(i * step, middle - value * middle) for i, value in enumerate(waveform)]
+            lower = [QPointF(i * step, middle + value * middle) for i, value in enumerate(waveform)]
+            painter.setPen(QPen(QColor(colors.CYAN), 1))
+            painter.drawPolyline(QPolygonF(upper))
+            painter.drawPolyline(QPolygonF(lower))
+
+        level = self.frame.get('level', 0.0)
+        painter.fillRect(
+            QRectF(0, height, width * level, self.LEVEL_BAR_HEIGHT), self.level_color(level)
+        )
@@ -0,0 +1,114 @@
+from typing import List, Optional
+
+from PyQt5.QtCore import QAbstractListModel, QModelIndex, Qt
+
+from ..core.catalog import normalize_name
+
+
+class SongListModel(QAbstractListModel):
+    """List model over a playlist's songs.
+
+    Rows are exposed to the view in batches through canFetchMore/fetchMore,
+    so opening a huge playlist only builds the rows that are scrolled to.
+    Songs added afterwards always get a row straight away, below the fetched
+    ones; rows fetched later are inserted above them. Duplicates are rejected
+    with a hash set instead of scanning the rows.
+    """
+    FETCH_BATCH = 200
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        # Shown rows: the first _fetched songs of set_songs(), then added ones
+        self._rows: List[dict] = []
+        self._fetched = 0
+        # Songs from set_songs() not fetched into rows yet
+        self._unfetched: List[dict] = []
+        self._next = 0
+        self._seen = set()
+
+    def rowCount(self, parent=QModelIndex()) -> int:
+        if parent.isValid():
+            return 0
+        return len(self._rows)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or index.row() >= len(self._rows):
+            return None
+        if role in (Qt.DisplayRole, Qt.ToolTipRole):
+            return self.song_text(self._rows[index.row()])
+        return None
+
+    def canFetchMore(self, parent=QModelIndex()) -> bool:
+        if parent.isValid():
+            return False
+        return self._next < len(self._unfetched)
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid():
+            return
+        batch = self._unfetched[self._next:self._next + self.FETCH_BATCH]
+        if not batch:
+            return
+        self.beginInsertRows(QModelIndex(), self._fetched, self._fetched + len(batch) - 1)
+        self._rows[self._fetched:self._fetched] = batch
+        self._fetched += len(batch)
+        self._next += len(batch)
+        self.endInsertRows()
+        if self._next == len(self._unfetched):
+            self._unfetched = []
+            self._next = 0
+
+    @staticmethod
+    def song_text(song: dict) -> str:
+        return f"{song['title']} - {song['artist']}"
+
+    def set_songs(self, songs: List[dict]):
+        """Replace all songs in one model reset"""
+        self.beginResetModel()
+        unique = []
+        self._seen = set()
+        for song in songs:
+            name = normalize_name(song['title'], song['artist'])
+            if name not in self._seen:
+                self._seen.add(name)
+                unique.append(song)
+        self._rows = unique[:self.FETCH_BATCH]
+        self._fetched = len(self._rows)
+        self._unfetched = unique
+        self._next = self._fetched
+        if self._next == len(unique):
+            self._unfetched = []
+            self._next = 0
+        self.endResetModel()
+
+    def add_songs(self, songs: List[dict]) -> int:
+        """Append songs in one batch, skipping duplicates; returns how many were added"""
+        new_songs = []
+        for song in songs:
+            name = normalize_name(song['title'], song['artist'])
+            if name not in self._seen:
+                self._seen.add(name)
+                new_songs.append(song)
+        if not new_songs:
+            return 0
+
+        self.beginInsertRows(QModelIndex(), len(self._rows), len(self._rows) + len(new_songs) - 1)
+        self._rows.extend(new_songs)
+        self.endInsertRows()
+        return len(new_songs)
+
+    def contains(self, title: str, artist: str) -> bool:
+        return normalize_name(title, artist) in self._seen
+
+    def clear(self):
+        self.set_songs([])
+
+    def song_texts(self) -> List[str]:
+        """Display text of every song in playlist order, fetched into the view or not"""
+        songs = self._rows[:self._fetched] + self._unfetched[self._next:] + self._rows[self._fetched:]
+        return [self.song_text(song) for song in songs]
+
+    def last_index(self) -> Optional[QModelIndex]:
+        if not self._rows:
+            return None
+        return self.index(len(self._rows) - 1)
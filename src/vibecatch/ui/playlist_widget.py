@@ -1,17 +1,21 @@
+from typing import List
+
 from PyQt5.QtWidgets import (
     QFrame, QVBoxLayout, QHBoxLayout, QLabel, 
-    QListWidget, QSizePolicy, QPushButton
+    QListView, QSizePolicy, QPushButton
 )
-from PyQt5.QtCore import Qt
+from PyQt5.QtCore import Qt, QTimer
 from PyQt5.QtGui import QClipboard, QGuiApplication
 
 from ..styles import components
+from .playlist_model import SongListModel
 
 class PlaylistWidget(QFrame):
     def __init__(self, vibe_id, vibe_info):
         super().__init__()
         self.vibe_id = vibe_id
         self.vibe_info = vibe_info
+        self._scroll_pending = False
         self.setup_ui()
 
     def setup_ui(self):
@@ -38,7 +42,7 @@ class PlaylistWidget(QFrame):
         
         # Add title
         title = QLabel(self.vibe_info['name'])
-        title.setStyleSheet(components.PLAYLIST_TITLE(self.vibe_info['color']))
+        title.setStyleSheet(components.PLAYLIST_TITLE(components.colors.VIBE_COLORS[self.vibe_id]))
         title.setAlignment(Qt.AlignLeft)
         title_layout.addWidget(title)
         
@@ -72,33 +76,44 @@ class PlaylistWidget(QFrame):
         
         layout.addWidget(header)
         
-        # Add song list
-        self.song_list = QListWidget()
+        # Add song list; uniform rows let the view skip measuring every item
+        self.song_model = SongListModel(self)
+        self.song_list = QListView()
+        self.song_list.setModel(self.song_model)
         self.song_list.setStyleSheet(components.SONG_LIST)
         self.song_list.setHorizontalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
         self.song_list.setVerticalScrollBarPolicy(Qt.ScrollBarAsNeeded)
-        self.song_list.setWordWrap(True)
+        self.song_list.setUniformItemSizes(True)
+        self.song_list.setTextElideMode(Qt.ElideRight)
+        self.song_list.setEditTriggers(QListView.NoEditTriggers)
         layout.addWidget(self.song_list)
 
+    def set_songs(self, songs: List[dict]):
+        """Show a whole playlist at once"""
+        self.song_model.set_songs(songs)
+
+    def add_songs(self, songs: List[dict]) -> int:
+        """Add several songs in one batch"""
+        return self.song_model.add_songs(songs)
+
     def add_song(self, title: str, artist: str) -> bool:
         """Add a song to the playlist"""
-        item_text = f"{title} - {artist}"
-        # Check if song already exists
-        for i in range(self.song_list.count()):
-            if self.song_list.item(i).text() == item_text:
-                return False
-        
-        # Add new song
-        self.song_list.addItem(item_text)
-        # Ensure the new item is visible
-        self.song_list.scrollToBottom()
+        if not self.song_model.add_songs([{'title': title, 'artist': artist}]):
+            return False
+        # Ensure the new item is visible. Scrolling lays out every row, so it
+        # happens once per event loop pass however many songs were added.
+        if not self._scroll_pending:
+            self._scroll_pending = True
+            QTimer.singleShot(0, self.scroll_to_bottom)
         return True
 
+    def scroll_to_bottom(self):
+        self._scroll_pending = False
+        self.song_list.scrollToBottom()
+
     def copy_song_list(self):
         """Copy all songs to clipboard"""
-        songs = []
-        for i in range(self.song_list.count()):
-            songs.append(self.song_list.item(i).text())
+        songs = self.song_model.song_texts()
         
         if songs:
             text = f"{self.vibe_info['name']} Playlist:\n" + "\n".join(songs)
@@ -107,11 +122,8 @@ class PlaylistWidget(QFrame):
 
     def clear(self):
         """Clear all songs from the playlist"""
-        self.song_list.clear()
+        self.song_model.clear()
 
     def get_songs(self):
         """Get all songs in the playlist"""
-        songs = []
-        for i in range(self.song_list.count()):
-            songs.append(self.song_list.item(i).text())
-        return songs
+        return self.song_model.song_texts()
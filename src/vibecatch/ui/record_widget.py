@@ -1,11 +1,15 @@
-from PyQt5.QtWidgets import QFrame, QVBoxLayout, QPushButton, QProgressBar, QLabel, QSizePolicy
+from PyQt5.QtWidgets import (
+    QFrame, QVBoxLayout, QHBoxLayout, QPushButton, QProgressBar, QLabel, QSizePolicy
+)
 from PyQt5.QtCore import Qt, pyqtSignal
 
 from ..styles import components
+from .meter_widget import MeterWidget
 
 class RecordWidget(QFrame):
     # Signals
     recording_started = pyqtSignal()
+    monitoring_toggled = pyqtSignal(bool)
     
     def __init__(self):
         super().__init__()
@@ -21,12 +25,25 @@ class RecordWidget(QFrame):
         layout.setSpacing(4)
         layout.setContentsMargins(6, 6, 6, 6)
         
-        # Add record button
+        # Add record and monitor buttons side by side
+        buttons = QHBoxLayout()
+        buttons.setSpacing(4)
+
         self.record_button = QPushButton("Click to Start Listening")
         self.record_button.setStyleSheet(components.RECORD_BUTTON)
         self.record_button.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Fixed)
         self.record_button.clicked.connect(self.start_recording)
-        layout.addWidget(self.record_button)
+        buttons.addWidget(self.record_button, stretch=3)
+
+        self.monitor_button = QPushButton("Monitor")
+        self.monitor_button.setCheckable(True)
+        self.monitor_button.setStyleSheet(components.MONITOR_BUTTON)
+        self.monitor_button.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Fixed)
+        self.monitor_button.setToolTip("Keep listening and report every song change")
+        self.monitor_button.toggled.connect(self.toggle_monitoring)
+        buttons.addWidget(self.monitor_button, stretch=1)
+
+        layout.addLayout(buttons)
         
         # Add progress bar
         self.progress = QProgressBar()
@@ -35,6 +52,11 @@ class RecordWidget(QFrame):
         self.progress.setMinimumHeight(20)
         self.progress.hide()
         layout.addWidget(self.progress)
+
+        # Add live input meter
+        self.meter = MeterWidget()
+        self.meter.hide()
+        layout.addWidget(self.meter)
         
         # Add status label
         self.status_label = QLabel()
@@ -45,27 +67,53 @@ class RecordWidget(QFrame):
         layout.addWidget(self.status_label)
 
         # Set fixed height for consistent layout
-        self.setFixedHeight(120)
+        self.setFixedHeight(168)
 
     def start_recording(self):
         """Start the recording process"""
         self.record_button.setEnabled(False)
+        self.monitor_button.setEnabled(False)
         self.record_button.setText("Listening...")
         self.progress.setValue(0)
         self.progress.show()
+        self.meter.clear()
+        self.meter.show()
         self.status_label.clear()
         self.recording_started.emit()
 
     def stop_recording(self):
         """Stop the recording process"""
         self.record_button.setEnabled(True)
+        self.monitor_button.setEnabled(True)
+        self.monitor_button.blockSignals(True)
+        self.monitor_button.setChecked(False)
+        self.monitor_button.blockSignals(False)
         self.record_button.setText("Click to Start Listening")
         self.progress.hide()
+        self.meter.hide()
+
+    def toggle_monitoring(self, checked: bool):
+        """Start or stop continuous monitoring"""
+        self.record_button.setEnabled(not checked)
+        self.record_button.setText("Monitoring..." if checked else "Click to Start Listening")
+        if checked:
+            self.meter.clear()
+            self.meter.show()
+        else:
+            # Wait for the worker to wind down before allowing a new run
+            self.monitor_button.setEnabled(False)
+        self.monitoring_toggled.emit(checked)
 
     def update_progress(self, value: int):
         """Update the progress bar"""
         self.progress.setValue(value)
 
+    def update_meter(self, frame: dict):
+        """Show a level meter frame and the capture progress it carries"""
+        if frame.get('progress') is not None:
+            self.progress.setValue(frame['progress'])
+        self.meter.set_frame(frame)
+
     def update_status(self, message: str):
         """Update the status label"""
         self.status_label.setText(message)
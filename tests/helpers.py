@@ -0,0 +1,18 @@
+"""Synthetic audio shared by the tests"""
+import numpy as np
+
+from vibecatch.core.config import SAMPLE_RATE
+
+
+def synthetic_song(seed: int, seconds: float = 8.0) -> np.ndarray:
+    """Random three-note chords, a new one every quarter second"""
+    rng = np.random.default_rng(seed)
+    step = SAMPLE_RATE // 4
+    t = np.arange(step) / SAMPLE_RATE
+    notes = 220.0 * 2 ** (np.arange(49) / 12)
+    chords = []
+    for _ in range(int(seconds * 4)):
+        freqs = rng.choice(notes, 3, replace=False)
+        chords.append(sum(np.sin(2 * np.pi * f * t) for f in freqs) * np.hanning(step))
+    audio = np.concatenate(chords) * 8000 + rng.normal(0, 100, step * len(chords))
+    return audio.astype(np.int16)
@@ -0,0 +1,106 @@
+"""AudioGate decisions on music, noise, hum, speech and silence"""
+import numpy as np
+
+from helpers import synthetic_song
+from vibecatch.core.audio_gate import AudioGate
+from vibecatch.core.config import SAMPLE_RATE
+
+SECONDS = 5
+
+
+def times(seconds=SECONDS):
+    return np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+
+
+def pcm(signal, peak=12000):
+    return (signal / np.max(np.abs(signal)) * peak).astype(np.int16).tobytes()
+
+
+def legato_song(seed):
+    """Overlapping soft-attack notes over a kick drum, no gaps"""
+    rng = np.random.default_rng(seed)
+    audio = np.zeros(SECONDS * SAMPLE_RATE)
+    step = SAMPLE_RATE // 9
+    notes = 220.0 * 2 ** (np.arange(36) / 12)
+    for start in range(0, len(audio), step):
+        t = np.arange(min(2 * step, len(audio) - start)) / SAMPLE_RATE
+        envelope = np.minimum(1, t * 50) * np.exp(-t)
+        f = rng.choice(notes)
+        audio[start:start + len(t)] += (np.sin(2 * np.pi * f * t) + 0.3 * np.sin(4 * np.pi * f * t)) * envelope
+    for start in range(0, len(audio), SAMPLE_RATE // 2):
+        t = np.arange(min(int(0.15 * SAMPLE_RATE), len(audio) - start)) / SAMPLE_RATE
+        audio[start:start + len(t)] += 1.5 * np.sin(2 * np.pi * (60 + 80 * np.exp(-t * 30)) * t) * np.exp(-t * 20)
+    return pcm(audio + rng.normal(0, 0.01, len(audio)))
+
+
+def glide():
+    """A tone sliding up three octaves: tonal and moving, but no attacks"""
+    t = times()
+    phase = 2 * np.pi * np.cumsum(220.0 * 2 ** (3 * t / SECONDS)) / SAMPLE_RATE
+    return pcm(np.sin(phase) + 0.3 * np.sin(2 * phase))
+
+
+def white_noise():
+    return pcm(np.random.default_rng(0).normal(0, 1, SECONDS * SAMPLE_RATE))
+
+
+def hum(mains=50.0):
+    """Mains hum with harmonics and a slow level wobble"""
+    t = times()
+    level = 1 + 0.1 * np.sin(2 * np.pi * 0.7 * t)
+    return pcm(level * (np.sin(2 * np.pi * mains * t) + 0.5 * np.sin(4 * np.pi * mains * t)))
+
+
+def speech(seed):
+    """Voiced syllables separated by pauses"""
+    rng = np.random.default_rng(seed)
+    audio = np.zeros(SECONDS * SAMPLE_RATE)
+    position = 0
+    while position < len(audio):
+        length = int(rng.uniform(0.15, 0.4) * SAMPLE_RATE)
+        t = np.arange(min(length, len(audio) - position)) / SAMPLE_RATE
+        f0 = rng.uniform(100, 180)
+        voiced = sum(np.sin(2 * np.pi * f0 * k * t) / k for k in range(1, 15))
+        audio[position:position + len(t)] = voiced * np.hanning(len(t))
+        position += length + int(rng.uniform(0.3, 0.8) * SAMPLE_RATE)
+    return pcm(audio + rng.normal(0, 0.0005, len(audio)))
+
+
+def test_music_passes():
+    gate = AudioGate()
+    for clip in (synthetic_song(1, SECONDS).tobytes(), synthetic_song(2, SECONDS).tobytes(),
+                 legato_song(1), legato_song(2)):
+        result = gate.check(clip)
+        assert result['passed'], result
+        assert result['onset_rate'] >= gate.min_onset_rate
+
+
+def test_tonal_clip_without_onsets_passes():
+    result = AudioGate().check(glide())
+    assert result['onset_rate'] < AudioGate().min_onset_rate
+    assert result['passed'], result
+
+
+def test_white_noise_is_noise():
+    assert AudioGate().check(white_noise())['reason'] == 'noise'
+
+
+def test_hum_is_static():
+    gate = AudioGate()
+    for mains in (50.0, 60.0):
+        result = gate.check(hum(mains))
+        assert result['reason'] == 'static', result
+        assert not gate.is_tonal(result)
+
+
+def test_speech_is_rejected():
+    for seed in (0, 3):
+        assert AudioGate().check(speech(seed))['reason'] == 'speech'
+
+
+def test_silence_and_empty_capture():
+    gate = AudioGate()
+    assert gate.check(np.zeros(SECONDS * SAMPLE_RATE, np.int16).tobytes())['reason'] == 'silence'
+    assert gate.check(b'')['reason'] == 'silence'
+    stats = gate.stats()
+    assert stats['checked'] == 2 and stats['rejected']['silence'] == 2
@@ -0,0 +1,132 @@
+"""Batch segmenting, checkpoint resume and the WAV-to-ffmpeg fallback"""
+import json
+import threading
+import wave
+
+import pytest
+
+import vibecatch.core.audio_file as audio_file
+from helpers import synthetic_song
+from vibecatch.core.audio_file import iter_segments
+from vibecatch.core.backends import RecognitionBackend
+from vibecatch.core.batch import BatchRecognizer, Checkpoint
+from vibecatch.core.config import SAMPLE_RATE
+
+
+class CountingBackend(RecognitionBackend):
+    name = 'counting'
+
+    def __init__(self):
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def recognize(self, pcm):
+        with self._lock:
+            self.calls += 1
+        return {'title': f"Song {len(pcm)}", 'artist': 'Batch', 'key': str(len(pcm))}
+
+
+@pytest.fixture
+def files(tmp_path):
+    paths = []
+    for seed in (1, 2):
+        path = str(tmp_path / f"set{seed}.wav")
+        with wave.open(path, 'wb') as wf:
+            wf.setnchannels(1)
+            wf.setsampwidth(2)
+            wf.setframerate(SAMPLE_RATE)
+            wf.writeframes(synthetic_song(seed, 6).tobytes())
+        paths.append(path)
+    return paths
+
+
+def run(files, checkpoint_path, backend, resume=True, on_record=None):
+    checkpoint = Checkpoint(checkpoint_path, resume=resume)
+    try:
+        return BatchRecognizer(backend, checkpoint, workers=2, rate_limit=0, segment=2, hop=2,
+                               on_record=on_record).run(files)
+    finally:
+        checkpoint.close()
+
+
+def offsets(checkpoint_path):
+    with open(checkpoint_path) as f:
+        return sorted((json.loads(line)['file'], json.loads(line)['offset']) for line in f)
+
+
+def test_wav_segments_every_hop(files):
+    segments = list(iter_segments(files[0], 2, 2))
+    assert [offset for offset, _ in segments] == [0.0, 2.0, 4.0]
+    assert all(len(pcm) == 2 * 2 * SAMPLE_RATE for _, pcm in segments)
+
+
+def test_resume_skips_finished_segments(files, tmp_path):
+    path = str(tmp_path / 'checkpoint.jsonl')
+    recorded = []
+
+    def interrupt(record):
+        recorded.append(record)
+        if len(recorded) == 2:
+            raise KeyboardInterrupt  # Ctrl+C part way through the run
+
+    with pytest.raises(KeyboardInterrupt):
+        run(files, path, CountingBackend(), on_record=interrupt)
+    finished = len(offsets(path))
+    assert finished == 2
+
+    backend = CountingBackend()
+    stats = run(files, path, backend)
+    assert stats['skipped'] == finished
+    assert backend.calls == 6 - finished
+    # Every segment exactly once
+    assert offsets(path) == sorted((f, float(o)) for f in files for o in (0, 2, 4))
+
+
+def test_restart_ignores_the_checkpoint(files, tmp_path):
+    path = str(tmp_path / 'checkpoint.jsonl')
+    run(files, path, CountingBackend())
+    backend = CountingBackend()
+    run(files, path, backend, resume=False)
+    assert backend.calls == 6
+    assert len(offsets(path)) == 6
+
+
+def test_torn_checkpoint_line_is_cut_before_appending(files, tmp_path):
+    path = tmp_path / 'checkpoint.jsonl'
+    run(files[:1], str(path), CountingBackend())
+    with open(path, 'a') as f:
+        f.write('{"file": "torn')
+
+    backend = CountingBackend()
+    run(files, str(path), backend)
+    assert backend.calls == 3
+    # Every line parses, so a third run resumes fully
+    assert len(offsets(str(path))) == 6
+    assert len(Checkpoint(str(path)).done) == 6
+
+
+def test_ffmpeg_fallback_continues_after_the_last_wav_segment(monkeypatch, tmp_path):
+    def wav_segments(path, length, hop, rate):
+        yield 0.0, b'wav0'
+        yield 2.0, b'wav2'
+        raise wave.Error("unknown format")
+
+    def ffmpeg_segments(path, length, hop, rate):
+        for offset in (0.0, 2.0, 4.0, 6.0):
+            yield offset, f"ffmpeg{offset:g}".encode()
+
+    monkeypatch.setattr(audio_file, '_wav_segments', wav_segments)
+    monkeypatch.setattr(audio_file, '_ffmpeg_segments', ffmpeg_segments)
+    segments = list(iter_segments(str(tmp_path / 'odd.wav'), 2, 2))
+    assert segments == [(0.0, b'wav0'), (2.0, b'wav2'), (4.0, b'ffmpeg4'), (6.0, b'ffmpeg6')]
+
+
+def test_undecodable_wav_goes_to_ffmpeg_whole(monkeypatch, tmp_path):
+    def wav_segments(path, length, hop, rate):
+        raise wave.Error("unknown format: 3")
+        yield
+
+    monkeypatch.setattr(audio_file, '_wav_segments', wav_segments)
+    monkeypatch.setattr(audio_file, '_ffmpeg_segments',
+                        lambda path, length, hop, rate: iter([(0.0, b'a'), (2.0, b'b')]))
+    assert list(iter_segments(str(tmp_path / 'float.wav'), 2, 2)) == [(0.0, b'a'), (2.0, b'b')]
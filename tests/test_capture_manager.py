@@ -0,0 +1,51 @@
+"""Device selection, native-rate resampling and per-device counters"""
+import threading
+
+import numpy as np
+import pytest
+
+from vibecatch.core.capture_manager import CaptureSource, resolve_devices, to_sample_rate
+from vibecatch.core.config import SAMPLE_RATE
+
+DEVICES = [
+    {'index': 1, 'name': 'Room A mic', 'channels': 1, 'rate': 44100},
+    {'index': 2, 'name': 'Line-in B', 'channels': 2, 'rate': 48000},
+]
+
+
+def test_devices_by_index_or_name():
+    assert resolve_devices(DEVICES, [2]) == [DEVICES[1]]
+    assert resolve_devices(DEVICES, ['line-in', '2', 'mic']) == [DEVICES[1], DEVICES[0]]
+    with pytest.raises(ValueError):
+        resolve_devices(DEVICES, ['speakers'])
+
+
+def test_48k_capture_is_resampled():
+    t = np.arange(48000) / 48000
+    clip = (10000 * np.sin(2 * np.pi * 1000 * t)).astype(np.int16)
+    resampled = to_sample_rate(clip, 48000)
+    assert resampled.dtype == np.int16
+    assert len(resampled) == SAMPLE_RATE
+    spectrum = np.abs(np.fft.rfft(resampled))
+    assert np.argmax(spectrum) == 1000  # one second, so bins are 1 Hz apart
+    assert np.abs(resampled).max() == pytest.approx(10000, rel=0.02)
+
+
+def test_source_uses_the_device_rate():
+    assert CaptureSource(DEVICES[1], session=None).rate == 48000
+    assert CaptureSource(dict(DEVICES[0], rate=0), session=None).rate == SAMPLE_RATE
+
+
+def test_counters_are_not_lost_across_threads():
+    source = CaptureSource(DEVICES[0], session=None)
+
+    def count():
+        for _ in range(10000):
+            source.count('attempts')
+
+    threads = [threading.Thread(target=count) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert source.counters()['attempts'] == 80000
@@ -0,0 +1,77 @@
+"""Catalog records, lookups and migration from the version 1 playlists.json"""
+import json
+
+from vibecatch.core.catalog import CATALOG_VERSION, Catalog
+from vibecatch.core.playlist_store import PlaylistStore
+
+SONG_A = {'title': 'Ready 2 Go', 'artist': 'Shermanology', 'key': '714164044'}
+SONG_B = {'title': 'Mock Sunrise', 'artist': 'The Test Tones', 'key': 'mock-1'}
+SONG_C = {'title': 'Offline Anthem', 'artist': 'Localhost'}
+
+# playlists.json as written before the catalog: full song dicts, repeated
+VERSION_1 = {
+    'excitement': [SONG_A, SONG_B, dict(SONG_C, album='Extra fields are dropped')],
+    'happiness': [dict(SONG_A, title='READY 2 GO'), SONG_C],
+    'relaxation': [],
+}
+
+
+def test_version_1_is_migrated():
+    catalog = Catalog()
+    assert catalog.load_json(json.loads(json.dumps(VERSION_1)))
+    # One track per song, however many playlists list it
+    assert len(catalog) == 3
+    assert catalog.song_count == 5
+    assert [track.title for track in catalog.songs('excitement')] == [
+        'Ready 2 Go', 'Mock Sunrise', 'Offline Anthem']
+    assert catalog.songs('happiness')[0] is catalog.songs('excitement')[0]
+    assert catalog.playlists_of(SONG_C) == ['excitement', 'happiness']
+    # Empty playlists survive
+    assert catalog.songs('relaxation') == []
+    assert 'relaxation' in catalog.playlists
+    assert catalog.songs('excitement')[2].to_dict() == dict(SONG_C, key='')
+
+
+def test_migrated_catalog_round_trips_as_version_2():
+    catalog = Catalog()
+    catalog.load_json(VERSION_1)
+    data = json.loads(json.dumps(Catalog.to_json(catalog.export())))
+    assert data['version'] == CATALOG_VERSION
+    assert data['tracks'][0] == ['Ready 2 Go', 'Shermanology', '714164044']
+    assert data['playlists'] == {'excitement': [0, 1, 2], 'happiness': [0, 2], 'relaxation': []}
+
+    reloaded = Catalog()
+    assert not reloaded.load_json(data)
+    assert reloaded.playlists_of(SONG_A) == ['excitement', 'happiness']
+    assert reloaded.contains('happiness', {'title': 'offline  anthem', 'artist': 'LOCALHOST'})
+    assert not reloaded.contains('relaxation', SONG_A)
+
+
+def test_key_learned_after_a_name_only_entry():
+    catalog = Catalog()
+    catalog.add(SONG_C, 'excitement')
+    assert not catalog.add(dict(SONG_C, key='mock-2'), 'excitement')
+    assert catalog.find({'title': 'Renamed', 'artist': 'x', 'key': 'mock-2'}).title == 'Offline Anthem'
+
+
+def test_strings_are_interned():
+    catalog = Catalog()
+    catalog.load_json(json.loads(json.dumps(VERSION_1)))
+    other = Catalog()
+    other.load_json(json.loads(json.dumps(VERSION_1)))
+    assert catalog.tracks[0].artist is other.tracks[0].artist
+
+
+def test_store_migrates_a_version_1_file(tmp_path):
+    path = str(tmp_path / 'playlists.json')
+    with open(path, 'w') as f:
+        json.dump({'excitement': [SONG_A, SONG_B], 'happiness': [SONG_A]}, f)
+    store = PlaylistStore(path, str(tmp_path / 'playlists.journal'), write_behind=False, fsync=False)
+    store.load()
+    assert [track.title for track in store.get('excitement')] == ['Ready 2 Go', 'Mock Sunrise']
+    assert store.playlists_of(SONG_A) == ['excitement', 'happiness']
+    with open(path) as f:
+        data = json.load(f)
+    assert data['version'] == CATALOG_VERSION
+    # Stored once, referenced from both playlists
+    assert len(data['tracks']) == 2
@@ -0,0 +1,91 @@
+"""Fingerprint index matching, merging, eviction and saving"""
+import json
+import time
+
+import numpy as np
+
+from vibecatch.core.config import SAMPLE_RATE
+from vibecatch.core.fingerprint import FingerprintIndex, fingerprint
+
+from helpers import synthetic_song
+
+
+def song_info(i):
+    return {'title': f"Song {i}", 'artist': 'Artist', 'key': str(i)}
+
+
+def test_matches_a_later_capture_of_a_learned_song():
+    songs = [synthetic_song(seed) for seed in range(4)]
+    index = FingerprintIndex()
+    for i, song in enumerate(songs):
+        index.add(song_info(i), song[:5 * SAMPLE_RATE])
+    for i, song in enumerate(songs):
+        match = index.match(song[2 * SAMPLE_RATE:6 * SAMPLE_RATE])
+        assert match[0]['key'] == str(i)
+        assert match[1] >= 15
+
+
+def test_merged_index_equals_a_full_sort():
+    index = FingerprintIndex()
+    all_hashes = []
+    for i in range(5):
+        samples = synthetic_song(10 + i, seconds=3)
+        index.add(song_info(i), samples)
+        all_hashes.append(fingerprint(samples)[0])
+    assert np.array_equal(index.hashes, np.sort(np.concatenate(all_hashes)))
+    assert len(index.hashes) == len(index.entry_tracks) == len(index.offsets)
+
+
+def test_precomputed_fingerprint_gives_the_same_match():
+    song = synthetic_song(3)
+    index = FingerprintIndex()
+    index.add_fingerprint(song_info(0), *fingerprint(song[:5 * SAMPLE_RATE]))
+    capture = song[SAMPLE_RATE:5 * SAMPLE_RATE]
+    assert index.match(capture) == index.match_fingerprint(*fingerprint(capture))
+
+
+def test_least_recently_used_tracks_are_evicted():
+    songs = [synthetic_song(20 + i, seconds=3) for i in range(4)]
+    sizes = [len(fingerprint(song)[0]) for song in songs]
+    index = FingerprintIndex(max_entries=sizes[0] + sum(sizes[2:]))
+    index.add(song_info(0), songs[0])
+    index.add(song_info(1), songs[1])
+    index.touch('0')
+    index.add(song_info(2), songs[2])
+    index.add(song_info(3), songs[3])
+    assert [track['key'] for track in index.tracks] == ['0', '2', '3']
+    assert len(index.hashes) <= index.max_entries
+    assert index.match(songs[0])[0]['key'] == '0'
+    assert index.match(songs[3])[0]['key'] == '3'
+
+
+def test_saves_are_batched_and_flushed_on_close(tmp_path):
+    path = str(tmp_path / 'fingerprints.npz')
+    index = FingerprintIndex(path, save_delay=60)
+    index.add(song_info(0), synthetic_song(30, seconds=3))
+    index.schedule_save()
+    index.add(song_info(1), synthetic_song(31, seconds=3))
+    index.schedule_save()
+    assert not (tmp_path / 'fingerprints.npz').exists()
+    index.close()
+    assert len(FingerprintIndex.load(path)) == 2
+
+
+def test_delayed_save_happens_without_close(tmp_path):
+    path = str(tmp_path / 'fingerprints.npz')
+    index = FingerprintIndex(path, save_delay=0.05)
+    index.add(song_info(0), synthetic_song(32, seconds=3))
+    index.schedule_save()
+    time.sleep(0.5)
+    assert len(FingerprintIndex.load(path)) == 1
+
+
+def test_loads_an_index_saved_without_track_state(tmp_path):
+    index = FingerprintIndex()
+    index.add(song_info(0), synthetic_song(33, seconds=3))
+    path = tmp_path / 'old.npz'
+    with open(path, 'wb') as f:
+        np.savez(f, tracks=np.array(json.dumps(index.tracks)), hashes=index.hashes,
+                 entry_tracks=index.entry_tracks, offsets=index.offsets)
+    loaded = FingerprintIndex.load(str(path))
+    assert np.array_equal(loaded.next_offsets, index.next_offsets)
@@ -0,0 +1,84 @@
+"""Level meter throttling and frame contents"""
+import numpy as np
+import pytest
+
+from vibecatch.core.audio_manager import AudioManager
+from vibecatch.core.config import CHUNK_SIZE, SAMPLE_RATE
+from vibecatch.core.level_meter import LevelMeter
+
+
+def chunk_times(seconds, start=0.0):
+    """When each captured chunk arrives"""
+    return start + np.arange(0, seconds, CHUNK_SIZE / SAMPLE_RATE)
+
+
+def test_frames_are_throttled_to_the_meter_rate():
+    meter = LevelMeter(rate=25)
+    frames = sum(meter.due(now) for now in chunk_times(2.0))
+    # About 43 chunks a second come in, 25 frames a second go out
+    assert 49 <= frames <= 51
+
+
+def test_missed_frames_are_skipped_not_burst():
+    meter = LevelMeter(rate=25)
+    assert meter.due(0.0)
+    # Nothing was asked for a whole second, then chunks resume
+    sent = [meter.due(now) for now in chunk_times(0.1, start=1.0)]
+    assert sent[0]
+    assert sum(sent) <= 3
+
+
+def test_reset_makes_the_next_frame_due():
+    meter = LevelMeter(rate=25)
+    assert meter.due(10.0)
+    assert not meter.due(10.01)
+    meter.reset()
+    assert meter.due(10.01)
+
+
+def test_frame_of_a_tone():
+    meter = LevelMeter()
+    t = np.arange(SAMPLE_RATE) / SAMPLE_RATE
+    frame = meter.measure((32767 * np.sin(2 * np.pi * 1000 * t)).astype(np.int16))
+    assert frame['peak'] == pytest.approx(1.0, abs=0.01)
+    # A full-scale sine has an RMS 3 dB under its peak
+    assert frame['level'] == pytest.approx(1 - 3.01 / 60, abs=0.01)
+    assert len(frame['waveform']) == meter.points
+    spectrum = frame['spectrum']
+    assert max(spectrum) == pytest.approx(1.0, abs=0.02)
+    assert spectrum.index(max(spectrum)) == 8  # 1 kHz on the 60 Hz - 12 kHz log scale
+    assert all(0.0 <= value <= 1.0 for value in spectrum + frame['waveform'])
+
+
+def test_frame_of_silence():
+    frame = LevelMeter().measure(np.zeros(SAMPLE_RATE, dtype=np.int16))
+    assert frame['level'] == 0.0 and frame['peak'] == 0.0
+    assert max(frame['spectrum']) == 0.0
+    assert LevelMeter().measure(np.zeros(0, dtype=np.int16))['waveform'] == []
+
+
+class Ring:
+    def latest(self, count):
+        return np.zeros(count, dtype=np.int16)
+
+
+class Audio:
+    ring = Ring()
+
+
+def test_manager_coalesces_chunks_into_meter_frames():
+    manager = AudioManager()
+    manager._audio = Audio()
+    manager._meter = LevelMeter(rate=25)
+    frames, progress = [], []
+    manager.meter_updated.connect(frames.append)
+    manager.progress_updated.connect(progress.append)
+
+    for _ in range(200):
+        manager.update_meter(50)
+    # A burst of chunks within one frame interval yields one update
+    assert len(frames) == 1 and progress == [50]
+    assert frames[0]['progress'] == 50
+
+    manager.update_meter(100, force=True)
+    assert len(frames) == 2 and progress == [50, 100]
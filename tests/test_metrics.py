@@ -0,0 +1,78 @@
+"""Metrics registry: spans, counters and the JSON and Prometheus outputs"""
+import json
+import re
+
+import pytest
+
+from vibecatch.core.metrics import MetricsRegistry, SpanStats
+
+
+@pytest.fixture
+def registry():
+    registry = MetricsRegistry(prefix='test')
+    for ms in range(1, 101):
+        registry.observe('recognize', ms / 1000)
+    registry.observe('encode', 0.002)
+    registry.increment('cache_hits')
+    registry.increment('cache_hits', 2)
+    registry.increment('recognitions')
+    return registry
+
+
+def test_span_quantiles_use_recent_samples():
+    stats = SpanStats(samples=10)
+    for ms in range(1, 101):
+        stats.observe(ms / 1000)
+    assert stats.count == 100
+    assert stats.max == pytest.approx(0.1)
+    # Only the last ten observations, 91..100 ms
+    assert stats.quantiles()[0.5] == pytest.approx(0.096)
+    assert SpanStats().quantiles() == {}
+
+
+def test_span_times_a_block_that_raises():
+    registry = MetricsRegistry()
+    with pytest.raises(RuntimeError):
+        with registry.span('upload'):
+            raise RuntimeError
+    assert registry.spans['upload'].count == 1
+
+
+def test_snapshot_is_json(registry):
+    snapshot = json.loads(json.dumps(registry.snapshot()))
+    recognize = snapshot['spans']['recognize']
+    assert recognize['count'] == 100
+    assert recognize['mean_ms'] == pytest.approx(50.5)
+    assert recognize['max_ms'] == pytest.approx(100)
+    assert recognize['p50_ms'] == pytest.approx(51)
+    assert recognize['p99_ms'] == pytest.approx(100)
+    assert snapshot['counters'] == {'cache_hits': 3, 'recognitions': 1}
+    assert list(snapshot['spans']) == ['encode', 'recognize']
+
+
+def test_prometheus_text(registry):
+    text = registry.to_prometheus()
+    lines = text.splitlines()
+    assert text.endswith('\n')
+    assert '# TYPE test_span_seconds summary' in lines
+    assert 'test_span_seconds{span="recognize",quantile="0.9"} 0.091000' in lines
+    assert 'test_span_seconds_sum{span="recognize"} 5.050000' in lines
+    assert 'test_span_seconds_count{span="encode"} 1' in lines
+    assert '# TYPE test_cache_hits_total counter' in lines
+    assert 'test_cache_hits_total 3' in lines
+    # Every sample line is `name{labels} value` or `name value`
+    sample = re.compile(r'^[a-z_]+(\{[a-z]+="[^"]*"(,[a-z]+="[^"]*")*\})? [0-9.]+$')
+    assert all(sample.match(line) for line in lines if not line.startswith('#'))
+
+
+def test_dump_picks_the_format_from_the_extension(registry, tmp_path):
+    registry.dump(str(tmp_path / 'metrics.json'))
+    registry.dump(str(tmp_path / 'metrics.prom'))
+    assert json.loads((tmp_path / 'metrics.json').read_text())['counters']['recognitions'] == 1
+    assert (tmp_path / 'metrics.prom').read_text() == registry.to_prometheus()
+    assert not list(tmp_path.glob('*.tmp'))
+
+
+def test_reset(registry):
+    registry.reset()
+    assert registry.snapshot()['spans'] == {} and registry.snapshot()['counters'] == {}
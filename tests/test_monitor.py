@@ -0,0 +1,93 @@
+"""Song change detection and monitoring through device failures"""
+import threading
+
+import numpy as np
+
+import vibecatch.core.audio_manager as audio_manager
+from vibecatch.core.audio_manager import AudioManager
+from vibecatch.core.monitor import SongChangeDetector
+
+SONG_A = {'title': 'Ready 2 Go', 'artist': 'Shermanology', 'key': '714164044'}
+SONG_B = {'title': 'Mock Sunrise', 'artist': 'The Test Tones', 'key': 'mock-1'}
+
+
+def test_first_match_is_a_change():
+    detector = SongChangeDetector(clear_after=3)
+    assert detector.update(SONG_A)
+    assert detector.current == SONG_A
+    assert detector.update(SONG_B)
+
+
+def test_repeats_are_reported_once():
+    detector = SongChangeDetector(clear_after=3)
+    assert detector.update(SONG_A)
+    assert not detector.update(SONG_A)
+    # Without a key, by normalized title and artist
+    assert detector.update({'title': 'Offline Anthem', 'artist': 'Localhost'})
+    assert not detector.update({'title': 'OFFLINE ANTHEM', 'artist': 'localhost'})
+    assert detector.update(SONG_A)
+    # A miss or two in between does not forget it
+    assert not detector.update(None)
+    assert not detector.update(None)
+    assert not detector.update(SONG_A)
+
+
+def test_song_is_cleared_after_misses():
+    detector = SongChangeDetector(clear_after=3)
+    detector.update(SONG_A)
+    for _ in range(3):
+        assert not detector.update(None)
+    assert detector.current is None
+    assert detector.update(SONG_A)
+
+
+class Ring:
+    def latest(self, count):
+        return np.zeros(count, dtype=np.int16)
+
+
+class FlakyAudio:
+    """Stalls on the first stream, then delivers frames"""
+
+    def __init__(self):
+        self.ring = Ring()
+        self.overflows = 0
+        self.opened = 0
+        self.written = 0
+
+    def start_stream(self):
+        self.opened += 1
+        return self.written
+
+    def wait(self, position):
+        if self.opened == 1:
+            raise IOError("Audio device stopped delivering frames")
+        self.written = position + audio_manager.SAMPLE_RATE
+        return self.written
+
+    def stop_stream(self):
+        pass
+
+
+class Backend:
+    def recognize(self, pcm):
+        return SONG_A
+
+
+def test_monitor_reopens_a_stalled_device(monkeypatch):
+    monkeypatch.setattr(audio_manager, 'CAPTURE_RETRY_DELAY', 0.01)
+    manager = AudioManager()
+    manager._audio = FlakyAudio()
+    manager._backend = Backend()
+    manager.gate_enabled = False
+    changed = threading.Event()
+    manager.song_changed.connect(lambda song: changed.set())
+
+    manager.start_monitoring()
+    try:
+        assert changed.wait(5)
+    finally:
+        manager.stop_recording()
+        manager.wait(5)
+    assert manager._audio.opened == 2
+    assert not manager.is_running()
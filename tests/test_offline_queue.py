@@ -0,0 +1,102 @@
+"""Offline queue durability and replay"""
+import os
+
+import numpy as np
+import pytest
+import requests
+
+from vibecatch.core.backends import RecognitionBackend
+from vibecatch.core.offline_queue import OfflineQueue, OfflineReplayer, is_unavailable
+from vibecatch.core.recognition_client import RecognitionUnavailable
+
+PCM = (np.random.default_rng(0).normal(0, 2000, 44100)).astype(np.int16).tobytes()
+SONG = {'title': 'Ready 2 Go', 'artist': 'Shermanology', 'key': '714164044'}
+
+
+class ScriptedBackend(RecognitionBackend):
+    name = 'scripted'
+
+    def __init__(self, *results):
+        self.results = list(results)
+        self.calls = 0
+
+    def recognize(self, pcm):
+        self.calls += 1
+        result = self.results.pop(0) if self.results else SONG
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+
+@pytest.fixture
+def queue(tmp_path):
+    return OfflineQueue(str(tmp_path / 'queue'), max_entries=10)
+
+
+def replayer_for(queue, backend, added):
+    return OfflineReplayer(queue, lambda: backend, lambda song, playlist: added.append((song, playlist)))
+
+
+@pytest.mark.parametrize('error, unavailable', [
+    (RecognitionUnavailable('circuit open'), True),
+    (requests.ConnectionError(), True),
+    (requests.Timeout(), True),
+    (requests.HTTPError(), False),
+    (FileNotFoundError(), False),
+    (ValueError(), False),
+])
+def test_is_unavailable(error, unavailable):
+    assert is_unavailable(error) == unavailable
+
+
+def test_replay_files_songs_in_their_playlist(queue):
+    queue.put(PCM, playlist='happiness')
+    queue.put(PCM)
+    added = []
+    replayer = replayer_for(queue, ScriptedBackend(SONG, None), added)
+    assert replayer.drain()
+    assert added == [(SONG, 'happiness')]
+    assert len(queue) == 0
+    assert replayer.stats == {'replayed': 2, 'recognized': 1, 'unrecognized': 1}
+
+
+def test_outage_keeps_the_queue(queue):
+    queue.put(PCM)
+    replayer = replayer_for(queue, ScriptedBackend(requests.ConnectionError()), [])
+    assert not replayer.drain()
+    entries = queue.entries()
+    assert len(entries) == 1
+    assert entries[0]['attempts'] == 1
+
+
+def test_other_errors_drop_the_capture(queue):
+    queue.put(PCM)
+    replayer = replayer_for(queue, ScriptedBackend(ValueError('bad response')), [])
+    assert replayer.drain()
+    assert len(queue) == 0
+
+
+def test_missing_wav_does_not_block_the_queue(queue):
+    first = queue.put(PCM)
+    queue.put(PCM)
+    os.remove(os.path.join(queue.directory, f"{first}.wav"))
+    backend = ScriptedBackend()
+    assert replayer_for(queue, backend, []).drain()
+    assert len(queue) == 0
+    assert backend.calls == 1
+
+
+def test_clean_removes_orphans(queue):
+    complete = queue.put(PCM)
+    with open(os.path.join(queue.directory, 'torn.wav'), 'wb') as f:
+        f.write(b'RIFF')
+    with open(os.path.join(queue.directory, 'lost.json'), 'w') as f:
+        f.write('{"id": "lost"}')
+    queue.clean()
+    assert sorted(os.listdir(queue.directory)) == [f"{complete}.json", f"{complete}.wav"]
+
+
+def test_oldest_captures_are_dropped_beyond_the_limit(tmp_path):
+    queue = OfflineQueue(str(tmp_path / 'queue'), max_entries=2)
+    ids = [queue.put(PCM) for _ in range(3)]
+    assert [entry['id'] for entry in queue.entries()] == ids[1:]
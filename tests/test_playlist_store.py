@@ -0,0 +1,96 @@
+"""Playlist store journal recovery and catalog format"""
+import json
+
+import pytest
+
+from vibecatch.core.catalog import CATALOG_VERSION
+from vibecatch.core.playlist_store import PlaylistStore
+
+SONG_A = {'title': 'Ready 2 Go', 'artist': 'Shermanology', 'key': '714164044'}
+SONG_B = {'title': 'Mock Sunrise', 'artist': 'The Test Tones', 'key': 'mock-1'}
+SONG_C = {'title': 'Offline Anthem', 'artist': 'Localhost', 'key': 'mock-2'}
+
+
+@pytest.fixture
+def paths(tmp_path):
+    return str(tmp_path / 'playlists.json'), str(tmp_path / 'playlists.journal')
+
+
+def open_store(paths, **kwargs):
+    path, journal_path = paths
+    kwargs.setdefault('write_behind', False)
+    kwargs.setdefault('fsync', False)
+    store = PlaylistStore(path, journal_path, **kwargs)
+    store.load()
+    return store
+
+
+def titles(store, playlist_id):
+    return [track.title for track in store.get(playlist_id)]
+
+
+def test_journal_is_replayed_after_a_crash(paths):
+    store = open_store(paths, compact_every=100)
+    assert store.add(SONG_A, 'excitement')
+    assert store.add(SONG_B, 'excitement')
+    assert store.add(SONG_A, 'happiness')
+    # No close(): the journal is all there is on disk
+    reloaded = open_store(paths)
+    assert titles(reloaded, 'excitement') == ['Ready 2 Go', 'Mock Sunrise']
+    assert titles(reloaded, 'happiness') == ['Ready 2 Go']
+    assert not reloaded.add(SONG_A, 'excitement')
+
+
+def test_torn_journal_line_is_skipped_and_compacted(paths):
+    path, journal_path = paths
+    store = open_store(paths, compact_every=100)
+    store.add(SONG_A, 'excitement')
+    store.add(SONG_B, 'excitement')
+    store._journal.close()
+    with open(journal_path, 'a') as f:
+        f.write('{"op": "add", "playlist": "hyped", "so')
+
+    reloaded = open_store(paths)
+    assert titles(reloaded, 'excitement') == ['Ready 2 Go', 'Mock Sunrise']
+    # Rewritten as a snapshot, so new entries never follow the torn line
+    with open(path) as f:
+        assert json.load(f)['version'] == CATALOG_VERSION
+    assert reloaded.add(SONG_C, 'excitement')
+    assert titles(open_store(paths), 'excitement') == ['Ready 2 Go', 'Mock Sunrise', 'Offline Anthem']
+
+
+def test_snapshot_plus_journal(paths):
+    store = open_store(paths, compact_every=1)
+    store.add(SONG_A, 'excitement')  # compacted into the snapshot
+    store.compact_every = 100
+    store.add(SONG_B, 'excitement')  # journal only
+    reloaded = open_store(paths)
+    assert titles(reloaded, 'excitement') == ['Ready 2 Go', 'Mock Sunrise']
+
+
+def test_close_compacts_pending_entries(paths):
+    path, journal_path = paths
+    store = open_store(paths, compact_every=100)
+    store.add(SONG_A, 'relaxation')
+    store.close()
+    with open(path) as f:
+        data = json.load(f)
+    assert data['tracks'] == [['Ready 2 Go', 'Shermanology', '714164044']]
+    assert data['playlists']['relaxation'] == [0]
+
+
+def test_write_behind_flush_and_reload(paths):
+    store = open_store(paths, write_behind=True, compact_every=100)
+    for song in (SONG_A, SONG_B, SONG_C):
+        store.add(song, 'emotional')
+    assert store.flush(timeout=5)
+    assert titles(open_store(paths), 'emotional') == ['Ready 2 Go', 'Mock Sunrise', 'Offline Anthem']
+    store.close()
+
+
+def test_duplicates_match_by_key_or_normalized_name(paths):
+    store = open_store(paths)
+    assert store.add(SONG_A, 'excitement')
+    assert not store.add({'title': 'ready  2 go', 'artist': 'SHERMANOLOGY'}, 'excitement')
+    assert not store.add({'title': 'Other title', 'artist': 'x', 'key': '714164044'}, 'excitement')
+    assert not store.add(SONG_B, 'no-such-playlist')
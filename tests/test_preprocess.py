@@ -0,0 +1,56 @@
+"""Upload preprocessing: resampling, segment choice and scaling"""
+import numpy as np
+import pytest
+
+from vibecatch.core.config import MAX_FILE_SIZE, SAMPLE_RATE, UPLOAD_MAX_SECONDS, UPLOAD_PEAK_LEVEL
+from vibecatch.core.preprocess import (
+    WAV_HEADER_SIZE, loudest_segment, max_upload_samples, prepare_upload, resample
+)
+
+
+def tone(freq, seconds, rate=SAMPLE_RATE, amplitude=8000):
+    t = np.arange(int(seconds * rate)) / rate
+    return (amplitude * np.sin(2 * np.pi * freq * t)).astype(np.int16)
+
+
+def test_resample_keeps_length_and_pitch():
+    out = resample(tone(440, 2.0), SAMPLE_RATE, 16000)
+    assert len(out) == 32000
+    assert np.argmax(np.abs(np.fft.rfft(out))) == 880  # 0.5 Hz bins over two seconds
+    assert np.abs(out).max() == pytest.approx(8000, rel=0.02)
+    assert resample(tone(440, 0.1), SAMPLE_RATE, SAMPLE_RATE).dtype == np.float32
+
+
+def test_loudest_segment():
+    samples = np.concatenate([np.full(100, 1.0), np.full(50, 5.0), np.full(100, 2.0)])
+    assert loudest_segment(samples, 50).tolist() == [5.0] * 50
+    assert len(loudest_segment(samples[:30], 50)) == 30
+
+
+def test_upload_fits_duration_and_byte_caps():
+    assert max_upload_samples(16000) == 16000 * UPLOAD_MAX_SECONDS
+    assert max_upload_samples(16000, max_bytes=WAV_HEADER_SIZE + 2000, max_seconds=None) == 1000
+
+
+def test_prepare_upload_picks_the_loud_part_and_normalizes():
+    quiet = tone(440, 4.0, amplitude=500)
+    loud = tone(880, UPLOAD_MAX_SECONDS, amplitude=4000)
+    pcm = np.concatenate([quiet, loud, quiet]).tobytes()
+
+    upload, rate = prepare_upload(pcm)
+    samples = np.frombuffer(upload, dtype=np.int16)
+    assert rate == 16000
+    assert len(samples) == 16000 * UPLOAD_MAX_SECONDS
+    # Peak at UPLOAD_PEAK_LEVEL of full scale
+    assert np.abs(samples).max() == pytest.approx(UPLOAD_PEAK_LEVEL * 32767, rel=0.01)
+    # The loud tone, not the quiet one
+    spectrum = np.abs(np.fft.rfft(samples))
+    freqs = np.fft.rfftfreq(len(samples), 1 / rate)
+    assert freqs[np.argmax(spectrum)] == pytest.approx(880, abs=1)
+    assert len(upload) + WAV_HEADER_SIZE <= MAX_FILE_SIZE
+
+
+def test_prepare_upload_without_resampling():
+    upload, rate = prepare_upload(tone(440, 1.0).tobytes(), target_rate=None)
+    assert rate == SAMPLE_RATE
+    assert len(upload) == 2 * SAMPLE_RATE
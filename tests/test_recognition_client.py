@@ -0,0 +1,146 @@
+"""RecognitionClient retries, timeouts and circuit breaker against the mock API"""
+import threading
+import time
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+from vibecatch.core.mock_server import MockShazamHandler
+from vibecatch.core.recognition_client import (
+    CircuitBreaker, RecognitionClient, RecognitionUnavailable
+)
+
+WAV = b'RIFF' + b'\0' * 64
+
+
+class ScriptedHandler(MockShazamHandler):
+    """Mock API answering with the next status of `script`, then 200"""
+    script = []
+    retry_after = None
+    requests = 0
+    lock = threading.Lock()
+
+    def do_POST(self):
+        with self.lock:
+            type(self).requests += 1
+            status = self.script.pop(0) if self.script else 200
+        if status == 200:
+            self.status = 200
+            return super().do_POST()
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        time.sleep(self.latency)
+        self.send_response(status)
+        if self.retry_after is not None:
+            self.send_header('Retry-After', self.retry_after)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+
+@pytest.fixture
+def mock_api():
+    servers = []
+
+    def start(script=(), latency=0.0, retry_after=None):
+        handler = type('Handler', (ScriptedHandler,), {
+            'script': list(script), 'latency': latency, 'retry_after': retry_after, 'requests': 0
+        })
+        server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return handler, f"http://127.0.0.1:{server.server_port}/shazam/recognize/"
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def make_client(endpoint, **kwargs):
+    kwargs.setdefault('backoff_factor', 0.01)
+    kwargs.setdefault('read_timeout', 2.0)
+    return RecognitionClient(endpoint=endpoint, use_scheduler=False, **kwargs)
+
+
+@pytest.mark.parametrize('status', [500, 502, 503, 504, 429])
+def test_retries_retryable_statuses(mock_api, status):
+    handler, endpoint = mock_api(script=[status, status])
+    client = make_client(endpoint, max_retries=2)
+    result = client.recognize(WAV)
+    assert result['track']['title']
+    assert handler.requests == 3
+    assert not client.breaker.is_open
+
+
+def test_gives_up_after_max_retries(mock_api):
+    handler, endpoint = mock_api(script=[503] * 10)
+    client = make_client(endpoint, max_retries=2)
+    with pytest.raises(RecognitionUnavailable):
+        client.recognize(WAV)
+    assert handler.requests == 3
+
+
+def test_client_errors_are_not_retried(mock_api):
+    handler, endpoint = mock_api(script=[400])
+    client = make_client(endpoint, max_retries=3)
+    assert client.recognize(WAV) is None
+    assert handler.requests == 1
+
+
+def test_waits_for_retry_after(mock_api):
+    handler, endpoint = mock_api(script=[429], retry_after='1')
+    client = make_client(endpoint, max_retries=1)
+    start = time.monotonic()
+    assert client.recognize(WAV) is not None
+    assert time.monotonic() - start >= 1.0
+    assert handler.requests == 2
+
+
+def test_backoff_grows_exponentially():
+    client = make_client('http://127.0.0.1:9/', backoff_factor=0.5)
+    assert [client.backoff_delay(attempt) for attempt in range(3)] == [0.5, 1.0, 2.0]
+
+
+def test_read_timeout_is_retried_then_unavailable(mock_api):
+    handler, endpoint = mock_api(latency=1.0)
+    client = make_client(endpoint, max_retries=1, read_timeout=0.1)
+    start = time.monotonic()
+    with pytest.raises(RecognitionUnavailable):
+        client.recognize(WAV)
+    assert time.monotonic() - start < 1.0
+    assert handler.requests == 2
+
+
+def test_breaker_opens_and_fails_fast(mock_api):
+    handler, endpoint = mock_api(script=[503] * 10)
+    client = make_client(endpoint, max_retries=0,
+                         breaker=CircuitBreaker(failure_threshold=2, reset_timeout=60))
+    for _ in range(2):
+        with pytest.raises(RecognitionUnavailable):
+            client.recognize(WAV)
+    assert client.breaker.is_open
+    with pytest.raises(RecognitionUnavailable):
+        client.recognize(WAV)
+    assert handler.requests == 2
+
+
+def test_half_open_trial_closes_or_reopens(mock_api):
+    handler, endpoint = mock_api(script=[503, 503])
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.2)
+    client = make_client(endpoint, max_retries=0, breaker=breaker)
+    with pytest.raises(RecognitionUnavailable):
+        client.recognize(WAV)
+    assert breaker.is_open
+
+    # The trial after the cool-down fails, so the circuit opens again
+    time.sleep(0.25)
+    with pytest.raises(RecognitionUnavailable):
+        client.recognize(WAV)
+    assert breaker.is_open
+    assert not breaker.allow_request()
+
+    # The next trial succeeds and closes it
+    time.sleep(0.25)
+    assert client.recognize(WAV) is not None
+    assert not breaker.is_open
+    assert handler.requests == 3
@@ -0,0 +1,97 @@
+"""Result cache hits must line up in time, and entries survive a restart"""
+import numpy as np
+import pytest
+
+from vibecatch.core.config import SAMPLE_RATE
+from vibecatch.core.result_cache import ResultCache, acoustic_signature
+
+from helpers import synthetic_song
+
+SONG = {'title': 'Ready 2 Go', 'artist': 'Shermanology', 'key': '714164044'}
+
+
+def capture(song: np.ndarray, start: float, seconds: float = 5.0) -> bytes:
+    first = int(start * SAMPLE_RATE)
+    return song[first:first + int(seconds * SAMPLE_RATE)].tobytes()
+
+
+@pytest.fixture(scope='module')
+def songs():
+    return [synthetic_song(seed) for seed in range(6)]
+
+
+def test_recapture_of_the_same_passage_hits(songs):
+    cache = ResultCache(path=None)
+    cache.put(acoustic_signature(capture(songs[0], 1.0)), SONG)
+    assert cache.get(acoustic_signature(capture(songs[0], 2.0))) == SONG
+    assert cache.stats()['hits'] == 1
+
+
+def test_unrelated_captures_miss(songs):
+    cache = ResultCache(path=None)
+    for i, song in enumerate(songs[:3]):
+        cache.put(acoustic_signature(capture(song, 0.5)), dict(SONG, key=str(i)))
+    for song in songs[3:]:
+        assert cache.get(acoustic_signature(capture(song, 1.0))) is None
+
+
+def test_same_hashes_out_of_alignment_miss(songs):
+    cache = ResultCache(path=None)
+    values, offsets = acoustic_signature(capture(songs[0], 1.0))
+    cache.put((values, offsets), SONG)
+    # Every hash shared, but at unrelated times
+    shuffled = np.random.default_rng(0).permutation(offsets * 7)
+    assert cache.get((values, shuffled)) is None
+
+
+def test_entries_are_appended_and_reloaded(tmp_path, songs):
+    path = str(tmp_path / 'cache.jsonl')
+    cache = ResultCache(path=path)
+    for i in range(3):
+        cache.put(acoustic_signature(capture(songs[i], 0.0)), dict(SONG, key=str(i)))
+    cache.close()
+    with open(path) as f:
+        assert len(f.readlines()) == 3
+
+    reloaded = ResultCache(path=path)
+    assert reloaded.get(acoustic_signature(capture(songs[1], 1.0)))['key'] == '1'
+
+
+def test_log_is_compacted_and_evicts_oldest(tmp_path, songs):
+    path = str(tmp_path / 'cache.jsonl')
+    cache = ResultCache(path=path, max_entries=2)
+    for i in range(5):
+        cache.put(acoustic_signature(capture(songs[i], 0.0)), dict(SONG, key=str(i)))
+    cache.close()
+    with open(path) as f:
+        assert len(f.readlines()) <= 4
+    reloaded = ResultCache(path=path, max_entries=2)
+    assert len(reloaded.entries) == 2
+    assert reloaded.get(acoustic_signature(capture(songs[0], 1.0))) is None
+    assert reloaded.get(acoustic_signature(capture(songs[4], 1.0)))['key'] == '4'
+
+
+def test_old_format_file_is_discarded(tmp_path):
+    path = tmp_path / 'cache.jsonl'
+    path.write_text('{"entries": [{"signature": [1, 2, 3], "song": {}, "time": 0}]}')
+    cache = ResultCache(path=str(path))
+    assert len(cache.entries) == 0
+    assert path.read_text() == ''
+
+
+def test_malformed_lines_are_skipped(tmp_path, songs):
+    path = str(tmp_path / 'cache.jsonl')
+    cache = ResultCache(path=path)
+    cache.put(acoustic_signature(capture(songs[0], 0.0)), SONG)
+    cache.close()
+    with open(path, 'a') as f:
+        f.write('{"signature": [[1, 2]], "song": {}}\n')  # no time
+        f.write('{"signature": [[1, 2]], "song": "x", "time": 0}\n')
+        f.write('{"signature": [[1, 2]], "song": {}, "time": "soon"}\n')
+
+    reloaded = ResultCache(path=path)
+    assert len(reloaded.entries) == 1
+    assert reloaded.get(acoustic_signature(capture(songs[0], 1.0)))['key'] == SONG['key']
+    # Compacted, so the bad lines are gone
+    with open(path) as f:
+        assert len(f.readlines()) == 1
@@ -0,0 +1,58 @@
+"""RingBuffer wraparound and reader positions"""
+import numpy as np
+
+from vibecatch.core.ring_buffer import RingBuffer
+
+
+def samples(start, count):
+    return np.arange(start, start + count, dtype=np.int16)
+
+
+def test_latest_before_full():
+    ring = RingBuffer(8)
+    ring.write(samples(0, 5))
+    assert ring.latest(8).tolist() == [0, 1, 2, 3, 4]
+    assert ring.latest(2).tolist() == [3, 4]
+
+
+def test_latest_after_wraparound_is_contiguous():
+    ring = RingBuffer(8)
+    written = 0
+    for size in (5, 6, 3, 7):
+        ring.write(samples(written, size))
+        written += size
+        expected = list(range(max(0, written - 8), written))
+        view = ring.latest(8)
+        assert view.tolist() == expected
+        # A view into the mirrored storage, never a copy
+        assert view.base is ring.data
+
+
+def test_write_larger_than_capacity_keeps_the_newest():
+    ring = RingBuffer(8)
+    ring.write(samples(0, 3))
+    ring.write(samples(3, 20))
+    assert ring.written == 23
+    assert ring.latest(8).tolist() == list(range(15, 23))
+
+
+def test_since_counts_dropped_samples():
+    ring = RingBuffer(8)
+    ring.write(samples(0, 4))
+    view, position, dropped = ring.since(0)
+    assert (view.tolist(), position, dropped) == ([0, 1, 2, 3], 4, 0)
+
+    ring.write(samples(4, 10))
+    view, position, dropped = ring.since(position)
+    assert view.tolist() == list(range(6, 14))
+    assert (position, dropped) == (14, 2)
+
+    view, position, dropped = ring.since(position)
+    assert (len(view), position, dropped) == (0, 14, 0)
+
+
+def test_wait_returns_once_written():
+    ring = RingBuffer(8)
+    assert ring.wait(0, timeout=0.01) == 0
+    ring.write(samples(0, 3))
+    assert ring.wait(0, timeout=0.01) == 3
@@ -0,0 +1,64 @@
+"""Priority and quota handling of the recognition scheduler"""
+import threading
+import time
+
+import pytest
+
+from vibecatch.core.scheduler import (
+    BACKGROUND, USER, RecognitionScheduler, SharedTokenBucket, request_priority
+)
+
+
+@pytest.fixture
+def bucket(tmp_path):
+    bucket = SharedTokenBucket(str(tmp_path / 'quota.json'), rate=5.0, capacity=1.0, min_rate=0.1)
+    yield bucket
+    bucket.close()
+
+
+def test_user_requests_go_before_background(bucket):
+    scheduler = RecognitionScheduler(bucket, max_wait=5)
+    assert scheduler.acquire(USER)  # empty the bucket
+    order = []
+
+    def wait_for_token(priority):
+        assert scheduler.acquire(priority)
+        order.append(priority)
+
+    background = threading.Thread(target=wait_for_token, args=(BACKGROUND,))
+    background.start()
+    time.sleep(0.05)
+    user = threading.Thread(target=wait_for_token, args=(USER,))
+    user.start()
+    background.join(5)
+    user.join(5)
+    assert order == [USER, BACKGROUND]
+    assert scheduler.stats()['granted_background'] == 1
+
+
+def test_priority_comes_from_context(bucket):
+    scheduler = RecognitionScheduler(bucket)
+    with request_priority(BACKGROUND):
+        assert scheduler.acquire()
+    assert scheduler.granted == {USER: 0, BACKGROUND: 1}
+
+
+def test_acquire_times_out(bucket):
+    scheduler = RecognitionScheduler(bucket)
+    assert scheduler.acquire(timeout=1)
+    assert not scheduler.acquire(timeout=0.05)
+    assert scheduler.timeouts == 1
+
+
+def test_429_blocks_every_caller(bucket):
+    scheduler = RecognitionScheduler(bucket)
+    scheduler.observe_response(429, {'Retry-After': '30'})
+    assert bucket.try_acquire() > 29
+
+
+def test_rate_follows_remaining_quota(bucket):
+    scheduler = RecognitionScheduler(bucket)
+    scheduler.observe_response(200, {
+        'X-RateLimit-Requests-Remaining': '10', 'X-RateLimit-Requests-Reset': '100'
+    })
+    assert bucket.state()['rate'] == pytest.approx(0.1)
@@ -0,0 +1,94 @@
+"""Tempo and key estimates, the vibe cache log and background analysis"""
+import json
+
+import numpy as np
+import pytest
+
+from vibecatch.core.config import SAMPLE_RATE
+from vibecatch.core.vibe_analysis import VibeCache, VibeSuggester, analyze
+
+VIBE = {'tempo': 120.0, 'key': 'C major', 'ranking': ['happiness']}
+
+
+def click_track(bpm: float, seconds: float = 8.0) -> bytes:
+    """Short 1 kHz clicks on every beat"""
+    audio = np.zeros(int(seconds * SAMPLE_RATE))
+    t = np.arange(int(0.05 * SAMPLE_RATE)) / SAMPLE_RATE
+    click = np.sin(2 * np.pi * 1000 * t) * np.exp(-t * 80)
+    for beat in range(int(seconds * bpm / 60)):
+        start = int(beat * 60 / bpm * SAMPLE_RATE)
+        audio[start:start + len(click)] += click[:len(audio) - start]
+    return (audio * 12000).astype(np.int16).tobytes()
+
+
+def progression(chords, seconds: float = 8.0) -> bytes:
+    """Sine triads given as MIDI note numbers, one after another"""
+    step = int(seconds * SAMPLE_RATE / len(chords))
+    t = np.arange(step) / SAMPLE_RATE
+    audio = np.concatenate([
+        sum(np.sin(2 * np.pi * 440 * 2 ** ((note - 69) / 12) * t) for note in chord) * np.hanning(step)
+        for chord in chords
+    ])
+    return (audio / np.abs(audio).max() * 12000).astype(np.int16).tobytes()
+
+
+@pytest.mark.parametrize('bpm', [90, 100, 120, 128, 140])
+def test_tempo_of_a_click_track(bpm):
+    assert analyze(click_track(bpm))['tempo'] == pytest.approx(bpm, rel=0.03)
+
+
+@pytest.mark.parametrize('key, chords', [
+    ('C major', [(60, 64, 67), (65, 69, 72), (67, 71, 74), (60, 64, 67)]),  # I IV V I
+    ('G major', [(67, 71, 74), (60, 64, 67), (62, 66, 69), (67, 71, 74)]),
+    ('A minor', [(57, 60, 64), (62, 65, 69), (64, 68, 71), (57, 60, 64)]),  # i iv V i
+])
+def test_key_of_a_chord_progression(key, chords):
+    features = analyze(progression(chords))
+    assert features['key'] == key
+    assert features['mode'] == key.split()[1]
+
+
+def test_cache_appends_and_reloads(tmp_path):
+    path = str(tmp_path / 'vibes.jsonl')
+    cache = VibeCache(path)
+    cache.put('1', VIBE)
+    cache.put('2', dict(VIBE, key='A minor'))
+    cache.close()
+    with open(path) as f:
+        assert len(f.readlines()) == 2
+    reloaded = VibeCache(path)
+    assert reloaded.get('2')['key'] == 'A minor'
+    assert reloaded.get('1') == VIBE
+
+
+def test_cache_log_is_compacted(tmp_path):
+    path = str(tmp_path / 'vibes.jsonl')
+    cache = VibeCache(path, max_entries=2)
+    for i in range(6):
+        cache.put(str(i), dict(VIBE, tempo=float(i)))
+    cache.close()
+    with open(path) as f:
+        assert len(f.readlines()) <= 4
+    reloaded = VibeCache(path, max_entries=2)
+    assert list(reloaded.entries) == ['4', '5']
+
+
+def test_torn_line_and_old_format_are_dropped(tmp_path):
+    path = tmp_path / 'vibes.jsonl'
+    path.write_text(json.dumps({'1': VIBE}) + '\n' + json.dumps({'key': '2', 'vibe': VIBE}) + '\n{"key": "3", "vi')
+    cache = VibeCache(str(path))
+    assert list(cache.entries) == ['2']
+    assert len(path.read_text().splitlines()) == 1
+
+
+def test_background_analysis_is_used_once_per_track(tmp_path):
+    suggester = VibeSuggester(VibeCache(str(tmp_path / 'vibes.jsonl')))
+    pcm = click_track(120, 4.0)
+    first = suggester.suggest({'key': '1'}, pcm, pending=suggester.start(pcm))
+    assert first['tempo'] == pytest.approx(120, rel=0.03)
+
+    # Cached: a second analysis is not needed and is cancelled or ignored
+    again = suggester.suggest({'key': '1'}, pcm, pending=suggester.start(pcm))
+    assert again == first
+    assert suggester.stats() == {'hits': 1, 'misses': 1, 'entries': 1}
+    suggester.close()
@@ -0,0 +1,211 @@
+"""RFC 6455 framing and the service's WebSocket handshake"""
+import asyncio
+import json
+import os
+import struct
+
+import pytest
+
+from vibecatch.core.backends import MockBackend
+from vibecatch.core.playlist_store import PlaylistStore
+from vibecatch.core.service import RecognitionService
+from vibecatch.core.websocket import (
+    OP_BINARY, OP_CLOSE, OP_CONTINUATION, OP_PING, OP_PONG, OP_TEXT, ProtocolError,
+    WebSocket, accept_key, encode_frame, unmask
+)
+
+
+def client_frame(opcode: int, payload: bytes, fin: bool = True, mask: bytes = b'\x12\x34\x56\x78') -> bytes:
+    """A masked frame as a browser would send it"""
+    first = (0x80 if fin else 0) | opcode
+    length = len(payload)
+    if length < 126:
+        header = struct.pack('!BB', first, 0x80 | length)
+    elif length < 1 << 16:
+        header = struct.pack('!BBH', first, 0x80 | 126, length)
+    else:
+        header = struct.pack('!BBQ', first, 0x80 | 127, length)
+    masked = bytes(b ^ mask[i % 4] for i, b in enumerate(payload))
+    return header + mask + masked
+
+
+class BufferWriter:
+    """Collects what the server writes"""
+
+    def __init__(self):
+        self.data = bytearray()
+
+    def write(self, data: bytes):
+        self.data += data
+
+    async def drain(self):
+        pass
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+async def receive_all(data: bytes, max_message: int = 1 << 20):
+    reader = asyncio.StreamReader()
+    reader.feed_data(data)
+    reader.feed_eof()
+    writer = BufferWriter()
+    ws = WebSocket(reader, writer, max_message)
+    messages = []
+    while True:
+        message = await ws.receive()
+        if message is None:
+            return messages, bytes(writer.data), ws
+        messages.append(message)
+
+
+def test_accept_key_matches_rfc_example():
+    assert accept_key('dGhlIHNhbXBsZSBub25jZQ==') == 's3pPLMBiTxaQ9kYGzzhZRbK+xOo='
+
+
+@pytest.mark.parametrize('length, header_size', [(0, 2), (125, 2), (126, 4), (65535, 4), (65536, 10)])
+def test_encode_frame_length_forms(length, header_size):
+    frame = encode_frame(OP_BINARY, b'x' * length)
+    assert len(frame) == header_size + length
+    assert frame[0] == 0x80 | OP_BINARY
+    # Server frames are never masked
+    assert not frame[1] & 0x80
+
+
+def test_unmask_round_trip():
+    payload = os.urandom(1001)
+    mask = b'\xde\xad\xbe\xef'
+    assert unmask(unmask(payload, mask), mask) == payload
+    assert unmask(b'', mask) == b''
+
+
+def test_receive_text_and_binary():
+    data = client_frame(OP_TEXT, 'héllo'.encode()) + client_frame(OP_BINARY, b'\x00\x01' * 100)
+    messages, _, _ = run(receive_all(data))
+    assert messages == ['héllo', b'\x00\x01' * 100]
+
+
+def test_receive_extended_lengths():
+    data = client_frame(OP_BINARY, b'a' * 300) + client_frame(OP_BINARY, b'b' * 70000)
+    messages, _, _ = run(receive_all(data))
+    assert [len(message) for message in messages] == [300, 70000]
+
+
+def test_fragmented_message_with_ping_in_between():
+    data = (client_frame(OP_TEXT, b'{"type": ', fin=False)
+            + client_frame(OP_PING, b'still there?')
+            + client_frame(OP_CONTINUATION, b'"stop"}'))
+    messages, written, _ = run(receive_all(data))
+    assert [json.loads(message) for message in messages] == [{'type': 'stop'}]
+    assert written == encode_frame(OP_PONG, b'still there?')
+
+
+def test_close_is_echoed():
+    data = client_frame(OP_CLOSE, struct.pack('!H', 1001)) + client_frame(OP_TEXT, b'ignored')
+    messages, written, ws = run(receive_all(data))
+    assert messages == []
+    assert written == encode_frame(OP_CLOSE, struct.pack('!H', 1001))
+    assert ws.closed
+
+
+def test_unmasked_client_frame_is_rejected():
+    with pytest.raises(ProtocolError):
+        run(receive_all(encode_frame(OP_TEXT, b'hi')))
+
+
+def test_oversized_message_is_rejected():
+    with pytest.raises(ProtocolError):
+        run(receive_all(client_frame(OP_BINARY, b'x' * 200), max_message=100))
+    fragments = client_frame(OP_BINARY, b'x' * 60, fin=False) + client_frame(OP_CONTINUATION, b'x' * 60)
+    with pytest.raises(ProtocolError):
+        run(receive_all(fragments, max_message=100))
+
+
+def test_continuation_without_message_is_rejected():
+    with pytest.raises(ProtocolError):
+        run(receive_all(client_frame(OP_CONTINUATION, b'x')))
+
+
+HANDSHAKE = ("GET /ws/recognize?{query} HTTP/1.1\r\nHost: 127.0.0.1\r\nUpgrade: websocket\r\n"
+             "Connection: Upgrade\r\nSec-WebSocket-Key: dGhlIHNhbXBsZSBub25jZQ==\r\n{extra}\r\n")
+
+
+async def with_service(tmp_path, talk):
+    store = PlaylistStore(str(tmp_path / 'playlists.json'), str(tmp_path / 'playlists.journal'),
+                          write_behind=False, fsync=False)
+    service = RecognitionService(MockBackend(latency=0), store, workers=1, token='secret')
+    server = await service.start('127.0.0.1', 0)
+    port = server.sockets[0].getsockname()[1]
+    try:
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        try:
+            return await talk(reader, writer)
+        finally:
+            writer.close()
+    finally:
+        server.close()
+        await server.wait_closed()
+        service.close()
+
+
+def handshake_status(tmp_path, query: str, extra: str = '') -> bytes:
+    async def talk(reader, writer):
+        writer.write(HANDSHAKE.format(query=query, extra=extra).encode())
+        await writer.drain()
+        return (await reader.readuntil(b'\r\n')).strip()
+    return run(with_service(tmp_path, talk))
+
+
+@pytest.mark.parametrize('query', ['rate=0', 'rate=abc', 'rate=-44100', 'rate=10000000'])
+def test_bad_rate_is_refused_before_the_upgrade(tmp_path, query):
+    assert handshake_status(tmp_path, query) == b'HTTP/1.1 400 Bad Request'
+
+
+def test_foreign_origin_is_refused(tmp_path):
+    status = handshake_status(tmp_path, 'rate=44100', 'Origin: https://example.com\r\n')
+    assert status == b'HTTP/1.1 403 Forbidden'
+
+
+def test_local_origin_streams(tmp_path):
+    async def talk(reader, writer):
+        writer.write(HANDSHAKE.format(query='rate=8000', extra='Origin: http://localhost:5173\r\n').encode())
+        await writer.drain()
+        head = await reader.readuntil(b'\r\n\r\n')
+        assert head.startswith(b'HTTP/1.1 101')
+        _, length = await reader.readexactly(2)
+        ready = json.loads(await reader.readexactly(length))
+        writer.write(client_frame(OP_TEXT, json.dumps(
+            {'type': 'add', 'playlist': 'happiness', 'song': {'title': 't', 'artist': 'a'}}).encode()))
+        await writer.drain()
+        _, length = await reader.readexactly(2)
+        return ready, json.loads(await reader.readexactly(length))
+
+    ready, reply = run(with_service(tmp_path, talk))
+    assert ready == {'type': 'ready', 'sample_rate': 8000}
+    # Adding to a playlist needs the token
+    assert reply['type'] == 'error'
+
+
+def test_playlist_changes_need_the_token(tmp_path):
+    body = json.dumps({'title': 't', 'artist': 'a'})
+
+    async def post(reader, writer, headers=''):
+        writer.write((f"POST /playlists/happiness HTTP/1.1\r\n{headers}"
+                      f"Content-Length: {len(body)}\r\n\r\n{body}").encode())
+        await writer.drain()
+        return (await reader.readuntil(b'\r\n')).strip()
+
+    assert run(with_service(tmp_path, post)) == b'HTTP/1.1 401 Unauthorized'
+    authorized = run(with_service(tmp_path, lambda r, w: post(r, w, 'X-VibeCatch-Token: secret\r\n')))
+    assert authorized == b'HTTP/1.1 201 Created'
+
+
+@pytest.mark.parametrize('length', ['abc', '-5', '1e3'])
+def test_bad_content_length_is_refused(tmp_path, length):
+    async def post(reader, writer):
+        writer.write(f"POST /playlists/happiness HTTP/1.1\r\nContent-Length: {length}\r\n\r\n{{}}".encode())
+        await writer.drain()
+        return (await reader.readuntil(b'\r\n')).strip()
+
+    assert run(with_service(tmp_path, post)) == b'HTTP/1.1 400 Bad Request'